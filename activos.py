@@ -0,0 +1,165 @@
+"""
+Archivos estáticos (script.js, style.css) con huella de contenido, comprimidos y servidos desde memoria.
+
+Al arrancar se lee cada archivo de static/ una sola vez: se calcula su huella (sha256) y se guardan en
+memoria el original y sus versiones gzip y, si está instalado el paquete `brotli`, brotli. url_for('static')
+agrega ?v=<huella> a las URLs, así que una URL nunca cambia de contenido y se puede cachear por un año
+con `immutable`: un visitante que vuelve no hace ninguna petición por ellos hasta el próximo deploy.
+
+ServidorActivos es un middleware WSGI (como WhiteNoise) que responde esas URLs antes de llegar a Flask,
+sin sesión, sin consultas y sin leer el disco, eligiendo la variante según Accept-Encoding.
+static/uploads/ queda afuera: sus nombres ya son un hash y los sirve Flask.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, quote_etag
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se ofrece solo gzip
+    brotli = None
+
+# Tipos que vale la pena comprimir (las imágenes ya vienen comprimidas)
+COMPRIMIBLES = {'.js', '.css', '.svg', '.json', '.txt', '.html', '.map', '.xml', '.ico'}
+# Archivos más grandes se dejan a Flask (no se guardan en memoria)
+TAMANO_MAXIMO = 2 * 1024 * 1024
+UN_ANO = 31536000
+
+
+class Activo:
+    """Un archivo estático en memoria: contenido, huella y variantes comprimidas por codificación"""
+
+    def __init__(self, ruta, calidad_brotli=11):
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        self.mtime = os.path.getmtime(ruta)
+        self.huella = hashlib.sha256(contenido).hexdigest()[:12]
+        self.tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+        if self.tipo.startswith('text/') or self.tipo in ('application/javascript', 'application/json'):
+            self.tipo += '; charset=utf-8'
+
+        self.variantes = {'identity': contenido}
+        if os.path.splitext(ruta)[1].lower() in COMPRIMIBLES:
+            # Solo se guardan las variantes que realmente achican el archivo
+            comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+            if len(comprimido) < len(contenido):
+                self.variantes['gzip'] = comprimido
+            if brotli is not None:
+                comprimido = brotli.compress(contenido, quality=calidad_brotli)
+                if len(comprimido) < len(contenido):
+                    self.variantes['br'] = comprimido
+
+
+class ManifiestoActivos:
+    """
+    Huella de cada archivo de `carpeta` (ruta relativa con '/' -> Activo), excepto las carpetas `excluir`.
+    Con `revisar=True` (desarrollo) se vuelve a leer un archivo cuando cambia su fecha de modificación.
+    """
+
+    def __init__(self, carpeta, excluir=('uploads',), revisar=False):
+        self.carpeta = carpeta
+        self.revisar = revisar
+        self._activos = {}
+        self._lock = threading.Lock()
+        for raiz, carpetas, archivos in os.walk(carpeta):
+            if raiz == carpeta:
+                carpetas[:] = [c for c in carpetas if c not in excluir]
+            for nombre in archivos:
+                ruta = os.path.join(raiz, nombre)
+                if os.path.getsize(ruta) <= TAMANO_MAXIMO:
+                    relativa = os.path.relpath(ruta, carpeta).replace(os.sep, '/')
+                    self._activos[relativa] = Activo(ruta)
+
+    def __len__(self):
+        return len(self._activos)
+
+    def obtener(self, nombre):
+        """Activo de `nombre` (ruta relativa a la carpeta) o None si no está en el manifiesto"""
+        activo = self._activos.get(nombre)
+        if activo is not None and self.revisar:
+            ruta = os.path.join(self.carpeta, *nombre.split('/'))
+            try:
+                if os.path.getmtime(ruta) != activo.mtime:
+                    activo = Activo(ruta)
+                    with self._lock:
+                        self._activos[nombre] = activo
+            except OSError:
+                return None
+        return activo
+
+    def huella(self, nombre):
+        activo = self.obtener(nombre)
+        return activo.huella if activo else None
+
+
+class ServidorActivos:
+    """
+    Middleware WSGI: responde GET/HEAD de `prefijo`<archivo> desde el manifiesto y deja pasar el resto.
+    Con ?v=<huella vigente> la respuesta es inmutable por un año; sin ella (o con una huella vieja)
+    se revalida siempre con el ETag.
+    """
+
+    def __init__(self, wsgi_app, manifiesto, prefijo='/static/'):
+        self.wsgi_app = wsgi_app
+        self.manifiesto = manifiesto
+        self.prefijo = prefijo
+
+    def __call__(self, environ, start_response):
+        ruta = environ.get('PATH_INFO', '')
+        if not ruta.startswith(self.prefijo) or environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return self.wsgi_app(environ, start_response)
+        activo = self.manifiesto.obtener(ruta[len(self.prefijo):])
+        if activo is None:
+            return self.wsgi_app(environ, start_response)
+
+        if f'v={activo.huella}' in environ.get('QUERY_STRING', '').split('&'):
+            cache_control = f'public, max-age={UN_ANO}, immutable'
+        else:
+            cache_control = 'no-cache'
+        return responder_activo(environ, start_response, activo, [('Cache-Control', cache_control), ('Vary', 'Accept-Encoding')])
+
+
+def elegir_variante(activo, accept_encoding):
+    """La variante más chica de `activo` que el cliente acepta ('identity', 'gzip' o 'br')"""
+    aceptadas = parse_accept_header(accept_encoding)
+    mejor = 'identity'
+    for codificacion, cuerpo in activo.variantes.items():
+        if codificacion != 'identity' and aceptadas[codificacion] > 0 and len(cuerpo) < len(activo.variantes[mejor]):
+            mejor = codificacion
+    return mejor
+
+
+def responder_activo(environ, start_response, activo, cabeceras, etag=None, modificado=None):
+    """
+    Respuesta WSGI de un Activo: la variante según Accept-Encoding, con ETag y 304, más `cabeceras`.
+    Sin `etag` se usa la huella del contenido (una por codificación). Con `etag` (y `modificado`, la fecha
+    de Last-Modified) se responde como comprimir_respuesta en app.py: el mismo ETag, débil si va comprimido.
+    """
+    codificacion = elegir_variante(activo, environ.get('HTTP_ACCEPT_ENCODING'))
+    if etag is None:
+        etag = quote_etag(activo.huella if codificacion == 'identity' else f'{activo.huella}-{codificacion}')
+    else:
+        etag = quote_etag(etag, weak=codificacion != 'identity')
+    cabeceras = [('ETag', etag)] + cabeceras
+    if modificado is not None:
+        cabeceras.append(('Last-Modified', http_date(modificado)))
+
+    if environ.get('HTTP_IF_NONE_MATCH'):
+        sin_cambios = parse_etags(environ['HTTP_IF_NONE_MATCH']).contains_weak(etag.removeprefix('W/').strip('"'))
+    else:
+        desde = parse_date(environ.get('HTTP_IF_MODIFIED_SINCE'))
+        sin_cambios = modificado is not None and desde is not None and desde >= modificado
+    if sin_cambios:
+        start_response('304 Not Modified', cabeceras)
+        return []
+
+    cuerpo = activo.variantes[codificacion]
+    cabeceras += [('Content-Type', activo.tipo), ('Content-Length', str(len(cuerpo)))]
+    if codificacion != 'identity':
+        cabeceras.append(('Content-Encoding', codificacion))
+    start_response('200 OK', cabeceras)
+    return [] if environ['REQUEST_METHOD'] == 'HEAD' else [cuerpo]
@@ -1,44 +1,335 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory
+from flask import Flask, Blueprint, current_app, g, has_app_context, has_request_context, before_render_template, template_rendered, render_template, request, jsonify, redirect, url_for, session, flash, send_from_directory, send_file, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from datetime import datetime
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.middleware.proxy_fix import ProxyFix
+from markupsafe import Markup
+from sqlalchemy import inspect, text, or_, and_, func, insert, delete, event, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, NullPool
+from sqlalchemy.orm import validates
+from datetime import datetime, date, time, timedelta
+from functools import wraps
+import click
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import base64
+import hashlib
+import json
+import math
+import binascii
 import os
+import random
+import re
 import sys
+import threading
+import time as reloj
 from dotenv import load_dotenv
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson la API usa json de la librería estándar
+    orjson = None
+from imagenes import ImagenesSubidas, PATRON_NOMBRE
+from miniaturas import CacheMiniaturas, DescargaFallida, clave_url, descargar_imagen
+import importacion
+import busqueda
+import compresion
+from limitador import AlmacenMemoria, Limitador
+from cambios import FeedCambios
+from activos import ManifiestoActivos, ServidorActivos
+from instantaneas import GeneradorInstantaneas, ServidorInstantaneas, validadores_version
+import metricas
 
 # Cargar variables de entorno
 load_dotenv()
 
-app = Flask(__name__)
-
-# Configuración de base de datos (PostgreSQL en producción, SQLite en desarrollo)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///torneos.db')
-# Render usa postgres:// pero SQLAlchemy necesita postgresql://
-if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
+class SesionEnrutada(FlaskSession):
+    """
+    Sesión de Flask-SQLAlchemy que manda las lecturas de las vistas de solo lectura a una réplica.
+    La réplica la elige elegir_base() en g.replica; las escrituras (flush, INSERT/UPDATE/DELETE)
+    y todo lo que corre fuera de una petición (CLI, hilos de fondo) siguen yendo a la primaria.
+    """
 
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'tu-clave-secreta-super-segura-cambiar-en-produccion')
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB máximo
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None and not self._flushing and has_request_context() and g.get('replica')
+            and not (clause is not None and getattr(clause, 'is_dml', False))
+        ):
+            return self._db.engines[g.replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
-# Crear carpeta de uploads si no existe
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
 
 # Configurar Flask-Login
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'principal.login'
 login_manager.login_message = None
 
+# Todas las rutas de la aplicación; create_app las registra en cada instancia de Flask
+principal = Blueprint('principal', __name__, cli_group=None)
+
+metrica_pool_espera = metricas.Histograma(
+    'tcghub_db_pool_checkout_seconds', 'Tiempo esperando una conexión libre del pool (incluye abrirla)'
+)
+metrica_pool_timeouts = metricas.Contador(
+    'tcghub_db_pool_timeouts_total', 'Peticiones que no obtuvieron conexión dentro de DB_POOL_TIMEOUT'
+)
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que registra cuánto espera cada checkout y cuántos terminan en timeout"""
+
+    def _do_get(self):
+        inicio = reloj.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrica_pool_timeouts.incrementar()
+            raise
+        finally:
+            metrica_pool_espera.observar(reloj.perf_counter() - inicio)
+
+
+def opciones_engine(config, uri=None):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS según DB_*, para `uri` (por defecto la base primaria). Con PGBOUNCER=1
+    no se mantiene un pool propio (PgBouncer ya reparte las conexiones), así los workers nunca
+    retienen conexiones ociosas.
+    """
+    uri = uri or config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    
+    opciones = {}
+    if uri.startswith('postgresql'):
+        opciones['connect_args'] = {'connect_timeout': config['DB_CONNECT_TIMEOUT']}
+    if config['PGBOUNCER']:
+        opciones['poolclass'] = NullPool
+        return opciones
+    
+    opciones.update(
+        poolclass=PoolMedido,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+        pool_pre_ping=config['DB_POOL_PRE_PING'],
+        # Reutilizar siempre la conexión más reciente deja que las sobrantes envejezcan y se reciclen
+        pool_use_lifo=True,
+    )
+    return opciones
+
+
+def normalizar_url_db(url):
+    # Render usa postgres:// pero SQLAlchemy necesita postgresql://
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def create_app(config=None):
+    """
+    Crea y configura la aplicación. No toca la base de datos: las tablas y los datos iniciales
+    se crean con `flask --app app init-db` y `flask --app app seed`, una vez por despliegue,
+    en lugar de en cada worker de gunicorn al importar el módulo.
+    `config` permite sobreescribir valores (por ejemplo en benchmarks o scripts).
+    """
+    app = Flask(__name__)
+
+    # Configuración de base de datos (PostgreSQL en producción, SQLite en desarrollo)
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalizar_url_db(os.environ.get('DATABASE_URL', 'sqlite:///torneos.db'))
+    # Réplicas de solo lectura opcionales (URLs separadas por coma); ver elegir_base()
+    app.config['DATABASE_REPLICA_URLS'] = [
+        normalizar_url_db(url.strip()) for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+    ]
+    # Segundos que quien acaba de escribir lee de la primaria (debe cubrir el retraso de las réplicas)
+    app.config['REPLICA_RETRASO_MAX'] = int(os.environ.get('REPLICA_RETRASO_MAX', 5))
+
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'tu-clave-secreta-super-segura-cambiar-en-produccion')
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB máximo
+    app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    # Máximo de tarjetas HTML renderizadas que se mantienen en memoria por worker
+    app.config['CACHE_TARJETAS_MAX'] = int(os.environ.get('CACHE_TARJETAS_MAX', 5000))
+    # Paginación de /api/torneos y /api/filtrar
+    app.config['TORNEOS_POR_PAGINA'] = int(os.environ.get('TORNEOS_POR_PAGINA', 24))
+    app.config['TORNEOS_LIMITE_MAXIMO'] = int(os.environ.get('TORNEOS_LIMITE_MAXIMO', 200))
+    # Filas por INSERT en la importación masiva, y máximo de errores que se reportan
+    app.config['IMPORTACION_LOTE'] = int(os.environ.get('IMPORTACION_LOTE', 1000))
+    app.config['IMPORTACION_MAX_ERRORES'] = int(os.environ.get('IMPORTACION_MAX_ERRORES', 50))
+    # Segundos máximos que un worker sirve Logo/Popup desde memoria sin revisar si cambiaron
+    app.config['CACHE_SINGLETON_TTL'] = float(os.environ.get('CACHE_SINGLETON_TTL', 5))
+    # Segundos que un worker reutiliza la identidad del usuario logueado sin volver a leerla
+    app.config['USUARIOS_CACHE_TTL'] = float(os.environ.get('USUARIOS_CACHE_TTL', 60))
+    # Segundos que un navegador/CDN puede reutilizar /api/torneos y /api/filtrar sin revalidar (0 = revalidar siempre)
+    app.config['CACHE_API_MAX_AGE'] = int(os.environ.get('CACHE_API_MAX_AGE', 0))
+    # Cantidad de próximas fechas que entrega /api/facets
+    app.config['FACETAS_FECHAS_MAX'] = int(os.environ.get('FACETAS_FECHAS_MAX', 60))
+    # `flask archivar` mueve a /api/historial los torneos de hace más de ARCHIVO_DIAS días
+    app.config['ARCHIVO_DIAS'] = int(os.environ.get('ARCHIVO_DIAS', 30))
+    # Días que cubre como máximo una consulta a /api/calendario (también es el rango por defecto)
+    app.config['CALENDARIO_DIAS_MAX'] = int(os.environ.get('CALENDARIO_DIAS_MAX', 62))
+
+    # Miniaturas de las imágenes externas de los torneos (cache en disco)
+    app.config['MINIATURAS_CARPETA'] = os.environ.get('MINIATURAS_CARPETA', os.path.join(app.instance_path, 'miniaturas'))
+    app.config['MINIATURAS_MAX_MB'] = int(os.environ.get('MINIATURAS_MAX_MB', 200))
+    app.config['MINIATURAS_DESCARGADOR'] = descargar_imagen
+    # Segundos que una imagen que no se pudo descargar redirige al original sin reintentar
+    app.config['MINIATURAS_REINTENTO'] = int(os.environ.get('MINIATURAS_REINTENTO', 300))
+
+    # Pool de conexiones por worker. Con los valores por defecto y 3 workers: 3 x (5 + 5) = 30 conexiones
+    # como máximo, dentro del límite del PostgreSQL gratuito de Render
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    # Segundos que una petición espera una conexión libre antes de fallar
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    # Las conexiones se renuevan cada 30 minutos (antes de que el servidor o un proxy las corte)
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    app.config['DB_CONNECT_TIMEOUT'] = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+    app.config['PGBOUNCER'] = os.environ.get('PGBOUNCER') == '1'
+    # Si está definido, /metrics exige el header Authorization: Bearer <token>. En producción
+    # (FLASK_ENV=production) es obligatorio: sin token /metrics responde 404, así las latencias por
+    # endpoint no quedan públicas por olvido
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['METRICS_SIN_TOKEN'] = os.environ.get('FLASK_ENV') != 'production'
+    # Consultas SQL máximas por petición (detector de N+1). En modo estricto exceder el presupuesto
+    # lanza una excepción (para pruebas); si no, solo se registra en el log y en /metrics
+    app.config['PRESUPUESTO_CONSULTAS'] = int(os.environ.get('PRESUPUESTO_CONSULTAS', 10))
+    app.config['CONSULTAS_ESTRICTO'] = os.environ.get('CONSULTAS_ESTRICTO') == '1'
+    # Header Server-Timing con el desglose app/db/templates de cada respuesta
+    app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '1') == '1'
+
+    # Intentos de login: ráfaga permitida y recuperación por minuto, por IP y por usuario
+    app.config['LOGIN_IP_RAFAGA'] = int(os.environ.get('LOGIN_IP_RAFAGA', 10))
+    app.config['LOGIN_IP_POR_MINUTO'] = float(os.environ.get('LOGIN_IP_POR_MINUTO', 10))
+    app.config['LOGIN_USUARIO_RAFAGA'] = int(os.environ.get('LOGIN_USUARIO_RAFAGA', 5))
+    app.config['LOGIN_USUARIO_POR_MINUTO'] = float(os.environ.get('LOGIN_USUARIO_POR_MINUTO', 5))
+    # Almacén de las cubetas (None = memoria del worker); ver limitador.py
+    app.config['LIMITADOR_ALMACEN'] = None
+    # Verificaciones de contraseña simultáneas por worker, y cuántas más pueden esperar turno
+    app.config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', 2))
+    app.config['LOGIN_HASH_COLA'] = int(os.environ.get('LOGIN_HASH_COLA', 4))
+    # Proxies delante de la app (Render: 1). Con 0 se usa la IP de la conexión tal cual
+    app.config['PROXY_SALTOS'] = int(os.environ.get('PROXY_SALTOS', 0))
+
+    # Cambios en vivo (/api/cambios). Cada conexión abierta ocupa un hilo del worker mientras dura,
+    # así que se limitan por worker; las demás consultan cada CAMBIOS_REINTENTO segundos
+    app.config['CAMBIOS_INTERVALO'] = float(os.environ.get('CAMBIOS_INTERVALO', 1))
+    app.config['CAMBIOS_DURACION'] = int(os.environ.get('CAMBIOS_DURACION', 300))
+    app.config['CAMBIOS_MAX_CONEXIONES'] = int(os.environ.get('CAMBIOS_MAX_CONEXIONES', 2))
+    app.config['CAMBIOS_REINTENTO'] = int(os.environ.get('CAMBIOS_REINTENTO', 30))
+
+    # Archivos de static/ con huella (?v=) servidos desde memoria, comprimidos e inmutables.
+    # ACTIVOS_REVISAR relee los que cambian en disco (por defecto solo con FLASK_DEBUG)
+    app.config['ACTIVOS_EN_MEMORIA'] = os.environ.get('ACTIVOS_EN_MEMORIA', '1') == '1'
+    app.config['ACTIVOS_REVISAR'] = os.environ.get('ACTIVOS_REVISAR', '1' if app.debug else '0') == '1'
+    # Página pública pre-renderizada en archivos para los visitantes sin sesión (ver instantaneas.py).
+    # La carpeta por defecto depende de la base, así dos apps con bases distintas no comparten instantáneas
+    app.config['INSTANTANEAS'] = os.environ.get('INSTANTANEAS', '1') == '1'
+    app.config['INSTANTANEAS_CARPETA'] = os.environ.get('INSTANTANEAS_CARPETA', os.path.join(
+        app.instance_path, 'instantaneas', hashlib.sha256(app.config['SQLALCHEMY_DATABASE_URI'].encode()).hexdigest()[:12]
+    ))
+    # Comprimir HTML/JSON dinámicos con gzip o brotli (0 si ya lo hace un proxy delante)
+    app.config['COMPRIMIR_RESPUESTAS'] = os.environ.get('COMPRIMIR_RESPUESTAS', '1') == '1'
+
+    if config:
+        app.config.update(config)
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_engine(app.config)
+    # Cada réplica es un bind más de Flask-SQLAlchemy ('replica0', 'replica1', ...) con su propio pool.
+    # Ningún modelo la usa directamente: SesionEnrutada la elige por petición
+    replicas = {
+        f'replica{i}': {'url': url, **opciones_engine(app.config, url)}
+        for i, url in enumerate(app.config['DATABASE_REPLICA_URLS'])
+    }
+    app.config.setdefault('SQLALCHEMY_BINDS', {}).update(replicas)
+    app.extensions['replicas'] = list(replicas)
+
+    # Crear carpeta de uploads si no existe
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.extensions['imagenes'] = ImagenesSubidas(app.config['UPLOAD_FOLDER'], al_generar=variantes_generadas(app))
+
+    app.extensions['activos'] = ManifiestoActivos(app.static_folder, revisar=app.config['ACTIVOS_REVISAR'])
+    if app.config['ACTIVOS_EN_MEMORIA']:
+        app.wsgi_app = ServidorActivos(app.wsgi_app, app.extensions['activos'], app.static_url_path + '/')
+
+    app.extensions['instantaneas'] = None
+    if app.config['INSTANTANEAS']:
+        generador = GeneradorInstantaneas(
+            app.config['INSTANTANEAS_CARPETA'], RUTAS_INSTANTANEAS, renderizador_instantaneas(app), lector_versiones(app),
+            al_fallar=lambda e: app.logger.warning('No se pudieron generar las instantáneas: %s', e)
+        )
+        cookies_sesion = (app.config['SESSION_COOKIE_NAME'], app.config.get('REMEMBER_COOKIE_NAME', 'remember_token'))
+        # Relee Version como CacheSingleton: un cambio hecho en otra instancia se nota en CACHE_SINGLETON_TTL segundos
+        servidor = ServidorInstantaneas(
+            app.wsgi_app, app.config['INSTANTANEAS_CARPETA'], RUTAS_INSTANTANEAS, cookies_sesion,
+            lector_versiones(app), app.config['CACHE_SINGLETON_TTL'], CONDICIONALES_INSTANTANEAS,
+            f"public, max-age={app.config['CACHE_API_MAX_AGE']}, must-revalidate"
+        )
+        app.wsgi_app = servidor
+        app.extensions['instantaneas'] = SimpleNamespace(generador=generador, servidor=servidor)
+
+    if app.config['PROXY_SALTOS']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_SALTOS'], x_proto=app.config['PROXY_SALTOS'])
+
+    app.extensions['miniaturas'] = CacheMiniaturas(
+        app.config['MINIATURAS_CARPETA'],
+        app.config['MINIATURAS_MAX_MB'] * 1024 * 1024,
+        descargador=app.config['MINIATURAS_DESCARGADOR'],
+        reintento=app.config['MINIATURAS_REINTENTO'],
+    )
+
+    # Caches en memoria de esta app: dos apps de create_app() (tests, benchmarks) no comparten resultados
+    app.extensions['singletons'] = SimpleNamespace(
+        logo=CacheSingleton(Logo, ['filename', 'uploaded_at']),
+        popup=CacheSingleton(Popup, ['activo', 'filename', 'uploaded_at']),
+    )
+    app.extensions['usuarios'] = CacheUsuarios()
+    app.extensions['tarjetas'] = SimpleNamespace(cache=OrderedDict(), lock=threading.Lock())
+    app.extensions['facetas'] = SimpleNamespace(guardadas=(None, None))
+    app.extensions['busqueda'] = SimpleNamespace(
+        indice=busqueda.IndiceVigente(
+            constructor_indice_busqueda(app),
+            al_fallar=lambda e: app.logger.warning('No se pudo reconstruir el índice de búsqueda: %s', e)
+        ),
+        pg_trgm=None,
+    )
+
+    almacen = app.config['LIMITADOR_ALMACEN'] or AlmacenMemoria()
+    app.extensions['login'] = SimpleNamespace(
+        limitador_ip=Limitador(app.config['LOGIN_IP_RAFAGA'], app.config['LOGIN_IP_POR_MINUTO'], almacen, 'ip:'),
+        limitador_usuario=Limitador(app.config['LOGIN_USUARIO_RAFAGA'], app.config['LOGIN_USUARIO_POR_MINUTO'], almacen, 'usuario:'),
+        executor=ThreadPoolExecutor(max_workers=app.config['LOGIN_HASH_WORKERS'], thread_name_prefix='login'),
+        cupos=threading.BoundedSemaphore(app.config['LOGIN_HASH_WORKERS'] + app.config['LOGIN_HASH_COLA']),
+    )
+    app.extensions['cambios'] = SimpleNamespace(
+        feed=FeedCambios(
+            lector_cambios(app), app.config['CAMBIOS_INTERVALO'],
+            al_fallar=lambda e: app.logger.warning('No se pudieron leer los cambios de torneos: %s', e)
+        ),
+        cupos=threading.BoundedSemaphore(app.config['CAMBIOS_MAX_CONEXIONES']),
+    )
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(principal)
+    return app
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Solo se llama si la sesión tiene un usuario: las visitas anónimas no llegan aquí
+    return current_app.extensions['usuarios'].obtener(user_id)
+
+def token_password(password_hash):
+    """Huella corta del hash de la contraseña: va en el id de sesión y cambia al cambiar la contraseña"""
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
 
 # Modelo de Usuario
 class User(UserMixin, db.Model):
@@ -48,9 +339,25 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
+        # Las sesiones abiertas con la contraseña anterior dejan de ser válidas en todos los workers
+        Version.incrementar('user')
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+    
+    def get_id(self):
+        return f'{self.id}:{token_password(self.password_hash)}'
+
+
+class UsuarioSesion(UserMixin):
+    """Copia de solo lectura de un User para current_user (no está ligada a la sesión de SQLAlchemy)"""
+    def __init__(self, id, username, id_sesion):
+        self.id = id
+        self.username = username
+        self._id_sesion = id_sesion
+    
+    def get_id(self):
+        return self._id_sesion
 
 
 class Logo(db.Model):
@@ -84,13 +391,157 @@ class Popup(db.Model):
         return Popup.query.first()
 
 
+class Version(db.Model):
+    """
+    Contador de cambios por recurso ('logo', 'popup', ...).
+    Cada escritura lo incrementa en su misma transacción; los workers de gunicorn
+    comparan su copia en memoria con este valor para saber cuándo recargar.
+    """
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    @staticmethod
+    def obtener(nombre):
+        """Retorna el valor actual del contador (0 si nunca se incrementó)"""
+        return db.session.execute(db.select(Version.valor).filter_by(nombre=nombre)).scalar() or 0
+    
+    @staticmethod
+    def incrementar(nombre):
+        """Incrementa el contador. Se confirma con el commit de quien lo llama"""
+        resultado = db.session.execute(
+            db.update(Version)
+            .where(Version.nombre == nombre)
+            .values(valor=Version.valor + 1, actualizado_en=datetime.utcnow())
+        )
+        if resultado.rowcount == 0:
+            db.session.add(Version(nombre=nombre, valor=1))
+        # Para los avisos de después del commit (ver _despues_de_commit)
+        db.session.info.setdefault('versiones', set()).add(nombre)
+
+
+class CacheSingleton:
+    """
+    Cache en memoria (por worker) para los modelos de un solo registro (Logo, Popup).
+    Guarda una copia de solo lectura de los campos y revisa el contador de Version
+    como máximo cada CACHE_SINGLETON_TTL segundos, así todos los workers ven un cambio
+    dentro de ese plazo sin consultar la tabla en cada visita.
+    """
+    def __init__(self, modelo, campos):
+        self.modelo = modelo
+        self.campos = campos
+        self.nombre = modelo.__tablename__
+        self._lock = threading.Lock()
+        self._valor = None
+        self._version = None
+        self._revisado = 0.0
+    
+    def obtener(self):
+        """Retorna la copia en memoria del registro, o None si no existe"""
+        if self._version is not None and reloj.monotonic() - self._revisado < current_app.config['CACHE_SINGLETON_TTL']:
+            return self._valor
+        
+        with self._lock:
+            version = Version.obtener(self.nombre)
+            if version != self._version:
+                registro = self.modelo.query.first()
+                self._valor = SimpleNamespace(**{campo: getattr(registro, campo) for campo in self.campos}) if registro else None
+                self._version = version
+            self._revisado = reloj.monotonic()
+            return self._valor
+    
+    def invalidar(self):
+        """
+        Llamar antes del commit de una escritura: incrementa la versión en la misma transacción
+        (los demás workers la ven en su próxima revisión) y fuerza a este worker a revisar de inmediato.
+        """
+        Version.incrementar(self.nombre)
+        self.vencer()
+    
+    def vencer(self):
+        """La próxima lectura revisa Version aunque no haya pasado CACHE_SINGLETON_TTL"""
+        self._revisado = 0.0
+
+
+class CacheUsuarios:
+    """
+    Identidades de sesión en memoria (por worker) para load_user, sin consultar User en cada petición.
+    El id de sesión incluye token_password, así que cambiar la contraseña invalida las sesiones viejas;
+    el cambio incrementa Version('user') y cada worker vacía su cache al notarlo (revisa como máximo
+    cada CACHE_SINGLETON_TTL segundos). Además cada entrada vence a los USUARIOS_CACHE_TTL segundos.
+    """
+    def __init__(self, maximo=1000):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._version = None
+        self._revisado = 0.0
+    
+    def obtener(self, id_sesion):
+        """Retorna el UsuarioSesion de `id_sesion` o None si la sesión ya no es válida"""
+        ahora = reloj.monotonic()
+        if self._version is None or ahora - self._revisado >= current_app.config['CACHE_SINGLETON_TTL']:
+            version = Version.obtener('user')
+            with self._lock:
+                if version != self._version:
+                    self._entradas.clear()
+                    self._version = version
+                self._revisado = ahora
+        
+        with self._lock:
+            entrada = self._entradas.get(id_sesion)
+            if entrada is not None and entrada[1] > ahora:
+                self._entradas.move_to_end(id_sesion)
+                return entrada[0]
+        
+        usuario = self._cargar(id_sesion)
+        with self._lock:
+            # También se guardan las sesiones inválidas (None), para no consultar en cada petición
+            self._entradas[id_sesion] = (usuario, ahora + current_app.config['USUARIOS_CACHE_TTL'])
+            self._entradas.move_to_end(id_sesion)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return usuario
+    
+    def invalidar(self):
+        """Vacía el cache de este worker (los demás lo hacen al ver el cambio de Version('user'))"""
+        with self._lock:
+            self._entradas.clear()
+    
+    @staticmethod
+    def _cargar(id_sesion):
+        id_usuario, _, token = id_sesion.partition(':')
+        # Sesiones de antes del token (solo el id): se pide iniciar sesión de nuevo
+        if not token or not id_usuario.isdigit():
+            return None
+        fila = db.session.execute(
+            db.select(User.id, User.username, User.password_hash).filter_by(id=int(id_usuario))
+        ).first()
+        if fila is None or token_password(fila.password_hash) != token:
+            return None
+        return UsuarioSesion(fila.id, fila.username, id_sesion)
+
+
 # Modelo de Torneo
 class Torneo(db.Model):
+    # Índices para las combinaciones de filtros de /api/filtrar.
+    # Todos terminan en (fecha, id) para que el orden salga del índice sin ordenar en memoria
+    __table_args__ = (
+        db.Index('ix_torneo_fecha_id', 'fecha', 'id'),
+        db.Index('ix_torneo_ubicacion_fecha_id', 'ubicacion', 'fecha', 'id'),
+        db.Index('ix_torneo_tipo_juego_fecha_id', 'tipo_juego', 'fecha', 'id'),
+        db.Index('ix_torneo_ubicacion_tipo_juego_fecha_id', 'ubicacion', 'tipo_juego', 'fecha', 'id'),
+        db.Index('ix_torneo_categoria_fecha_id', 'categoria', 'fecha', 'id'),
+        # Sin AUTOINCREMENT SQLite reutiliza el id más alto al borrarlo (o archivarlo), y archivar
+        # después el torneo nuevo con ese id choca con el viejo en torneo_archivado
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nombre_tienda = db.Column(db.String(100), nullable=False)
     ubicacion = db.Column(db.String(100), nullable=False)
-    hora = db.Column(db.String(5), nullable=False)  # HH:MM
-    fecha = db.Column(db.String(50), nullable=False)
+    hora = db.Column(db.Time, nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
     premio = db.Column(db.String(100))
     tipo_juego = db.Column(db.String(50), nullable=False)  # Pokemon, One Piece, etc
     categoria = db.Column(db.String(20), nullable=False)  # Junior, Senior, Master
@@ -98,13 +549,27 @@ class Torneo(db.Model):
     imagen = db.Column(db.String(500), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @validates('fecha')
+    def validar_fecha(self, key, valor):
+        """Acepta la fecha como texto YYYY-MM-DD (así llega desde el JSON de la API)"""
+        if isinstance(valor, str):
+            return date.fromisoformat(valor)
+        return valor
+
+    @validates('hora')
+    def validar_hora(self, key, valor):
+        """Acepta la hora como texto HH:MM"""
+        if isinstance(valor, str):
+            return time.fromisoformat(valor)
+        return valor
+
     def to_dict(self):
         return {
             'id': self.id,
             'nombre_tienda': self.nombre_tienda,
             'ubicacion': self.ubicacion,
-            'hora': self.hora,
-            'fecha': self.fecha,
+            'hora': self.hora.strftime('%H:%M'),
+            'fecha': self.fecha.isoformat(),
             'premio': self.premio,
             'tipo_juego': self.tipo_juego,
             'categoria': self.categoria,
@@ -112,6 +577,85 @@ class Torneo(db.Model):
             'imagen': self.imagen
         }
 
+class CambioTorneo(db.Model):
+    """
+    Secuencia de altas, ediciones y bajas de torneos que sigue /api/cambios.
+    torneo_id None con accion 'recargar' es un cambio masivo (importación, datos de ejemplo).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    torneo_id = db.Column(db.Integer, nullable=True)
+    accion = db.Column(db.String(10), nullable=False)  # crear, actualizar, eliminar, recargar
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Los lectores solo piden cambios recientes; los más viejos se borran en cada escritura
+    RETENCION = timedelta(hours=1)
+    
+    @staticmethod
+    def registrar(accion, torneo_id=None):
+        """
+        Registra un cambio de torneos en la transacción de quien lo llama, junto con Version('torneos').
+        El UPDATE de Version bloquea su fila hasta el commit, así los ids de la secuencia
+        quedan en el mismo orden en que se confirman las escrituras.
+        """
+        Version.incrementar('torneos')
+        db.session.add(CambioTorneo(accion=accion, torneo_id=torneo_id))
+        db.session.execute(delete(CambioTorneo).where(CambioTorneo.creado_en < datetime.utcnow() - CambioTorneo.RETENCION))
+    
+    @staticmethod
+    def ultimo():
+        """Id del último cambio registrado (0 si no hay)"""
+        return db.session.execute(db.select(func.max(CambioTorneo.id))).scalar() or 0
+
+
+class TorneoArchivado(db.Model):
+    """
+    Torneos pasados que `flask archivar` sacó de la tabla torneo (mismo id y columnas).
+    Así la tabla que leen la grid, los filtros y la API solo tiene la temporada actual;
+    los anteriores se consultan en /api/historial.
+    """
+    __tablename__ = 'torneo_archivado'
+    __table_args__ = (
+        db.Index('ix_torneo_archivado_fecha_id', 'fecha', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nombre_tienda = db.Column(db.String(100), nullable=False)
+    ubicacion = db.Column(db.String(100), nullable=False)
+    hora = db.Column(db.Time, nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    premio = db.Column(db.String(100))
+    tipo_juego = db.Column(db.String(50), nullable=False)
+    categoria = db.Column(db.String(20), nullable=False)
+    tipo_torneo = db.Column(db.String(30), nullable=False)
+    imagen = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+def archivar_torneos(antes_de, lote=1000):
+    """
+    Mueve a torneo_archivado los torneos con fecha anterior a `antes_de`, de a `lote` por transacción
+    (así no se bloquean las escrituras del admin mientras dura). Retorna cuántos se movieron.
+    """
+    columnas = [columna.key for columna in Torneo.__table__.columns]
+    total = 0
+    while True:
+        ids = db.session.execute(
+            db.select(Torneo.id).where(Torneo.fecha < antes_de).order_by(Torneo.id).limit(lote)
+        ).scalars().all()
+        if not ids:
+            return total
+        db.session.execute(insert(TorneoArchivado).from_select(
+            columnas + ['archivado_en'],
+            db.select(*Torneo.__table__.columns, literal(datetime.utcnow(), db.DateTime)).where(Torneo.id.in_(ids))
+        ))
+        db.session.execute(delete(Torneo).where(Torneo.id.in_(ids)))
+        CambioTorneo.registrar('recargar')
+        Version.incrementar('historial')
+        db.session.commit()
+        total += len(ids)
+
+
 def crear_torneos_dummy():
     from datetime import datetime, timedelta
     
@@ -143,7 +687,7 @@ def crear_torneos_dummy():
         fecha = hoy - timedelta(days=dias_atras)
         while fecha.weekday() not in [5, 6]:
             fecha -= timedelta(days=1)
-        fechas.append(fecha.strftime('%Y-%m-%d'))
+        fechas.append(fecha.date())
     
     # Fechas futuras (sábados y domingos)
     for i in range(1, 7):
@@ -151,104 +695,422 @@ def crear_torneos_dummy():
         fecha = hoy + timedelta(days=dias_adelante)
         while fecha.weekday() not in [5, 6]:
             fecha += timedelta(days=1)
-        fechas.append(fecha.strftime('%Y-%m-%d'))
+        fechas.append(fecha.date())
     
-    # Crear los 10 torneos
+    # Crear los 10 torneos en un solo INSERT por lotes
     torneos_dummy = [
-        Torneo(
-            nombre_tienda=tiendas[i],
-            ubicacion=tiendas[i].split()[-1],
-            hora=horas[i],
-            fecha=fechas[i],
-            premio=premios[i],
-            tipo_juego=tipos_juego[i],
-            categoria=categorias[i],
-            tipo_torneo=tipos_torneo[i],
-            imagen=imagenes[i]
-        )
+        {
+            'nombre_tienda': tiendas[i],
+            'ubicacion': tiendas[i].split()[-1],
+            'hora': time.fromisoformat(horas[i]),
+            'fecha': fechas[i],
+            'premio': premios[i],
+            'tipo_juego': tipos_juego[i],
+            'categoria': categorias[i],
+            'tipo_torneo': tipos_torneo[i],
+            'imagen': imagenes[i]
+        }
         for i in range(10)
     ]
     
-    for torneo in torneos_dummy:
-        db.session.add(torneo)
+    db.session.execute(insert(Torneo), torneos_dummy)
+    CambioTorneo.registrar('recargar')
     db.session.commit()
 
-# Crear las tablas
-with app.app_context():
-    db.create_all()
+def migrar_esquema():
+    """
+    Lleva una base existente al esquema actual. Es idempotente, se puede correr en cada arranque.
+    - Torneo.fecha / Torneo.hora pasan de texto a DATE / TIME
+    - En SQLite, recrea la tabla torneo con AUTOINCREMENT si no lo tiene (ver recrear_torneo_sqlite)
+    - Crea los índices de Torneo que falten (create_all no los agrega a tablas existentes)
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('torneo'):
+        return
     
-    # Crear usuario admin si no existe
-    try:
-        admin = User.query.filter_by(username='admin').first()
-        if not admin:
-            admin = User(username='admin')
-            admin.set_password('admin123')  # Cambiar en producción
-            db.session.add(admin)
-            db.session.commit()
-            print('✓ Usuario admin creado (username: admin, password: admin123)')
-    except Exception as e:
-        print(f'Nota al crear admin: {str(e)}')
+    columnas = {columna['name']: columna['type'] for columna in inspector.get_columns('torneo')}
+    with db.engine.begin() as conn:
+        if db.engine.dialect.name == 'postgresql':
+            if not isinstance(columnas['fecha'], db.Date):
+                conn.execute(text('ALTER TABLE torneo ALTER COLUMN fecha TYPE DATE USING fecha::date'))
+            if not isinstance(columnas['hora'], db.Time):
+                conn.execute(text('ALTER TABLE torneo ALTER COLUMN hora TYPE TIME USING hora::time'))
+        elif db.engine.dialect.name == 'sqlite':
+            # SQLite no tiene tipos de fecha: SQLAlchemy guarda DATE como 'YYYY-MM-DD' (igual que antes)
+            # y TIME como 'HH:MM:SS.ffffff', así que solo hay que completar las horas guardadas como 'HH:MM'
+            conn.execute(
+                text('UPDATE torneo SET hora = hora || :segundos WHERE length(hora) = 5'),
+                {'segundos': ':00.000000'}
+            )
+            definicion = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'torneo'")).scalar()
+            if 'AUTOINCREMENT' not in definicion.upper():
+                recrear_torneo_sqlite(conn, list(columnas))
+    
+    for indice in Torneo.__table__.indexes:
+        indice.create(bind=db.engine, checkfirst=True)
     
-    # Crear torneos dummy solo si no hay ninguno
+    if db.engine.dialect.name == 'postgresql':
+        crear_indices_busqueda()
+
+
+def recrear_torneo_sqlite(conn, columnas):
+    """
+    Recrea la tabla torneo de una base SQLite anterior con AUTOINCREMENT (SQLite no permite agregarlo con
+    ALTER TABLE), copiando las `columnas` existentes con sus ids. La secuencia queda por encima de los
+    ids ya archivados, así ningún torneo nuevo repite uno de torneo_archivado.
+    """
+    for indice in inspect(conn).get_indexes('torneo'):
+        conn.execute(text(f'DROP INDEX "{indice["name"]}"'))
+    conn.execute(text('ALTER TABLE torneo RENAME TO torneo_anterior'))
+    Torneo.__table__.create(conn)
+    nombres = ', '.join(f'"{columna}"' for columna in columnas if columna in Torneo.__table__.columns)
+    conn.execute(text(f'INSERT INTO torneo ({nombres}) SELECT {nombres} FROM torneo_anterior'))
+    conn.execute(text('DROP TABLE torneo_anterior'))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'torneo'"))
+    conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'torneo', max("
+        "(SELECT coalesce(max(id), 0) FROM torneo), (SELECT coalesce(max(id), 0) FROM torneo_archivado))"
+    ))
+
+
+# Texto y documento de búsqueda en PostgreSQL. Deben coincidir exactamente con los de los índices
+# para que el planner los use (|| y coalesce en vez de concat_ws, que no es IMMUTABLE)
+TEXTO_BUSQUEDA_SQL = (
+    "coalesce(nombre_tienda, '') || ' ' || coalesce(ubicacion, '') || ' ' || "
+    "coalesce(tipo_torneo, '') || ' ' || coalesce(premio, '')"
+)
+DOCUMENTO_BUSQUEDA_SQL = (
+    "setweight(to_tsvector('simple', coalesce(nombre_tienda, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(ubicacion, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(tipo_torneo, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(premio, '')), 'D')"
+)
+
+def crear_indices_busqueda():
+    """Índice GIN de texto completo y, si se puede instalar pg_trgm, de trigramas para /api/buscar"""
+    with db.engine.begin() as conn:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_torneo_busqueda_tsv ON torneo USING gin (({DOCUMENTO_BUSQUEDA_SQL}))'))
     try:
-        if Torneo.query.count() == 0:
-            crear_torneos_dummy()
-            print('✓ Torneos dummy creados exitosamente')
+        with db.engine.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_torneo_busqueda_trgm ON torneo USING gin (({TEXTO_BUSQUEDA_SQL}) gin_trgm_ops)'))
     except Exception as e:
-        print(f'Nota: {str(e)}')
+        print(f'Nota: sin pg_trgm la búsqueda no tolera errores de tipeo ({e})')
+
+def inicializar_db():
+    """Crea las tablas que falten, migra el esquema y crea el usuario admin si no existe"""
+    db.create_all()
+    migrar_esquema()
+    
+    admin = User.query.filter_by(username='admin').first()
+    if not admin:
+        admin = User(username='admin')
+        admin.set_password('admin123')  # Cambiar en producción
+        db.session.add(admin)
+        db.session.commit()
+        print('✓ Usuario admin creado (username: admin, password: admin123)')
+
+def sembrar_datos():
+    """Crea los torneos dummy y el popup inicial, solo si todavía no existen"""
+    if Torneo.query.count() == 0:
+        crear_torneos_dummy()
+        print('✓ Torneos dummy creados exitosamente')
     
     # Crear popup con imagen dummy si no existe
-    try:
-        if not Popup.query.first():
-            popup_dummy = Popup(
-                activo=False,
-                filename='popup_dummy.jpg'
-            )
-            db.session.add(popup_dummy)
-            db.session.commit()
-            print('✓ Popup inicial creado con imagen dummy (desactivado)')
-    except Exception as e:
-        print(f'Nota al crear popup: {str(e)}')
+    if not Popup.query.first():
+        popup_dummy = Popup(
+            activo=False,
+            filename='popup_dummy.jpg'
+        )
+        db.session.add(popup_dummy)
+        current_app.extensions['singletons'].popup.invalidar()
+        db.session.commit()
+        print('✓ Popup inicial creado con imagen dummy (desactivado)')
+
+@principal.cli.command('init-db')
+@click.option('--seed', is_flag=True, help='Además crea los datos iniciales (como `flask seed`)')
+def comando_init_db(seed):
+    """Crea/migra las tablas y el usuario admin. Correr una vez por despliegue, antes de gunicorn."""
+    inicializar_db()
+    if seed:
+        sembrar_datos()
+
+@principal.cli.command('seed')
+def comando_seed():
+    """Crea los torneos dummy y el popup inicial si la base está vacía."""
+    sembrar_datos()
+
+@principal.cli.command('archivar')
+@click.option('--dias', type=int, default=None, help='Archivar los torneos de hace más de N días (por defecto ARCHIVO_DIAS)')
+def comando_archivar(dias):
+    """Mueve los torneos pasados a torneo_archivado (/api/historial). Pensado para correr una vez al día."""
+    dias = current_app.config['ARCHIVO_DIAS'] if dias is None else dias
+    antes_de = date.today() - timedelta(days=dias)
+    total = archivar_torneos(antes_de)
+    print(f'✓ {total} torneos anteriores al {antes_de.isoformat()} archivados')
+
+# Instrumentación: latencia por endpoint, consultas SQL y render de templates por petición.
+# Los contadores de la petición viven en g; el costo por consulta es un par de perf_counter
+metrica_latencia = metricas.Histograma('tcghub_http_request_duration_seconds', 'Duración de las peticiones por endpoint')
+metrica_peticiones = metricas.Contador('tcghub_http_requests_total', 'Peticiones por endpoint, método y estado')
+metrica_consultas = metricas.Histograma(
+    'tcghub_db_queries_per_request', 'Consultas SQL por petición', buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+metrica_tiempo_sql = metricas.Histograma('tcghub_db_query_duration_seconds', 'Duración de cada consulta SQL, por endpoint')
+metrica_templates = metricas.Histograma('tcghub_template_render_seconds', 'Tiempo de render por template')
+metrica_presupuesto = metricas.Contador(
+    'tcghub_db_query_budget_exceeded_total', 'Peticiones que superaron PRESUPUESTO_CONSULTAS, por endpoint'
+)
+
+
+class PresupuestoConsultasExcedido(RuntimeError):
+    """Una petición hizo más consultas que su presupuesto (solo con CONSULTAS_ESTRICTO)"""
+
+
+def presupuesto_consultas(maximo):
+    """Decorador: cambia el presupuesto de consultas de una vista (None = sin límite)"""
+    def decorador(vista):
+        vista.presupuesto_consultas = maximo
+        return vista
+    return decorador
+
+
+def solo_lectura(vista):
+    """Decorador: la vista solo lee, así que sus GET pueden ir a una réplica (ver elegir_base)"""
+    vista.solo_lectura = True
+    return vista
+
+
+metrica_replicas = metricas.Contador(
+    'tcghub_db_replica_requests_total', 'Peticiones de solo lectura atendidas por cada base (primaria o réplica)'
+)
+# Cookie que marca a quien acaba de escribir: sus lecturas van a la primaria por REPLICA_RETRASO_MAX segundos
+COOKIE_LEER_PRIMARIA = 'leer_primaria'
+
+
+@principal.before_app_request
+def elegir_base():
+    """
+    Con DATABASE_REPLICA_URLS, los GET de las vistas @solo_lectura leen de una réplica al azar.
+    Quien acaba de escribir (cookie leer_primaria) sigue leyendo de la primaria hasta que las
+    réplicas lo alcanzan, así ve enseguida lo que guardó.
+    """
+    replicas = current_app.extensions['replicas']
+    if not replicas or request.method not in ('GET', 'HEAD'):
+        return
+    vista = current_app.view_functions.get(request.endpoint)
+    if not getattr(vista, 'solo_lectura', False):
+        return
+    base = 'primaria' if request.cookies.get(COOKIE_LEER_PRIMARIA) else random.choice(replicas)
+    if base != 'primaria':
+        g.replica = base
+    metrica_replicas.incrementar(base=base)
+
+
+@principal.after_app_request
+def marcar_escritura(response):
+    if (
+        current_app.extensions['replicas'] and request.method in ('POST', 'PUT', 'PATCH', 'DELETE')
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            COOKIE_LEER_PRIMARIA, '1', max_age=current_app.config['REPLICA_RETRASO_MAX'],
+            httponly=True, samesite='Lax', secure=request.is_secure
+        )
+    return response
+
+
+@principal.before_app_request
+def iniciar_medicion():
+    g.inicio_peticion = reloj.perf_counter()
+    g.consultas = 0
+    g.tiempo_sql = 0.0
+    g.tiempo_templates = 0.0
+    vista = current_app.view_functions.get(request.endpoint)
+    g.presupuesto_consultas = getattr(vista, 'presupuesto_consultas', current_app.config['PRESUPUESTO_CONSULTAS'])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.inicio_consulta = reloj.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, 'inicio_consulta', None)
+    if inicio is None or not has_request_context() or 'consultas' not in g:
+        return
+    duracion = reloj.perf_counter() - inicio
+    g.consultas += 1
+    g.tiempo_sql += duracion
+    metrica_tiempo_sql.observar(duracion, endpoint=request.endpoint or 'sin_ruta')
+    
+    presupuesto = g.presupuesto_consultas
+    if presupuesto is not None and g.consultas > presupuesto and current_app.config['CONSULTAS_ESTRICTO']:
+        # Se lanza aquí y no al final para que el traceback apunte a la consulta que sobra
+        raise PresupuestoConsultasExcedido(
+            f'{request.endpoint} hizo {g.consultas} consultas (presupuesto: {presupuesto}): {statement}'
+        )
+
+
+@before_render_template.connect
+def _antes_de_template(sender, template, context, **extra):
+    if 'consultas' in g:
+        g.inicio_template = reloj.perf_counter()
+
 
-@app.route('/')
+@template_rendered.connect
+def _despues_de_template(sender, template, context, **extra):
+    inicio = g.pop('inicio_template', None) if has_request_context() else None
+    if inicio is None:
+        return
+    duracion = reloj.perf_counter() - inicio
+    g.tiempo_templates += duracion
+    metrica_templates.observar(duracion, template=template.name)
+
+
+def cerrar_medicion(medicion, endpoint, metodo, status, logger):
+    """Registra latencia, consultas y presupuesto de una petición. `medicion` es el `g` de la petición"""
+    duracion = reloj.perf_counter() - medicion.inicio_peticion
+    metrica_latencia.observar(duracion, endpoint=endpoint, method=metodo)
+    metrica_peticiones.incrementar(endpoint=endpoint, method=metodo, status=status)
+    metrica_consultas.observar(medicion.consultas, endpoint=endpoint)
+    
+    if medicion.presupuesto_consultas is not None and medicion.consultas > medicion.presupuesto_consultas:
+        metrica_presupuesto.incrementar(endpoint=endpoint)
+        logger.warning(
+            'Posible N+1: %s hizo %d consultas (presupuesto: %d)', endpoint, medicion.consultas, medicion.presupuesto_consultas
+        )
+    return duracion
+
+
+@principal.after_app_request
+def registrar_medicion(response):
+    if 'inicio_peticion' not in g:
+        return response
+    endpoint = request.endpoint or 'sin_ruta'
+    
+    if response.is_streamed and response.mimetype != 'text/event-stream':
+        # /api/filtrar, /api/torneos y la exportación hacen la consulta principal mientras se envía el cuerpo,
+        # después de este hook (stream_with_context mantiene g, así que se siguen contando). La medición se
+        # cierra cuando el servidor termina de enviarlo. Sin Server-Timing: los headers salen antes.
+        # Los text/event-stream quedan abiertos minutos: se miden hasta los headers, como el resto
+        medicion, logger = g._get_current_object(), current_app.logger
+        metodo, status = request.method, str(response.status_code)
+        response.call_on_close(lambda: cerrar_medicion(medicion, endpoint, metodo, status, logger))
+        return response
+    
+    duracion = cerrar_medicion(g, endpoint, request.method, str(response.status_code), current_app.logger)
+    if current_app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = (
+            f'app;dur={duracion * 1000:.1f}, '
+            f'db;dur={g.tiempo_sql * 1000:.1f};desc="{g.consultas} consultas", '
+            f'tpl;dur={g.tiempo_templates * 1000:.1f}'
+        )
+    return response
+
+
+@principal.route('/')
+@solo_lectura
+@presupuesto_consultas(14)  # con los caches fríos: logo, popup, usuario, grid, último cambio y las 6 consultas de facetas
 def index():
-    logo = Logo.get_logo()
-    popup = Popup.get_popup()
-    return render_template('index.html', titulo='InterCards TCG Hub', logo=logo, popup=popup)
+    logo = current_app.extensions['singletons'].logo.obtener()
+    popup = current_app.extensions['singletons'].popup.obtener()
+    # La primera página de la grid y las ubicaciones se renderizan aquí mismo,
+    # así la visita completa es una sola petición (sin /api/torneos ni /api/filtrar al cargar)
+    grid, _ = renderizar_grid(ImmutableMultiDict())
+    return render_template(
+        'index.html',
+        titulo='InterCards TCG Hub',
+        logo=logo,
+        popup=popup,
+        grid=Markup(grid),
+        # Posición de la grid en la secuencia de cambios: /api/cambios sigue desde aquí
+        ultimo_cambio=CambioTorneo.ultimo(),
+        facetas=obtener_facetas()
+    )
+
+class LoginSaturado(Exception):
+    """Ya hay LOGIN_HASH_WORKERS + LOGIN_HASH_COLA verificaciones de contraseña en curso"""
+
 
-@app.route('/admin', methods=['GET', 'POST'])
+def verificar_password(password_hash, password):
+    """
+    Corre check_password_hash (lento a propósito) en el executor acotado de login. Así una ola de
+    intentos ocupa como máximo LOGIN_HASH_WORKERS hilos de CPU por worker y el resto de los hilos
+    sigue atendiendo las páginas públicas. Lanza LoginSaturado si no hay cupo.
+    """
+    login = current_app.extensions['login']
+    if not login.cupos.acquire(blocking=False):
+        raise LoginSaturado()
+    try:
+        return login.executor.submit(check_password_hash, password_hash, password).result()
+    finally:
+        login.cupos.release()
+
+
+# Tope del header Retry-After: con LOGIN_*_POR_MINUTO=0 la espera es infinita
+RETRY_AFTER_MAX = 3600
+
+
+def demasiados_intentos(espera):
+    respuesta = jsonify({'success': False, 'mensaje': 'Demasiados intentos. Espera un momento e intenta de nuevo'})
+    respuesta.status_code = 429
+    respuesta.headers['Retry-After'] = str(max(1, math.ceil(min(espera, RETRY_AFTER_MAX))))
+    return respuesta
+
+
+@principal.route('/admin', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('principal.index'))
     
     if request.method == 'POST':
         data = request.get_json()
         username = data.get('username')
         password = data.get('password')
         
+        # Antes de gastar CPU en el hash: cada IP consume un intento, y un usuario con muchos
+        # fallos recientes queda bloqueado un rato (solo los fallos cuentan para el usuario)
+        limites = current_app.extensions['login']
+        espera = limites.limitador_ip.consumir(request.remote_addr or 'desconocida')
+        if not espera and username:
+            espera = limites.limitador_usuario.disponible(str(username))
+        if espera:
+            return demasiados_intentos(espera)
+        
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            valida = user is not None and verificar_password(user.password_hash, password)
+        except LoginSaturado:
+            return demasiados_intentos(1)
+        
+        if valida:
             login_user(user)
             return jsonify({'success': True, 'mensaje': 'Login exitoso'})
         else:
+            if username:
+                limites.limitador_usuario.consumir(str(username))
             return jsonify({'success': False, 'mensaje': 'Usuario o contraseña incorrectos'}), 401
     
     return render_template('login.html')
 
-@app.route('/sobre')
+@principal.route('/sobre')
+@solo_lectura
 def sobre():
-    logo = Logo.get_logo()
+    logo = current_app.extensions['singletons'].logo.obtener()
     return render_template('sobre.html', logo=logo)
 
-@app.route('/admin/panel')
+@principal.route('/admin/panel')
 @login_required
 def admin_panel():
-    logo = Logo.get_logo()
+    logo = current_app.extensions['singletons'].logo.obtener()
     return render_template('admin_panel.html', logo=logo)
 
 
-@app.route('/admin/logo', methods=['POST', 'DELETE'])
+@principal.route('/admin/logo', methods=['POST', 'DELETE'])
 @login_required
 def gestionar_logo():
     """
@@ -269,25 +1131,20 @@ def gestionar_logo():
             return jsonify({'error': 'Formato no permitido. Use PNG, JPG, JPEG, GIF o WEBP'}), 400
         
         try:
+            # Guardar nuevo logo (nombre según el contenido; las variantes se generan en segundo plano)
+            filename = current_app.extensions['imagenes'].guardar(file, 'logo')
+            
             # Eliminar logo anterior si existe
             logo_actual = Logo.get_logo()
             if logo_actual:
-                old_path = os.path.join(app.config['UPLOAD_FOLDER'], logo_actual.filename)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
+                if logo_actual.filename != filename:
+                    current_app.extensions['imagenes'].eliminar(logo_actual.filename)
                 db.session.delete(logo_actual)
             
-            # Guardar nuevo logo
-            filename = secure_filename(file.filename)
-            # Agregar timestamp para evitar cache
-            name, ext = os.path.splitext(filename)
-            filename = f"logo_{int(datetime.now().timestamp())}{ext}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
             # Guardar en base de datos
             nuevo_logo = Logo(filename=filename)
             db.session.add(nuevo_logo)
+            current_app.extensions['singletons'].logo.invalidar()
             db.session.commit()
             
             return jsonify({
@@ -303,13 +1160,12 @@ def gestionar_logo():
             if not logo:
                 return jsonify({'error': 'No hay logo para eliminar'}), 404
             
-            # Eliminar archivo
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], logo.filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            # Eliminar archivo y sus variantes
+            current_app.extensions['imagenes'].eliminar(logo.filename)
             
             # Eliminar de base de datos
             db.session.delete(logo)
+            current_app.extensions['singletons'].logo.invalidar()
             db.session.commit()
             
             return jsonify({'mensaje': 'Logo eliminado exitosamente'})
@@ -317,7 +1173,7 @@ def gestionar_logo():
             return jsonify({'error': str(e)}), 400
 
 
-@app.route('/admin/popup', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@principal.route('/admin/popup', methods=['GET', 'POST', 'PUT', 'DELETE'])
 @login_required
 def gestionar_popup():
     """
@@ -349,20 +1205,14 @@ def gestionar_popup():
             return jsonify({'error': 'Formato no permitido. Use PNG, JPG, JPEG, GIF o WEBP'}), 400
         
         try:
+            # Guardar nueva imagen (nombre según el contenido; las variantes se generan en segundo plano)
+            filename = current_app.extensions['imagenes'].guardar(file, 'popup')
+            
             popup = Popup.get_popup()
             
             # Eliminar imagen anterior si existe y no es la dummy
-            if popup and popup.filename != 'popup_dummy.jpg':
-                old_path = os.path.join(app.config['UPLOAD_FOLDER'], popup.filename)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-            
-            # Guardar nueva imagen
-            filename = secure_filename(file.filename)
-            name, ext = os.path.splitext(filename)
-            filename = f"popup_{int(datetime.now().timestamp())}{ext}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            if popup and popup.filename not in ('popup_dummy.jpg', filename):
+                current_app.extensions['imagenes'].eliminar(popup.filename)
             
             # Actualizar o crear registro
             if popup:
@@ -373,6 +1223,7 @@ def gestionar_popup():
                 popup = Popup(filename=filename, activo=True)
                 db.session.add(popup)
             
+            current_app.extensions['singletons'].popup.invalidar()
             db.session.commit()
             
             return jsonify({
@@ -393,6 +1244,7 @@ def gestionar_popup():
                 return jsonify({'error': 'No hay popup configurado'}), 404
             
             popup.activo = activo
+            current_app.extensions['singletons'].popup.invalidar()
             db.session.commit()
             
             return jsonify({
@@ -408,15 +1260,14 @@ def gestionar_popup():
             if not popup:
                 return jsonify({'error': 'No hay popup para eliminar'}), 404
             
-            # Eliminar archivo si no es dummy
+            # Eliminar archivo y sus variantes si no es dummy
             if popup.filename != 'popup_dummy.jpg':
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], popup.filename)
-                if os.path.exists(filepath):
-                    os.remove(filepath)
+                current_app.extensions['imagenes'].eliminar(popup.filename)
             
             # Restaurar a imagen dummy
             popup.filename = 'popup_dummy.jpg'
             popup.activo = False
+            current_app.extensions['singletons'].popup.invalidar()
             db.session.commit()
             
             return jsonify({'mensaje': 'Popup restaurado a imagen por defecto'})
@@ -424,118 +1275,915 @@ def gestionar_popup():
             return jsonify({'error': str(e)}), 400
 
 
-@app.route('/logout')
+@principal.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('principal.index'))
 
 
 def allowed_file(filename):
     """Verifica si la extensión del archivo es permitida"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 
-# API REST - Leer todos los torneos
-@app.route('/api/torneos', methods=['GET'])
-def get_torneos():
-    torneos = Torneo.query.order_by(Torneo.fecha.asc()).all()
-    return jsonify([torneo.to_dict() for torneo in torneos])
+@principal.app_template_global()
+def srcset_upload(filename):
+    """
+    Retorna {formato: srcset} con las variantes ya generadas de una imagen de static/uploads,
+    para armar <source type="image/..." srcset="..."> dentro de un <picture>.
+    """
+    return {
+        formato: ', '.join(f"{url_for('static', filename='uploads/' + archivo)} {ancho}w" for archivo, ancho in archivos)
+        for formato, archivos in current_app.extensions['imagenes'].variantes(filename).items()
+    }
 
-# HTMX - Renderizar grid de torneos
-@app.route('/api/filtrar', methods=['GET'])
-def filtrar():
-    fecha = request.args.get('filtro-fecha', '')
-    ubicacion = request.args.get('filtro-ubicacion', '')
-    juego = request.args.get('filtro-juego', '')
+
+@principal.app_url_defaults
+def huella_activos(endpoint, values):
+    """url_for('static', filename='script.js') -> /static/script.js?v=<huella del contenido>"""
+    if endpoint == 'static' and 'v' not in values:
+        huella = current_app.extensions['activos'].huella(values.get('filename', ''))
+        if huella:
+            values['v'] = huella
+
+
+@principal.after_app_request
+def cache_uploads_inmutables(response):
+    """
+    Las imágenes subidas llevan el hash de su contenido en el nombre: nunca cambian.
+    Lo mismo los archivos de static/ pedidos con su huella vigente, cuando no los sirve ServidorActivos
+    """
+    if request.endpoint == 'static' and response.status_code == 200:
+        filename = request.view_args.get('filename', '')
+        huella = current_app.extensions['activos'].huella(filename)
+        if (filename.startswith('uploads/') and PATRON_NOMBRE.match(filename[len('uploads/'):])) or \
+                (huella and request.args.get('v') == huella):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+    return response
+
+
+@principal.after_app_request
+def comprimir_respuesta(response):
+    """
+    Comprime al vuelo las respuestas HTML/JSON/CSV con gzip o brotli según Accept-Encoding.
+    Las respuestas en streaming se comprimen por trozos, sin juntarlas en memoria.
+    El ETag pasa a débil: el contenido es el mismo, pero los bytes dependen de la codificación.
+    """
+    if (not current_app.config['COMPRIMIR_RESPUESTAS'] or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in compresion.TIPOS):
+        return response
     
-    query = Torneo.query
+    response.vary.add('Accept-Encoding')
+    codificacion = compresion.elegir_codificacion(request.headers.get('Accept-Encoding'))
+    if codificacion is None:
+        return response
     
-    if fecha:
-        query = query.filter_by(fecha=fecha)
+    if response.is_streamed:
+        original = response.response
+        response.response = compresion.comprimir_flujo(response.iter_encoded(), codificacion)
+        if hasattr(original, 'close'):
+            response.call_on_close(original.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        datos = response.get_data()
+        if len(datos) < compresion.TAMANO_MINIMO:
+            return response
+        response.set_data(compresion.comprimir(datos, codificacion))
     
-    if ubicacion:
-        query = query.filter_by(ubicacion=ubicacion)
+    response.headers['Content-Encoding'] = codificacion
+    etag, debil = response.get_etag()
+    if etag and not debil:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# Colores según el juego
+COLORES_JUEGO = {
+    'Pokemon': 'from-yellow-400 to-orange-500',
+    'One Piece': 'from-blue-400 to-cyan-500',
+    'Yu-Gi-Oh': 'from-purple-500 to-pink-500',
+    'Magic': 'from-red-500 to-orange-600'
+}
+GRADIENTE_POR_DEFECTO = 'from-gray-400 to-gray-600'
+
+def _version_torneo(torneo):
+    """Versión del registro: los campos que aparecen en la tarjeta. Si cambia alguno, cambia la clave"""
+    return (torneo.nombre_tienda, torneo.ubicacion, torneo.hora, torneo.fecha,
+            torneo.tipo_juego, torneo.categoria, torneo.tipo_torneo, torneo.imagen)
+
+
+def renderizar_tarjeta(torneo, hoy):
+    """
+    Retorna el HTML de la tarjeta de un torneo.
+    Usa la macro precompilada de tarjeta_torneo.html y guarda el resultado en el cache LRU de la app
+    ((id, versión del registro, es_proximo) -> html), así cada tarjeta se renderiza una sola vez
+    mientras el torneo no cambie.
+    """
+    es_proximo = torneo.fecha >= hoy
+    clave = (torneo.id, _version_torneo(torneo), es_proximo)
+    tarjetas = current_app.extensions['tarjetas']
     
-    if juego:
-        query = query.filter_by(tipo_juego=juego)
+    with tarjetas.lock:
+        html = tarjetas.cache.get(clave)
+        if html is not None:
+            tarjetas.cache.move_to_end(clave)
+            return html
     
-    torneos = query.order_by(Torneo.fecha.asc()).all()
+    # Las imágenes externas se sirven como miniatura local; v cambia si cambia la URL
+    miniatura = url_for('principal.miniatura_torneo', id=torneo.id, v=clave_url(torneo.imagen)) if torneo.imagen else None
+    macro = current_app.jinja_env.get_template('tarjeta_torneo.html').module.tarjeta
+    html = str(macro(torneo, es_proximo, COLORES_JUEGO.get(torneo.tipo_juego, GRADIENTE_POR_DEFECTO), miniatura))
     
-    if not torneos:
-        return '<p class="text-gray-300 text-center py-20 col-span-full">No hay torneos que coincidan con los filtros</p>'
+    with tarjetas.lock:
+        tarjetas.cache[clave] = html
+        if len(tarjetas.cache) > current_app.config['CACHE_TARJETAS_MAX']:
+            tarjetas.cache.popitem(last=False)
+    return html
+
+
+def codificar_cursor(torneo):
+    """Cursor opaco con la posición (fecha, id) del último torneo de una página"""
+    valor = f'{torneo.fecha.isoformat()}|{torneo.id}'
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha, id) del cursor o lanza ValueError si no es válido"""
+    try:
+        valor = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, torneo_id = valor.split('|')
+        return date.fromisoformat(fecha), int(torneo_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Cursor inválido')
+
+
+# Columnas de Torneo.to_dict(). Las lecturas públicas las piden como filas de Core: sin crear objetos
+# Torneo ni registrarlos en la sesión, que es la mayor parte del tiempo en los listados grandes.
+# Las filas tienen los mismos atributos, así que renderizar_tarjeta las acepta igual que a un Torneo
+COLUMNAS_TORNEO = (
+    Torneo.id, Torneo.nombre_tienda, Torneo.ubicacion, Torneo.hora, Torneo.fecha, Torneo.premio,
+    Torneo.tipo_juego, Torneo.categoria, Torneo.tipo_torneo, Torneo.imagen
+)
+CLAVES_TORNEO = tuple(columna.key for columna in COLUMNAS_TORNEO)
+
+
+def leer_torneos(consulta):
+    """
+    Ejecuta un select de COLUMNAS_TORNEO en la conexión de la sesión, sin pasar por la capa
+    de carga del ORM (que agrega trabajo por fila aunque no se pidan entidades)
+    """
+    return db.session.connection().execute(consulta)
+
+
+def fila_a_dict(fila):
+    """Lo mismo que Torneo.to_dict() para una fila de COLUMNAS_TORNEO"""
+    # zip sobre la tupla es bastante más rápido que leer cada columna como atributo de la fila
+    datos = dict(zip(CLAVES_TORNEO, fila))
+    datos['hora'] = datos['hora'].isoformat('minutes')
+    datos['fecha'] = datos['fecha'].isoformat()
+    return datos
+
+
+def codificar_json(datos):
+    """JSON en bytes con orjson si está instalado (mucho más rápido que json), si no con json"""
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def respuesta_json(datos):
+    return current_app.response_class(codificar_json(datos), mimetype='application/json')
+
+
+def json_en_trozos(filas, tamano=1000):
+    """
+    Genera el arreglo JSON de las filas de a `tamano` por vez (junto con yield_per): la memoria queda
+    acotada a un trozo y el primer byte sale con las primeras filas, sin importar el total.
+    """
+    yield b'['
+    separador = b''
+    for trozo in filas.partitions(tamano):
+        # Se quitan los corchetes de cada trozo y se unen con comas
+        yield separador + codificar_json([fila_a_dict(fila) for fila in trozo])[1:-1]
+        separador = b','
+    yield b']'
+
+
+def leer_limite(limite):
+    """Normaliza el parámetro limit: por defecto TORNEOS_POR_PAGINA, como máximo TORNEOS_LIMITE_MAXIMO"""
+    if limite is None:
+        return current_app.config['TORNEOS_POR_PAGINA']
+    return max(1, min(limite, current_app.config['TORNEOS_LIMITE_MAXIMO']))
+
+
+def desde_cursor(query, cursor):
+    """Agrega la condición keyset (fecha, id) > cursor. Lanza ValueError si el cursor es inválido"""
+    if not cursor:
+        return query
+    try:
+        fecha, torneo_id = decodificar_cursor(cursor)
+    except ValueError:
+        raise ValueError('Cursor inválido')
+    return query.filter(or_(
+        Torneo.fecha > fecha,
+        and_(Torneo.fecha == fecha, Torneo.id > torneo_id)
+    ))
+
+
+def paginar(query, cursor, limite):
+    """
+    Paginación keyset sobre (fecha, id) de un select de COLUMNAS_TORNEO. Retorna (filas, cursor_siguiente).
+    Cada página es un range scan sobre los índices (..., fecha, id), sin OFFSET,
+    así que la primera página cuesta lo mismo sin importar el tamaño de la tabla.
+    """
+    query = desde_cursor(query, cursor)
+    # Se pide uno extra solo para saber si hay una página siguiente
+    torneos = leer_torneos(query.order_by(Torneo.fecha.asc(), Torneo.id.asc()).limit(limite + 1)).all()
+    if len(torneos) > limite:
+        torneos = torneos[:limite]
+        return torneos, codificar_cursor(torneos[-1])
+    return torneos, None
+
+
+def leer_booleano(valor):
+    """'true'/'1'/'si' -> True, 'false'/'0'/'no' -> False, ausente -> None"""
+    if not valor:
+        return None
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'on')
+
+
+def fin_de_semana(hoy):
+    """(desde, hasta) del fin de semana en curso, o del siguiente si hoy es día de semana"""
+    if hoy.weekday() == 6:
+        return hoy, hoy
+    sabado = hoy + timedelta(days=5 - hoy.weekday())
+    return sabado, sabado + timedelta(days=1)
+
+
+def rango_fechas(args, proximos_por_defecto=False):
+    """
+    Rango (desde, hasta) de fechas pedido con filtro-fecha, desde, hasta, weekend y upcoming
+    (cualquiera de los extremos puede ser None). Si vienen varios se aplican todos juntos.
+    Sin ningún filtro de fecha, upcoming vale `proximos_por_defecto`.
+    Lanza ValueError si alguna fecha no es YYYY-MM-DD.
+    """
+    hoy = date.today()
+    desdes, hastas = [], []
+    if args.get('filtro-fecha'):
+        fecha = date.fromisoformat(args['filtro-fecha'])
+        desdes.append(fecha)
+        hastas.append(fecha)
+    if args.get('desde'):
+        desdes.append(date.fromisoformat(args['desde']))
+    if args.get('hasta'):
+        hastas.append(date.fromisoformat(args['hasta']))
+    if leer_booleano(args.get('weekend')):
+        sabado, domingo = fin_de_semana(hoy)
+        desdes.append(sabado)
+        hastas.append(domingo)
     
-    html = ''
-    for torneo in torneos:
-        fecha_obj = datetime.strptime(torneo.fecha, '%Y-%m-%d')
-        hoy = datetime.now()
-        
-        # Determinar si es próximo o pasado
-        es_proximo = fecha_obj.date() >= hoy.date()
-        badge_color = 'bg-red-500' if es_proximo else 'bg-gray-400'
-        badge_text = 'PROX' if es_proximo else 'PAST'
-        
-        # Colores según el juego
-        juego_colors = {
-            'Pokemon': 'from-yellow-400 to-orange-500',
-            'One Piece': 'from-blue-400 to-cyan-500',
-            'Yu-Gi-Oh': 'from-purple-500 to-pink-500',
-            'Magic': 'from-red-500 to-orange-600'
-        }
-        gradient = juego_colors.get(torneo.tipo_juego, 'from-gray-400 to-gray-600')
-        
-        # Formatear fecha y hora
-        fecha_formato = fecha_obj.strftime('%d %b')
+    proximos = leer_booleano(args.get('upcoming'))
+    if proximos is None:
+        proximos = proximos_por_defecto and not (desdes or hastas)
+    if proximos:
+        desdes.append(hoy)
+    return max(desdes, default=None), min(hastas, default=None)
+
+
+def condiciones_fecha(desde, hasta):
+    """
+    Condiciones sobre Torneo.fecha para un rango. Las resuelve la base como un range scan sobre
+    los índices (..., fecha, id), así los torneos fuera del rango nunca se leen ni se renderizan.
+    """
+    condiciones = []
+    if desde is not None:
+        condiciones.append(Torneo.fecha >= desde)
+    if hasta is not None:
+        condiciones.append(Torneo.fecha <= hasta)
+    return condiciones
+
+
+def respuesta_condicional(nombre_version):
+    """
+    Decorador para GETs públicos cuyo contenido depende solo de un contador de Version.
+    Expone el contador como ETag fuerte y Last-Modified, y responde 304 sin ejecutar la vista
+    (sin consultar los torneos) cuando el navegador o el CDN ya tienen esa versión.
+    Si la vista marca su respuesta como no-store (no refleja todavía esa versión), se envía tal cual.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            fila = db.session.execute(
+                db.select(Version.valor, Version.actualizado_en).filter_by(nombre=nombre_version)
+            ).first()
+            valor, actualizado_en = fila if fila else (0, None)
+            
+            # Con el día: las etiquetas PROX/PAST cambian a medianoche. Las instantáneas usan los mismos
+            etag, modificado = validadores_version(nombre_version, valor, actualizado_en, date.today())
+            
+            if request.if_none_match:
+                # Comparación débil: con compresión el ETag se envía como W/"..." (ver comprimir_respuesta)
+                sin_cambios = request.if_none_match.contains_weak(etag)
+            else:
+                sin_cambios = request.if_modified_since is not None and request.if_modified_since >= modificado
+            
+            if sin_cambios:
+                respuesta = current_app.response_class(status=304)
+            else:
+                respuesta = current_app.make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200 or respuesta.cache_control.no_store:
+                    return respuesta
+            
+            respuesta.set_etag(etag)
+            respuesta.last_modified = modificado
+            respuesta.cache_control.public = True
+            respuesta.cache_control.max_age = current_app.config['CACHE_API_MAX_AGE']
+            respuesta.cache_control.must_revalidate = True
+            return respuesta
+        return envoltura
+    return decorador
+
+
+# API REST - Leer torneos
+@principal.route('/api/torneos', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def get_torneos():
+    """
+    Sin parámetros retorna todos los torneos (lo usa el panel admin).
+    Con limit y/o cursor retorna una página; el cursor de la siguiente va en los headers Link y X-Next-Cursor.
+    desde, hasta, weekend y upcoming acotan las fechas (ver rango_fechas).
+    """
+    limite = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', '')
+    try:
+        query = db.select(*COLUMNAS_TORNEO).where(*condiciones_fecha(*rango_fechas(request.args)))
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida'}), 400
+    
+    if limite is None and not cursor:
+        consulta = query.order_by(Torneo.fecha.asc(), Torneo.id.asc()).execution_options(yield_per=1000)
         
-        # Botón siempre habilitado
-        boton = f'<button onclick="abrirFormulario({torneo.id})" class="w-full bg-blue-600 hover:bg-blue-700 text-white py-2 rounded-lg font-semibold transition-colors">Ver Detalles</button>'
+        def generar():
+            filas = leer_torneos(consulta)
+            yield from json_en_trozos(filas)
         
-        # Determinar imagen o gradiente por defecto
-        if torneo.imagen:
-            imagen_html = f'<img src="{torneo.imagen}" alt="{torneo.nombre_tienda}" class="w-full h-48 object-cover">'
+        return Response(stream_with_context(generar()), mimetype='application/json')
+    
+    limite = leer_limite(limite)
+    try:
+        filas, siguiente = paginar(query, cursor, limite)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    respuesta = respuesta_json([fila_a_dict(fila) for fila in filas])
+    if siguiente:
+        url = url_for('principal.get_torneos', **{**request.args.to_dict(), 'limit': limite, 'cursor': siguiente})
+        respuesta.headers['Link'] = f'<{url}>; rel="next"'
+        respuesta.headers['X-Next-Cursor'] = siguiente
+    return respuesta
+
+# API REST - Leer un torneo
+@principal.route('/api/torneos/<int:id>', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def get_torneo(id):
+    fila = leer_torneos(db.select(*COLUMNAS_TORNEO).filter_by(id=id)).first()
+    if not fila:
+        return jsonify({'error': 'Torneo no encontrado'}), 404
+    return respuesta_json(fila_a_dict(fila))
+
+# Las mismas columnas (y claves) de COLUMNAS_TORNEO en la tabla de archivados, para fila_a_dict
+COLUMNAS_ARCHIVO = tuple(getattr(TorneoArchivado, clave) for clave in CLAVES_TORNEO)
+
+
+# API REST - Torneos archivados
+@principal.route('/api/historial', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('historial')
+def historial():
+    """
+    Torneos archivados por `flask archivar`, del más reciente al más antiguo, de a una página
+    (limit y cursor como en /api/torneos). Filtros: desde, hasta, filtro-ubicacion y filtro-juego.
+    """
+    try:
+        desde = date.fromisoformat(request.args['desde']) if request.args.get('desde') else None
+        hasta = date.fromisoformat(request.args['hasta']) if request.args.get('hasta') else None
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida'}), 400
+    
+    query = db.select(*COLUMNAS_ARCHIVO)
+    if desde is not None:
+        query = query.where(TorneoArchivado.fecha >= desde)
+    if hasta is not None:
+        query = query.where(TorneoArchivado.fecha <= hasta)
+    if request.args.get('filtro-ubicacion'):
+        query = query.where(TorneoArchivado.ubicacion == request.args['filtro-ubicacion'])
+    if request.args.get('filtro-juego'):
+        query = query.where(TorneoArchivado.tipo_juego == request.args['filtro-juego'])
+    
+    cursor = request.args.get('cursor', '')
+    if cursor:
+        try:
+            fecha, torneo_id = decodificar_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.where(or_(
+            TorneoArchivado.fecha < fecha,
+            and_(TorneoArchivado.fecha == fecha, TorneoArchivado.id < torneo_id)
+        ))
+    
+    limite = leer_limite(request.args.get('limit', type=int))
+    filas = leer_torneos(
+        query.order_by(TorneoArchivado.fecha.desc(), TorneoArchivado.id.desc()).limit(limite + 1)
+    ).all()
+    respuesta = respuesta_json([fila_a_dict(fila) for fila in filas[:limite]])
+    if len(filas) > limite:
+        siguiente = codificar_cursor(filas[limite - 1])
+        url = url_for('principal.historial', **{**request.args.to_dict(), 'limit': limite, 'cursor': siguiente})
+        respuesta.headers['Link'] = f'<{url}>; rel="next"'
+        respuesta.headers['X-Next-Cursor'] = siguiente
+    return respuesta
+
+def mensaje_grid(texto):
+    return f'<p class="text-gray-300 text-center py-20 col-span-full">{texto}</p>'
+
+
+def consulta_grid(args):
+    """
+    Select de una página de la grid a partir de los filtros (filtro-fecha, desde, hasta, weekend,
+    upcoming, filtro-ubicacion, filtro-juego, limit, cursor). Sin filtros de fecha muestra solo los
+    próximos torneos (upcoming=false muestra también los pasados).
+    Retorna (consulta, limite); la consulta trae una fila de más para saber si hay página siguiente.
+    Lanza ValueError con el mensaje para el usuario si una fecha o el cursor son inválidos.
+    """
+    try:
+        query = db.select(*COLUMNAS_TORNEO).where(*condiciones_fecha(*rango_fechas(args, proximos_por_defecto=True)))
+    except ValueError:
+        raise ValueError('Fecha inválida')
+    
+    if args.get('filtro-ubicacion'):
+        query = query.filter_by(ubicacion=args['filtro-ubicacion'])
+    
+    if args.get('filtro-juego'):
+        query = query.filter_by(tipo_juego=args['filtro-juego'])
+    
+    query = desde_cursor(query, args.get('cursor', ''))
+    limite = leer_limite(args.get('limit', type=int))
+    return query.order_by(Torneo.fecha.asc(), Torneo.id.asc()).limit(limite + 1), limite
+
+
+def tarjetas_grid(args, consulta, limite):
+    """
+    Genera el HTML de una página de la grid tarjeta por tarjeta, leyendo las filas de la base
+    de a poco (yield_per): el primer byte sale con la primera fila, sin esperar a las demás.
+    """
+    hoy = date.today()
+    ultimo = None
+    filas = leer_torneos(consulta.execution_options(yield_per=50))
+    try:
+        for numero, torneo in enumerate(filas):
+            if numero == limite:
+                # Fragmento "cargar más": HTMX lo reemplaza por la página siguiente al hacerse visible
+                url = url_for('principal.filtrar', **{**args.to_dict(), 'cursor': codificar_cursor(ultimo)})
+                yield str(current_app.jinja_env.get_template('tarjeta_torneo.html').module.cargar_mas(url))
+                break
+            yield renderizar_tarjeta(torneo, hoy)
+            ultimo = torneo
+    finally:
+        filas.close()
+    
+    if ultimo is None and not args.get('cursor'):
+        yield mensaje_grid('No hay torneos que coincidan con los filtros')
+
+
+def renderizar_grid(args):
+    """Renderiza una página completa de la grid (la usa index() para la carga inicial). Retorna (html, status)"""
+    try:
+        consulta, limite = consulta_grid(args)
+    except ValueError as e:
+        return mensaje_grid(e), 400
+    return ''.join(tarjetas_grid(args, consulta, limite)), 200
+
+
+def obtener_facetas():
+    """
+    Valores distintos de ubicacion, tipo_juego, categoria y tipo_torneo con su cantidad de torneos,
+    más las próximas fechas con torneos. Se calcula con GROUP BY (sin traer los torneos)
+    y queda en memoria de la app hasta que cambia la versión 'torneos' (o el día).
+    Se guarda como una sola tupla (clave, facetas) que se reemplaza entera: quien la lee nunca ve
+    la clave de una versión junto a las facetas de otra.
+    """
+    cache = current_app.extensions['facetas']
+    hoy = date.today()
+    clave = (Version.obtener('torneos'), hoy)
+    clave_guardada, facetas = cache.guardadas
+    if clave_guardada == clave:
+        return facetas
+    
+    facetas = {}
+    for campo in ('ubicacion', 'tipo_juego', 'categoria', 'tipo_torneo'):
+        columna = getattr(Torneo, campo)
+        filas = db.session.execute(
+            db.select(columna, func.count()).group_by(columna).order_by(columna)
+        ).all()
+        facetas[campo] = [{'valor': valor, 'cantidad': cantidad} for valor, cantidad in filas]
+    
+    filas = db.session.execute(
+        db.select(Torneo.fecha, func.count())
+        .where(Torneo.fecha >= hoy)
+        .group_by(Torneo.fecha)
+        .order_by(Torneo.fecha)
+        .limit(current_app.config['FACETAS_FECHAS_MAX'])
+    ).all()
+    facetas['fechas'] = [{'valor': fecha.isoformat(), 'cantidad': cantidad} for fecha, cantidad in filas]
+    
+    cache.guardadas = (clave, facetas)
+    return facetas
+
+
+# API REST - Facetas para los filtros
+@principal.route('/api/facets', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def facets():
+    return jsonify(obtener_facetas())
+
+
+# API REST - Calendario: torneos agrupados por día
+@principal.route('/api/calendario', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def calendario():
+    """
+    Torneos de un rango de días agrupados por fecha, para la vista de calendario.
+    Acepta los mismos filtros de fecha que /api/filtrar (weekend=true para el fin de semana);
+    por defecto desde hoy y como máximo CALENDARIO_DIAS_MAX días.
+    """
+    try:
+        desde, hasta = rango_fechas(request.args, proximos_por_defecto=True)
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida'}), 400
+    
+    dias_max = timedelta(days=current_app.config['CALENDARIO_DIAS_MAX'] - 1)
+    if desde is None:
+        desde = (hasta or date.today()) - dias_max
+    if hasta is None or hasta > desde + dias_max:
+        hasta = desde + dias_max
+    
+    query = Torneo.query.filter(*condiciones_fecha(desde, hasta))
+    if request.args.get('filtro-ubicacion'):
+        query = query.filter_by(ubicacion=request.args['filtro-ubicacion'])
+    if request.args.get('filtro-juego'):
+        query = query.filter_by(tipo_juego=request.args['filtro-juego'])
+
+    dias = []
+    for torneo in query.order_by(Torneo.fecha.asc(), Torneo.hora.asc(), Torneo.id.asc()):
+        if not dias or dias[-1]['fecha'] != torneo.fecha.isoformat():
+            dias.append({'fecha': torneo.fecha.isoformat(), 'cantidad': 0, 'torneos': []})
+        dias[-1]['cantidad'] += 1
+        dias[-1]['torneos'].append(torneo.to_dict())
+    return jsonify({'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'dias': dias})
+
+
+def constructor_indice_busqueda(app):
+    """
+    Función que arma el índice de búsqueda en memoria (SQLite/desarrollo) con su propio contexto de app,
+    así se puede llamar desde el hilo de IndiceVigente. Retorna (versión 'torneos', índice)
+    """
+    def construir():
+        with app.app_context():
+            version = Version.obtener('torneos')
+            columnas = [Torneo.id] + [getattr(Torneo, campo) for campo, _ in busqueda.CAMPOS]
+            filas = db.session.execute(
+                db.select(*columnas).order_by(Torneo.fecha.desc(), Torneo.id.desc()).execution_options(yield_per=5000)
+            )
+            return version, busqueda.IndiceBusqueda(filas)
+    return construir
+
+
+def obtener_indice_busqueda():
+    """
+    Índice de búsqueda de la app. Tras cada escritura de torneos se reconstruye en segundo plano
+    y mientras tanto se usa el anterior. Retorna (al_dia, índice): al_dia es False si es el anterior
+    """
+    actual = Version.obtener('torneos')
+    version, indice = current_app.extensions['busqueda'].indice.obtener(actual)
+    return version == actual, indice
+
+
+def buscar_postgres(consulta, limite):
+    """
+    Búsqueda en PostgreSQL: cada término como prefijo sobre el tsvector ponderado (A = tienda ... D = premio)
+    y, con pg_trgm, también coincidencias aproximadas con word_similarity. Retorna [(id, puntaje)]
+    """
+    terminos = re.findall(r'\w+', consulta.lower())[:busqueda.MAX_TERMINOS]
+    if not terminos:
+        return []
+    tsquery = ' & '.join(f'{termino}:*' for termino in terminos)
+    
+    cache = current_app.extensions['busqueda']
+    if cache.pg_trgm is None:
+        cache.pg_trgm = db.session.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+    
+    if cache.pg_trgm:
+        puntaje = f"ts_rank({DOCUMENTO_BUSQUEDA_SQL}, to_tsquery('simple', :tsquery)) + word_similarity(:texto, {TEXTO_BUSQUEDA_SQL})"
+        condicion = f"{DOCUMENTO_BUSQUEDA_SQL} @@ to_tsquery('simple', :tsquery) OR :texto <% ({TEXTO_BUSQUEDA_SQL})"
+    else:
+        puntaje = f"ts_rank({DOCUMENTO_BUSQUEDA_SQL}, to_tsquery('simple', :tsquery))"
+        condicion = f"{DOCUMENTO_BUSQUEDA_SQL} @@ to_tsquery('simple', :tsquery)"
+    
+    filas = db.session.execute(
+        text(f'SELECT id, {puntaje} AS puntaje FROM torneo WHERE {condicion} ORDER BY puntaje DESC, fecha DESC LIMIT :limite'),
+        {'tsquery': tsquery, 'texto': ' '.join(terminos), 'limite': limite}
+    ).all()
+    return [(id_torneo, round(float(puntaje), 3)) for id_torneo, puntaje in filas]
+
+
+# API REST - Búsqueda por texto (typeahead)
+@principal.route('/api/buscar', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def buscar():
+    """
+    Busca en nombre_tienda, ubicacion, tipo_torneo y premio. Todos los términos deben coincidir,
+    como palabra completa, prefijo o con errores de tipeo. Resultados ordenados por relevancia.
+    """
+    consulta = request.args.get('q', '').strip()
+    limite = min(request.args.get('limit', 10, type=int), current_app.config['TORNEOS_LIMITE_MAXIMO'])
+    if not consulta or limite < 1:
+        return jsonify([])
+    
+    al_dia = True
+    if db.engine.dialect.name == 'postgresql':
+        resultados = buscar_postgres(consulta, limite)
+    else:
+        al_dia, indice = obtener_indice_busqueda()
+        resultados = indice.buscar(consulta, limite)
+    
+    torneos = {}
+    if resultados:
+        torneos = {torneo.id: torneo for torneo in Torneo.query.filter(Torneo.id.in_([id_torneo for id_torneo, _ in resultados]))}
+    respuesta = jsonify([
+        {**torneos[id_torneo].to_dict(), 'puntaje': puntaje}
+        for id_torneo, puntaje in resultados if id_torneo in torneos
+    ])
+    if not al_dia:
+        # Resultados del índice anterior (se está reconstruyendo): sin el ETag de la versión actual
+        # (ver respuesta_condicional) y sin guardarse en el navegador ni en el CDN
+        respuesta.cache_control.no_store = True
+    return respuesta
+
+
+# Miniatura local de la imagen externa de un torneo
+@principal.route('/api/torneos/<int:id>/miniatura', methods=['GET'])
+@solo_lectura
+def miniatura_torneo(id):
+    """
+    Sirve la imagen del torneo recortada al tamaño de la tarjeta desde el cache en disco.
+    La URL lleva ?v=<hash de Torneo.imagen>, así que la respuesta se puede cachear para siempre.
+    Si la imagen no se puede descargar, redirige a la URL original.
+    """
+    imagen = db.session.execute(db.select(Torneo.imagen).filter_by(id=id)).scalar()
+    if not imagen:
+        return jsonify({'error': 'Torneo sin imagen'}), 404
+    
+    try:
+        ruta = current_app.extensions['miniaturas'].obtener(imagen)
+    except DescargaFallida:
+        return redirect(imagen)
+    except Exception as e:
+        current_app.logger.warning('No se pudo generar la miniatura de %s: %s', imagen, e)
+        return redirect(imagen)
+    
+    respuesta = send_file(ruta, mimetype='image/webp', conditional=True)
+    if request.args.get('v') == clave_url(imagen):
+        respuesta.cache_control.no_cache = None
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = 31536000
+        respuesta.cache_control.immutable = True
+    return respuesta
+
+
+# HTMX - Renderizar grid de torneos
+@principal.route('/api/filtrar', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def filtrar():
+    try:
+        consulta, limite = consulta_grid(request.args)
+    except ValueError as e:
+        return mensaje_grid(e), 400
+    return Response(stream_with_context(tarjetas_grid(request.args, consulta, limite)), mimetype='text/html')
+
+
+def leer_cambios(ultimo):
+    """Cambios con id > ultimo y el estado actual de su torneo: [(id, (accion, torneo_id, torneo))]"""
+    filas = db.session.execute(
+        db.select(CambioTorneo.id, CambioTorneo.accion, CambioTorneo.torneo_id, Torneo)
+        .outerjoin(Torneo, Torneo.id == CambioTorneo.torneo_id)
+        .where(CambioTorneo.id > ultimo)
+        .order_by(CambioTorneo.id)
+        .limit(500)
+    ).all()
+    return [(fila.id, (fila.accion, fila.torneo_id, fila.Torneo)) for fila in filas]
+
+
+def lector_cambios(app):
+    """Función de lectura para el FeedCambios del worker (corre en su propio hilo, fuera de las peticiones)"""
+    def leer(ultimo):
+        with app.app_context():
+            try:
+                return CambioTorneo.ultimo() if ultimo is None else leer_cambios(ultimo)
+            finally:
+                # Los torneos quedan desconectados de la sesión con sus columnas ya cargadas
+                db.session.remove()
+    return leer
+
+
+def eventos_cambios(cambios):
+    """
+    Texto server-sent events de una lista de cambios. Cada alta o edición lleva el torneo y el HTML
+    de su tarjeta (del cache de tarjetas) para que el navegador la reemplace en su lugar.
+    """
+    hoy = date.today()
+    eventos = []
+    for id_cambio, (accion, torneo_id, torneo) in cambios:
+        if accion == 'recargar':
+            eventos.append(f'id: {id_cambio}\nevent: recargar\ndata: {{}}\n\n')
+            continue
+        if accion == 'eliminar' or torneo is None:
+            datos = {'id': torneo_id, 'accion': 'eliminar'}
         else:
-            imagen_html = f'''<div class="h-48 bg-gradient-to-br {gradient} flex items-center justify-center relative overflow-hidden">
-                    <div class="absolute inset-0 bg-black opacity-0 group-hover:opacity-10 transition-opacity"></div>
-                    <svg class="w-24 h-24 text-white opacity-80" fill="currentColor" viewBox="0 0 20 20">
-                        <path d="M10 2a8 8 0 100 16 8 8 0 000-16zM7 9H5V7h2v2zm4 0H9V7h2v2zm4 0h-2V7h2v2z"/>
-                    </svg>
-                </div>'''
-        
-        html += f'''<div class="bg-white rounded-xl shadow-lg hover:shadow-2xl transition-all duration-300 overflow-hidden group hover:-translate-y-2">
-            <div class="relative">
-                <div class="absolute top-3 left-3 z-10 {badge_color} text-white text-xs font-bold px-3 py-1 rounded-full">
-                    {badge_text}
-                </div>
-                {imagen_html}
-            </div>
-            <div class="p-4">
-                <h3 class="text-lg font-bold text-gray-800 mb-2">{torneo.nombre_tienda}</h3>
-                <div class="space-y-2 text-sm text-gray-600 mb-3">
-                    <div class="flex items-center gap-2">
-                        <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M17.657 16.657L13.414 20.9a1.998 1.998 0 01-2.827 0l-4.244-4.243a8 8 0 1111.314 0z"/>
-                        </svg>
-                        <span>{torneo.ubicacion}</span>
-                    </div>
-                    <div class="flex items-center gap-2">
-                        <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"/>
-                        </svg>
-                        <span>{fecha_formato} - {torneo.hora}</span>
-                    </div>
-                </div>
-                <div class="flex flex-wrap gap-2 mb-3">
-                    <span class="px-2 py-1 bg-orange-100 text-orange-700 text-xs font-semibold rounded">{torneo.tipo_torneo}</span>
-                    <span class="px-2 py-1 bg-blue-100 text-blue-700 text-xs font-semibold rounded">{torneo.categoria}</span>
-                </div>
-                {boton}
-            </div>
-        </div>'''
+            datos = {'id': torneo_id, 'accion': accion, 'torneo': torneo.to_dict(), 'html': renderizar_tarjeta(torneo, hoy)}
+        eventos.append(f'id: {id_cambio}\nevent: torneo\ndata: {current_app.json.dumps(datos)}\n\n')
+    return ''.join(eventos)
+
+
+# Cambios en vivo (server-sent events)
+@principal.route('/api/cambios', methods=['GET'])
+def cambios():
+    """
+    Flujo text/event-stream con las altas, ediciones y bajas de torneos posteriores a `desde`
+    (o al header Last-Event-ID cuando el navegador reconecta). Cada worker consulta la secuencia
+    de CambioTorneo una sola vez por intervalo para todas sus conexiones.
+    Si ya hay CAMBIOS_MAX_CONEXIONES abiertas en el worker, responde lo pendiente y cierra:
+    el navegador vuelve a preguntar a los CAMBIOS_REINTENTO segundos.
+    """
+    desde = request.headers.get('Last-Event-ID', type=int)
+    if desde is None:
+        desde = request.args.get('desde', type=int)
+    estado = current_app.extensions['cambios']
+    cabeceras = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     
-    return html
+    if not estado.cupos.acquire(blocking=False):
+        texto = f'retry: {current_app.config["CAMBIOS_REINTENTO"] * 1000}\n\n'
+        if desde is not None:
+            primero = db.session.execute(db.select(func.min(CambioTorneo.id))).scalar()
+            if primero is not None and desde < primero - 1:
+                # Los cambios intermedios ya se borraron: hay que recargar la grid
+                texto += f'id: {CambioTorneo.ultimo()}\nevent: recargar\ndata: {{}}\n\n'
+            else:
+                texto += eventos_cambios(leer_cambios(desde))
+        return Response(texto, mimetype='text/event-stream', headers=cabeceras)
+    
+    # La conexión queda abierta varios minutos: se devuelve a la base la que haya usado la petición
+    db.session.close()
+    feed = estado.feed
+    fin = reloj.monotonic() + current_app.config['CAMBIOS_DURACION']
+    
+    def generar(ultimo):
+        yield f'retry: {int(current_app.config["CAMBIOS_INTERVALO"] * 1000) + 1000}\n\n'
+        while reloj.monotonic() < fin:
+            # Cada 15 segundos sin cambios se envía un comentario para que los proxies no corten la conexión
+            pendientes, ultimo_feed = feed.esperar(ultimo, min(15, max(0, fin - reloj.monotonic())))
+            if pendientes is None:
+                yield f'id: {ultimo_feed}\nevent: recargar\ndata: {{}}\n\n'
+            elif pendientes:
+                yield eventos_cambios(pendientes)
+            else:
+                yield ': ping\n\n'
+            ultimo = ultimo_feed
+    
+    respuesta = Response(stream_with_context(generar(desde)), mimetype='text/event-stream', headers=cabeceras)
+    respuesta.call_on_close(estado.cupos.release)
+    return respuesta
+
+
+# Instantáneas de la página pública (ver instantaneas.py): ruta -> archivo.
+# /api/torneos sin parámetros no va: es la tabla completa (la pide el panel admin, que nunca recibe
+# instantáneas) y con muchos torneos pasa de TAMANO_MAXIMO, así que renderizarla en cada commit sería en vano
+RUTAS_INSTANTANEAS = {
+    '/': 'index.html',
+    '/api/filtrar': 'filtrar.html',
+    '/api/facets': 'facets.json',
+}
+# Contadores de Version de los que dependen: van en el nombre del archivo y un commit que incrementa
+# alguno las regenera
+VERSIONES_INSTANTANEAS = ('torneos', 'logo', 'popup')
+# Rutas con @respuesta_condicional: la instantánea responde con el mismo ETag y Last-Modified que Flask
+CONDICIONALES_INSTANTANEAS = {'/api/filtrar': 'torneos', '/api/facets': 'torneos'}
+
+
+def renderizador_instantaneas(app):
+    """Función de render para el GeneradorInstantaneas (corre en su propio hilo, fuera de las peticiones)"""
+    def renderizar(ruta):
+        # Una petición propia, sin cookies de sesión (visitante anónimo) y con leer_primaria:
+        # con réplicas, la instantánea tiene que incluir lo que se acaba de guardar
+        with app.app_context(), app.test_request_context(ruta, headers={'Cookie': f'{COOKIE_LEER_PRIMARIA}=1'}):
+            g.instantanea = True
+            # Logo y popup pueden haber cambiado en otro worker hace menos de CACHE_SINGLETON_TTL
+            app.extensions['singletons'].logo.vencer()
+            app.extensions['singletons'].popup.vencer()
+            respuesta = app.full_dispatch_request()
+            try:
+                return respuesta.get_data() if respuesta.status_code == 200 else None
+            finally:
+                respuesta.close()
+    return renderizar
+
+
+def variantes_generadas(app):
+    """
+    Aviso de ImagenesSubidas: el logo o el popup ya tienen variantes. La instantánea de index.html se
+    renderizó con el commit, antes de que existieran (sin <source>), así que se regenera
+    """
+    def avisar():
+        instantaneas = app.extensions['instantaneas']
+        if instantaneas:
+            instantaneas.generador.programar()
+    return avisar
+
+
+def lector_versiones(app):
+    """Filas (nombre, valor, actualizado_en) de VERSIONES_INSTANTANEAS, leídas de la primaria"""
+    def leer():
+        with app.app_context():
+            try:
+                return [tuple(fila) for fila in db.session.execute(
+                    db.select(Version.nombre, Version.valor, Version.actualizado_en)
+                    .where(Version.nombre.in_(VERSIONES_INSTANTANEAS))
+                    .order_by(Version.nombre)
+                )]
+            finally:
+                db.session.remove()
+    return leer
+
+
+@event.listens_for(SesionEnrutada, 'after_commit')
+def _despues_de_commit(session):
+    versiones = session.info.pop('versiones', set())
+    if not versiones.intersection(VERSIONES_INSTANTANEAS) or not has_app_context():
+        return
+    instantaneas = current_app.extensions.get('instantaneas')
+    if instantaneas is not None:
+        # Este worker relee las versiones ya y los demás de este disco dejan de encontrar los archivos.
+        # Los de otras instancias lo notan al releer Version (CACHE_SINGLETON_TTL). Se regeneran en segundo plano
+        instantaneas.servidor.vencer()
+        instantaneas.generador.invalidar()
+        instantaneas.generador.programar()
+
+
+@event.listens_for(SesionEnrutada, 'after_rollback')
+def _despues_de_rollback(session):
+    session.info.pop('versiones', None)
+
+
+@principal.after_app_request
+def revisar_instantaneas(response):
+    """
+    Si una ruta con instantánea llegó a Flask porque falta la de hoy y de las versiones actuales
+    (pasó la medianoche, o otra instancia cambió los datos), se pide
+    """
+    instantaneas = current_app.extensions['instantaneas']
+    if instantaneas is not None and request.path in RUTAS_INSTANTANEAS and not g.get('instantanea'):
+        versiones = instantaneas.servidor.vigentes()
+        if versiones is not None:
+            instantaneas.generador.programar_si_falta(versiones)
+    return response
+
+
+@principal.cli.command('instantaneas')
+def comando_instantaneas():
+    """Regenera las instantáneas de la página pública (también se regeneran solas al guardar y cada día)."""
+    instantaneas = current_app.extensions['instantaneas']
+    if instantaneas is None:
+        print('Las instantáneas están desactivadas (INSTANTANEAS=0)')
+        return
+    generador = instantaneas.generador
+    while not generador.generar():
+        pass
+    print(f'✓ Instantáneas generadas en {generador.carpeta}')
 
 # API REST - Crear torneo
-@app.route('/api/torneos', methods=['POST'])
+@principal.route('/api/torneos', methods=['POST'])
 @login_required
 def crear_torneo():
     try:
@@ -552,13 +2200,15 @@ def crear_torneo():
             imagen=data.get('imagen') if data.get('imagen') else None
         )
         db.session.add(nuevo_torneo)
+        db.session.flush()
+        CambioTorneo.registrar('crear', nuevo_torneo.id)
         db.session.commit()
         return jsonify({'mensaje': 'Torneo creado exitosamente', 'torneo': nuevo_torneo.to_dict()}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 # API REST - Actualizar torneo
-@app.route('/api/torneos/<int:id>', methods=['PUT'])
+@principal.route('/api/torneos/<int:id>', methods=['PUT'])
 @login_required
 def actualizar_torneo(id):
     try:
@@ -577,13 +2227,14 @@ def actualizar_torneo(id):
         torneo.tipo_torneo = data.get('tipo_torneo', torneo.tipo_torneo)
         torneo.imagen = data.get('imagen') if data.get('imagen') else None
         
+        CambioTorneo.registrar('actualizar', torneo.id)
         db.session.commit()
         return jsonify({'mensaje': 'Torneo actualizado exitosamente', 'torneo': torneo.to_dict()})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 # API REST - Eliminar torneo
-@app.route('/api/torneos/<int:id>', methods=['DELETE'])
+@principal.route('/api/torneos/<int:id>', methods=['DELETE'])
 @login_required
 def eliminar_torneo(id):
     try:
@@ -592,13 +2243,133 @@ def eliminar_torneo(id):
             return jsonify({'error': 'Torneo no encontrado'}), 404
         
         db.session.delete(torneo)
+        CambioTorneo.registrar('eliminar', id)
         db.session.commit()
         return jsonify({'mensaje': 'Torneo eliminado exitosamente'})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+# API REST - Importación masiva
+@principal.route('/api/torneos/bulk', methods=['POST'])
+@login_required
+@presupuesto_consultas(None)  # un INSERT por lote: crece con el archivo
+def importar_torneos():
+    """
+    Crea muchos torneos desde un CSV o NDJSON, en el body (Content-Type text/csv o application/x-ndjson)
+    o como archivo en el campo `archivo` de un formulario.
+    Las filas se validan a medida que se leen y se insertan por lotes de IMPORTACION_LOTE en una
+    sola transacción: si alguna fila es inválida no se guarda ninguna y se retornan los errores.
+    """
+    archivo = request.files.get('archivo')
+    if archivo:
+        formato = request.args.get('formato') or importacion.detectar_formato(archivo.mimetype, archivo.filename)
+        stream = archivo.stream
+    else:
+        formato = request.args.get('formato') or importacion.detectar_formato(request.mimetype)
+        stream = request.stream
+    if formato not in importacion.FORMATOS:
+        return jsonify({'error': 'Formato no soportado. Use CSV o NDJSON'}), 415
+    
+    tamano_lote = current_app.config['IMPORTACION_LOTE']
+    max_errores = current_app.config['IMPORTACION_MAX_ERRORES']
+    lote = []
+    errores = []
+    creados = 0
+    try:
+        for linea, fila in importacion.leer_filas(stream, formato):
+            try:
+                if isinstance(fila, Exception):
+                    raise fila
+                valores = importacion.validar_fila(fila)
+            except ValueError as e:
+                errores.append({'linea': linea, 'error': str(e)})
+                if len(errores) >= max_errores:
+                    break
+                continue
+            
+            # Con errores ya no se inserta nada, solo se sigue validando para reportarlos todos
+            if errores:
+                continue
+            lote.append(valores)
+            if len(lote) >= tamano_lote:
+                db.session.execute(insert(Torneo), lote)
+                creados += len(lote)
+                lote = []
+        
+        if errores:
+            db.session.rollback()
+            return jsonify({'error': 'El archivo tiene filas inválidas, no se importó ningún torneo', 'errores': errores}), 400
+        
+        if lote:
+            db.session.execute(insert(Torneo), lote)
+            creados += len(lote)
+        if creados:
+            CambioTorneo.registrar('recargar')
+        db.session.commit()
+        return jsonify({'mensaje': f'{creados} torneos importados exitosamente', 'creados': creados}), 201
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'El archivo debe estar en UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+# API REST - Exportación masiva
+@principal.route('/api/torneos/export', methods=['GET'])
+@solo_lectura
+@respuesta_condicional('torneos')
+def exportar_torneos():
+    """
+    Descarga todos los torneos como CSV (por defecto) o NDJSON (?formato=ndjson).
+    La respuesta se genera a medida que se leen las filas (yield_per), sin cargar la tabla en memoria.
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in importacion.FORMATOS:
+        return jsonify({'error': 'Formato no soportado. Use csv o ndjson'}), 400
+    
+    columnas = [getattr(Torneo, columna) for columna in importacion.COLUMNAS]
+    consulta = db.select(*columnas).order_by(Torneo.fecha, Torneo.id).execution_options(yield_per=1000)
+    
+    def generar():
+        filas = db.session.execute(consulta)
+        yield from importacion.escribir_filas(filas, formato)
+    
+    respuesta = Response(stream_with_context(generar()), mimetype=importacion.FORMATOS[formato])
+    respuesta.headers['Content-Disposition'] = f'attachment; filename=torneos.{formato}'
+    return respuesta
+
+def _estado_pool(campo):
+    """Lee el estado del pool del engine actual para los medidores de /metrics"""
+    pool = db.engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    en_uso = pool.checkedout()
+    if campo == 'en_uso':
+        return en_uso
+    if campo == 'abiertas':
+        return pool.checkedin() + en_uso
+    maximo = current_app.config['DB_POOL_SIZE'] + current_app.config['DB_MAX_OVERFLOW']
+    return en_uso / maximo if maximo else 0
+
+metricas.Medidor('tcghub_db_pool_checked_out', 'Conexiones del pool en uso', lambda: _estado_pool('en_uso'))
+metricas.Medidor('tcghub_db_pool_connections', 'Conexiones abiertas por el pool (en uso + libres)', lambda: _estado_pool('abiertas'))
+metricas.Medidor(
+    'tcghub_db_pool_saturation', 'Conexiones en uso / (DB_POOL_SIZE + DB_MAX_OVERFLOW); en 1 las peticiones esperan',
+    lambda: _estado_pool('saturacion')
+)
+
+# Métricas en formato Prometheus (por worker)
+@principal.route('/metrics', methods=['GET'])
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if not token and not current_app.config['METRICS_SIN_TOKEN']:
+        return jsonify({'error': 'No encontrado'}), 404
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'No autorizado'}), 401
+    return Response(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # Inicializar base de datos con datos dummy
-@app.route('/api/init-dummy', methods=['POST'])
+@principal.route('/api/init-dummy', methods=['POST'])
 def init_dummy():
     try:
         if Torneo.query.count() > 0:
@@ -609,8 +2380,14 @@ def init_dummy():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+app = create_app()
+
 if __name__ == '__main__':
-    # En desarrollo usa el servidor de Flask, en producción usa gunicorn
+    # En desarrollo usa el servidor de Flask, en producción usa gunicorn.
+    # Por comodidad aquí sí se crea la base (en producción: flask --app app init-db --seed)
+    with app.app_context():
+        inicializar_db()
+        sembrar_datos()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
     app.run(debug=debug, host='0.0.0.0', port=port)
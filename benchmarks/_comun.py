@@ -0,0 +1,41 @@
+"""
+Datos de prueba compartidos por los benchmarks. Se importa después de definir DATABASE_URL y de agregar
+la raíz del repositorio a sys.path (como `import app` en cada script), y se usa dentro de un contexto de app.
+"""
+from datetime import date, time, timedelta
+
+from sqlalchemy import insert
+
+from app import CambioTorneo, Torneo, db
+
+LOTE = 10000
+
+
+def torneo_prueba(i, hoy, desde=-30, dias=120, imagenes=False):
+    """
+    El torneo número `i`: 40 ciudades, los dos juegos alternados y fechas repartidas en `dias` días
+    a partir de hoy + `desde`. Con `imagenes`, uno de cada tres tiene imagen externa
+    """
+    return {
+        'nombre_tienda': f'Tienda {i}', 'ubicacion': f'Ciudad {i % 40}', 'hora': time(10 + i % 10),
+        'fecha': hoy + timedelta(days=desde + i % dias), 'premio': 'Booster Box',
+        'tipo_juego': 'Pokemon' if i % 2 else 'One Piece', 'categoria': 'Master', 'tipo_torneo': 'League Cup',
+        'imagen': f'https://example.com/{i}.jpg' if imagenes and i % 3 == 0 else None
+    }
+
+
+def poblar(cantidad, fila=None, reemplazar=False, **opciones):
+    """
+    Inserta `cantidad` torneos en lotes de LOTE filas y lo registra como un cambio masivo ('recargar'),
+    igual que una importación: sube la versión 'torneos' y con ella los caches y las instantáneas.
+    `fila(i)` arma cada torneo (por defecto torneo_prueba con `opciones`); con `reemplazar` se borran antes
+    los que haya.
+    """
+    hoy = date.today()
+    fila = fila or (lambda i: torneo_prueba(i, hoy, **opciones))
+    if reemplazar:
+        db.session.execute(db.delete(Torneo))
+    for inicio in range(0, cantidad, LOTE):
+        db.session.execute(insert(Torneo), [fila(i) for i in range(inicio, min(cantidad, inicio + LOTE))])
+    CambioTorneo.registrar('recargar')
+    db.session.commit()
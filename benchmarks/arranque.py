@@ -0,0 +1,81 @@
+"""
+Tiempo de arranque de un worker: importar app.py hasta tener la aplicación lista.
+
+Antes: el app.py del commit base (BASE), extraído con `git archive`. Importarlo corría db.create_all(),
+la búsqueda del admin, Torneo.query.count() y la creación de datos dummy, en cada worker de gunicorn.
+Ahora: el app.py del árbol actual; importar solo crea la aplicación y la base se prepara una vez
+con `flask init-db --seed`.
+
+Cada medición es un proceso nuevo de Python (arranque en frío), cada versión contra su propia base
+ya creada (los esquemas no son iguales). Ojo: el app.py actual importa más módulos que el de la base,
+así que con SQLite local la diferencia puede ser pequeña o incluso negativa; lo que se ahorra son las
+consultas del arranque, que pesan más con una base remota.
+
+Uso:
+    python benchmarks/arranque.py [repeticiones] [commit base]
+"""
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = '7e071a3'
+
+IMPORTAR = """
+import time
+inicio = time.perf_counter()
+import app
+print(time.perf_counter() - inicio)
+"""
+
+
+def extraer_base(commit):
+    """Copia el árbol de `commit` a una carpeta temporal y retorna su ruta"""
+    carpeta = tempfile.mkdtemp()
+    archivo = subprocess.run(['git', 'archive', commit], cwd=RAIZ, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archivo)) as tar:
+        tar.extractall(carpeta)
+    return carpeta
+
+
+def medir(carpeta, entorno, repeticiones):
+    """Importa app.py de `carpeta` en procesos nuevos y retorna los tiempos medidos dentro de cada uno (s)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', IMPORTAR], cwd=carpeta, env=entorno,
+            capture_output=True, text=True, check=True
+        ).stdout
+        tiempos.append(float(salida.strip().splitlines()[-1]))
+    return tiempos
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    base = sys.argv[2] if len(sys.argv) > 2 else BASE
+    carpeta_base = extraer_base(base)
+    entornos = {}
+    for nombre in ('antes', 'ahora'):
+        entornos[nombre] = dict(os.environ)
+        entornos[nombre]['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    # Bases ya inicializadas, como las encuentra cada worker después del primer despliegue:
+    # la del commit base se crea con su primer import, la actual con init-db
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=carpeta_base, env=entornos['antes'],
+                   capture_output=True, check=True)
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db', '--seed'],
+                   cwd=RAIZ, env=entornos['ahora'], capture_output=True, check=True)
+
+    print(f'antes = {base}, ahora = árbol actual')
+    for nombre, carpeta in (('antes', carpeta_base), ('ahora', RAIZ)):
+        tiempos = medir(carpeta, entornos[nombre], repeticiones)
+        print(f'{nombre}: mediana {statistics.median(tiempos) * 1000:7.1f} ms | '
+              f'máx {max(tiempos) * 1000:7.1f} ms ({repeticiones} arranques)')
+
+
+if __name__ == '__main__':
+    main()
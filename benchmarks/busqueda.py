@@ -0,0 +1,136 @@
+"""
+Latencia de la búsqueda typeahead (/api/buscar) con el índice en memoria.
+
+Genera `torneos` torneos con tiendas, ciudades y premios variados, y mide cada consulta
+(escribiendo letra por letra, como un typeahead) directamente sobre el índice y vía HTTP.
+Verifica además que:
+- las consultas con errores de tipeo ('dragn den', 'pokemno') encuentran la tienda correcta,
+- después de una escritura /api/buscar no espera la reconstrucción del índice (responde con el
+  anterior) y el torneo nuevo aparece cuando termina.
+
+Termina con código 1 si alguna verificación falla.
+
+Uso:
+    python benchmarks/busqueda.py [torneos] [repeticiones]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'busqueda.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as modulo_app  # noqa: E402
+from app import Torneo, app, db  # noqa: E402
+from _comun import poblar  # noqa: E402
+
+PREFIJOS = ['Card', 'Pokemon', 'Dragon', 'Trading', 'Game', 'Collector', 'Gaming', 'TCG', 'Duel', 'Magic', 'Arcane', 'Meta']
+SUFIJOS = ['Shop', 'World', 'Zone', 'Store', 'Master', 'Kingdom', 'Hub', 'Arena', 'Den', 'Vault', 'House', 'Corner']
+CIUDADES = ['Madrid', 'Barcelona', 'Valencia', 'Bilbao', 'Sevilla', 'Málaga', 'Alicante', 'Zaragoza', 'Santiago',
+            'Valparaíso', 'Concepción', 'Temuco', 'Antofagasta', 'La Serena', 'Rancagua', 'Talca']
+TIPOS = ['League Cup', 'League Challenge', 'Liga Casual', 'Liga Competitiva', 'Regional', 'Prerelease']
+PREMIOS = ['$50', '$100', '$200', 'Booster Box', 'Cartas Promocionales', 'Playmat', 'Sleeves', 'Deck Box', 'Trofeo']
+
+CONSULTAS = ['card shop', 'madrid', 'valparaiso', 'booster box', 'league cup santiago', 'dragn den', 'pokemno']
+# Consultas con errores de tipeo -> palabra que debe tener la tienda de cada resultado
+APROXIMADAS = {'dragn den': 'Dragon Den', 'pokemno': 'Pokemon'}
+
+
+def generador_filas():
+    """fila(i) para poblar: tiendas, ciudades, premios y fechas al azar, siempre con la misma semilla"""
+    azar = random.Random(42)
+    hoy = date.today()
+    tiendas = [f'{p} {s} {i}' for i in range(200) for p, s in [(azar.choice(PREFIJOS), azar.choice(SUFIJOS))]]
+    return lambda i: {
+        'nombre_tienda': azar.choice(tiendas), 'ubicacion': azar.choice(CIUDADES), 'hora': modulo_app.time(18),
+        'fecha': hoy + timedelta(days=azar.randint(-365, 365)), 'premio': azar.choice(PREMIOS),
+        'tipo_juego': 'Pokemon', 'categoria': 'Master', 'tipo_torneo': azar.choice(TIPOS)
+    }
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with app.app_context():
+        modulo_app.inicializar_db()
+        poblar(cantidad, fila=generador_filas())
+        inicio = time.perf_counter()
+        _, indice = modulo_app.obtener_indice_busqueda()
+        construccion = time.perf_counter() - inicio
+        print(f'{len(indice)} torneos | índice construido en {construccion * 1000:.0f} ms')
+
+        # Cada consulta se escribe letra por letra, como en el typeahead
+        tiempos = []
+        for consulta in CONSULTAS:
+            for largo in range(2, len(consulta) + 1):
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    indice.buscar(consulta[:largo], 10)
+                    tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        print(f'índice:       p50 {statistics.median(tiempos) * 1000:6.2f} ms | '
+              f'p95 {tiempos[int(len(tiempos) * 0.95)] * 1000:6.2f} ms | máx {tiempos[-1] * 1000:6.2f} ms')
+
+    cliente = app.test_client()
+    tiempos = []
+    for consulta in CONSULTAS:
+        for largo in range(2, len(consulta) + 1):
+            inicio = time.perf_counter()
+            cliente.get('/api/buscar', query_string={'q': consulta[:largo]}).get_data()
+            tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    print(f'/api/buscar:  p50 {statistics.median(tiempos) * 1000:6.2f} ms | '
+          f'p95 {tiempos[int(len(tiempos) * 0.95)] * 1000:6.2f} ms | máx {tiempos[-1] * 1000:6.2f} ms')
+
+    errores = []
+
+    def verificar(condicion, mensaje):
+        print(('ok    ' if condicion else 'FALLA ') + mensaje)
+        if not condicion:
+            errores.append(mensaje)
+
+    with app.app_context():
+        for consulta in CONSULTAS:
+            resultados = indice.buscar(consulta, 3)
+            nombres = [(t.nombre_tienda, t.ubicacion) for t in Torneo.query.filter(Torneo.id.in_([i for i, _ in resultados]))]
+            print(f'  {consulta!r:24} -> {nombres}')
+            if consulta in APROXIMADAS:
+                verificar(nombres and all(APROXIMADAS[consulta] in tienda for tienda, _ in nombres),
+                          f'{consulta!r} encuentra {APROXIMADAS[consulta]!r}')
+
+        db.session.add(Torneo(
+            nombre_tienda='Zafiro Games', ubicacion='Madrid', hora=modulo_app.time(18), fecha=date.today(),
+            premio='Playmat', tipo_juego='Pokemon', categoria='Master', tipo_torneo='League Cup'
+        ))
+        modulo_app.CambioTorneo.registrar('recargar')
+        db.session.commit()
+
+    inicio = time.perf_counter()
+    vieja = cliente.get('/api/buscar', query_string={'q': 'zafiro'})
+    despues_de_escribir = time.perf_counter() - inicio
+    print(f'/api/buscar justo después de una escritura: {despues_de_escribir * 1000:.1f} ms '
+          f'(construir el índice: {construccion * 1000:.0f} ms)')
+    verificar(despues_de_escribir < construccion / 2, 'la búsqueda no espera la reconstrucción del índice')
+    if not vieja.get_json():
+        verificar(vieja.headers.get('ETag') is None and vieja.cache_control.no_store,
+                  'la respuesta del índice anterior no lleva el ETag actual y es no-store')
+
+    fin = time.perf_counter() + 60
+    nueva = None
+    while time.perf_counter() < fin:
+        nueva = cliente.get('/api/buscar', query_string={'q': 'zafiro'})
+        if nueva.get_json():
+            break
+        time.sleep(0.05)
+    verificar(bool(nueva.get_json()), 'el torneo nuevo aparece cuando termina la reconstrucción')
+    verificar(nueva.headers.get('ETag') is not None, 'y con el índice al día vuelve el ETag')
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Prueba de carga HTTP: peticiones por segundo y latencia de / y /api/filtrar.
+
+Sin --url levanta gunicorn con gunicorn.conf.py sobre una base SQLite temporal con
+`torneos` torneos de prueba, y compara los perfiles de worker indicados en --perfiles.
+Con --url mide un servidor que ya está corriendo (por ejemplo el de Render).
+
+Cada cliente es un hilo con su propia conexión keep-alive que pide las URLs en bucle
+durante --duracion segundos.
+
+Uso:
+    python benchmarks/carga_http.py [--torneos 1000] [--clientes 20] [--duracion 10]
+                                    [--perfiles sync,gthread] [--url http://host:puerto]
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTAS = ['/', '/api/filtrar?filtro-fecha=&filtro-ubicacion=&filtro-juego=']
+
+POBLAR = """
+import sys
+from datetime import date, timedelta
+from sqlalchemy import insert
+import app as modulo_app
+from app import Torneo, app, db
+cantidad = int(sys.argv[1])
+with app.app_context():
+    modulo_app.inicializar_db()
+    modulo_app.sembrar_datos()
+    hoy = date.today()
+    db.session.execute(insert(Torneo), [
+        {'nombre_tienda': f'Tienda {i}', 'ubicacion': f'Ciudad {i % 40}', 'hora': modulo_app.time(18),
+         'fecha': hoy + timedelta(days=i % 120 - 30), 'premio': 'Booster Box',
+         'tipo_juego': 'Pokemon' if i % 2 else 'One Piece', 'categoria': 'Master', 'tipo_torneo': 'League Cup'}
+        for i in range(cantidad)
+    ])
+    modulo_app.Version.incrementar('torneos')
+    db.session.commit()
+"""
+
+
+def cliente(base, ruta, fin, latencias, errores):
+    """Pide `ruta` en bucle por una misma conexión hasta `fin`"""
+    partes = urlsplit(base)
+    clase = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+    conexion = clase(partes.netloc, timeout=30)
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            conexion.request('GET', ruta)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(type(e).__name__)
+            conexion.close()
+            conexion = clase(partes.netloc, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+
+
+def medir(base, ruta, clientes, duracion):
+    latencias = []
+    errores = []
+    fin = time.perf_counter() + duracion
+    hilos = [threading.Thread(target=cliente, args=(base, ruta, fin, latencias, errores)) for _ in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    latencias.sort()
+    if not latencias:
+        print(f'  {ruta}: sin respuestas ({len(errores)} errores)')
+        return
+    p95 = latencias[int(len(latencias) * 0.95) - 1] if len(latencias) >= 20 else latencias[-1]
+    print(f'  {ruta[:12]:<12} {len(latencias) / duracion:8.1f} req/s | '
+          f'p50 {statistics.median(latencias) * 1000:7.1f} ms | p95 {p95 * 1000:7.1f} ms | '
+          f'errores {len(errores)}')
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar(base, proceso, limite=30):
+    """Espera a que gunicorn responda"""
+    fin = time.time() + limite
+    partes = urlsplit(base)
+    while time.time() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError('gunicorn terminó al arrancar')
+        try:
+            conexion = http.client.HTTPConnection(partes.netloc, timeout=1)
+            conexion.request('GET', '/api/facets')
+            conexion.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn no respondió a tiempo')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url')
+    parser.add_argument('--torneos', type=int, default=1000)
+    parser.add_argument('--clientes', type=int, default=20)
+    parser.add_argument('--duracion', type=float, default=10)
+    parser.add_argument('--perfiles', default='sync,gthread')
+    args = parser.parse_args()
+
+    if args.url:
+        print(f'{args.url} | {args.clientes} clientes | {args.duracion:.0f} s por ruta')
+        for ruta in RUTAS:
+            medir(args.url.rstrip('/'), ruta, args.clientes, args.duracion)
+        return
+
+    entorno = dict(os.environ)
+    entorno['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'carga.db')
+    subprocess.run([sys.executable, '-c', POBLAR, str(args.torneos)], cwd=RAIZ, env=entorno,
+                   capture_output=True, check=True)
+
+    print(f'{args.torneos} torneos | {args.clientes} clientes | {args.duracion:.0f} s por ruta')
+    for perfil in args.perfiles.split(','):
+        puerto = puerto_libre()
+        base = f'http://127.0.0.1:{puerto}'
+        entorno_perfil = dict(entorno, PORT=str(puerto), GUNICORN_WORKER_CLASS=perfil)
+        proceso = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+            cwd=RAIZ, env=entorno_perfil, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            esperar(base, proceso)
+            print(f'{perfil}:')
+            for ruta in RUTAS:
+                medir(base, ruta, args.clientes, args.duracion)
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == '__main__':
+    main()
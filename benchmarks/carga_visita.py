@@ -0,0 +1,86 @@
+"""
+Prueba de carga de una visita a la página principal: consultas SQL y bytes por visita.
+
+Antes: el navegador pedía / (solo el esqueleto), luego /api/torneos (lista completa para
+armar el select de ubicaciones) y luego /api/filtrar (la grid).
+Ahora: / ya trae la primera página de la grid y las ubicaciones renderizadas.
+
+Uso:
+    python benchmarks/carga_visita.py [torneos] [visitas]
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Base de datos temporal para no tocar torneos.db al importar la app
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+# Se mide la página renderizada por Flask, no la instantánea (ver benchmarks/instantaneas.py)
+os.environ.setdefault('INSTANTANEAS', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+import app as modulo_app  # noqa: E402
+from app import app, db  # noqa: E402
+from _comun import poblar  # noqa: E402
+
+
+def medir_visita(cliente, urls, contador):
+    """Hace las peticiones de una visita y retorna (consultas, bytes)"""
+    contador[0] = 0
+    total_bytes = 0
+    for url in urls:
+        respuesta = cliente.get(url)
+        assert respuesta.status_code == 200, (url, respuesta.status_code)
+        total_bytes += len(respuesta.data)
+    return contador[0], total_bytes
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    visitas = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    contador = [0]
+    with app.app_context():
+        modulo_app.inicializar_db()
+        modulo_app.sembrar_datos()
+        poblar(cantidad, reemplazar=True)
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: contador.__setitem__(0, contador[0] + 1))
+
+    cliente = app.test_client()
+    antes = ['/', '/api/torneos', '/api/filtrar?filtro-fecha=&filtro-ubicacion=&filtro-juego=']
+    ahora = ['/']
+
+    resultados = {}
+    for nombre, urls in (('antes', antes), ('ahora', ahora)):
+        if nombre == 'antes':
+            # El esqueleto de / no traía grid ni ubicaciones
+            parches = [
+                mock.patch.object(modulo_app, 'renderizar_grid', return_value=('', 200)),
+                mock.patch.object(modulo_app, 'obtener_facetas', return_value={'ubicacion': []}),
+            ]
+        else:
+            parches = []
+        for parche in parches:
+            parche.start()
+        try:
+            medir_visita(cliente, urls, contador)  # calentar caches
+            inicio = time.perf_counter()
+            for _ in range(visitas):
+                consultas, total_bytes = medir_visita(cliente, urls, contador)
+            duracion = (time.perf_counter() - inicio) / visitas
+        finally:
+            for parche in parches:
+                parche.stop()
+        resultados[nombre] = (len(urls), consultas, total_bytes, duracion)
+
+    print(f'{cantidad} torneos, {visitas} visitas')
+    for nombre, (peticiones, consultas, total_bytes, duracion) in resultados.items():
+        print(f'{nombre:>6}: {peticiones} peticiones | {consultas} consultas SQL | '
+              f'{total_bytes / 1024:8.1f} KB | {duracion * 1000:7.1f} ms por visita')
+
+
+if __name__ == '__main__':
+    main()
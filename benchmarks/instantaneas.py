@@ -0,0 +1,160 @@
+"""
+Instantáneas de la página pública: compara / y /api/filtrar servidos desde la instantánea con los que
+renderiza Flask (mismo contenido), mide cuánto tarda cada camino y verifica que:
+- la instantánea de /api/filtrar y /api/facets lleva el mismo ETag, Last-Modified y Cache-Control que Flask
+  (y un ETag de Flask recibe 304 de la instantánea),
+- un visitante anónimo nunca recibe una instantánea vieja después de que el admin guarda,
+- la instantánea se regenera sola con el cambio,
+- un cambio hecho por otra instancia (otra carpeta, como el cron de `flask archivar` en su contenedor)
+  deja de servir la instantánea vieja en CACHE_SINGLETON_TTL segundos,
+- un generador lento que renderizó con versiones viejas no hace servir su contenido,
+- /api/torneos sin paginar (la tabla completa) no se renderiza en cada commit,
+- al terminar las variantes AVIF/WebP de un popup subido, la instantánea se regenera con sus <source>,
+- al cambiar el día deja de servirse la del día anterior.
+
+Termina con código 1 si alguna verificación falla.
+
+Uso:
+    python benchmarks/instantaneas.py [torneos] [peticiones]
+"""
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'instantaneas.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as modulo_app  # noqa: E402
+import instantaneas  # noqa: E402
+from app import create_app  # noqa: E402
+from _comun import poblar  # noqa: E402
+from PIL import Image  # noqa: E402
+
+TTL = 0.5
+
+
+def desde_instantanea(respuesta):
+    # Las respuestas de Flask llevan Server-Timing (salvo las en streaming: aquí solo se usa con / y /api/facets)
+    return 'Server-Timing' not in respuesta.headers
+
+
+def torneo_nuevo(nombre):
+    return {
+        'nombre_tienda': nombre, 'ubicacion': 'Madrid', 'hora': '10:00',
+        'fecha': date.today().isoformat(), 'tipo_juego': 'Pokemon', 'categoria': 'Junior', 'tipo_torneo': 'League Cup'
+    }
+
+
+def imagen_png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), (40, 40, 200)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def esperar_instantanea(cliente, url='/', segundos=30, contiene=b''):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        respuesta = cliente.get(url)
+        if desde_instantanea(respuesta) and contiene in respuesta.data:
+            return respuesta
+        time.sleep(0.05)
+    return None
+
+
+def medir(cliente, url, peticiones):
+    tiempos = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        cliente.get(url, headers={'Accept-Encoding': 'gzip'}).get_data()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    peticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    carpeta = tempfile.mkdtemp()
+    app = create_app({
+        'TESTING': True, 'INSTANTANEAS_CARPETA': carpeta, 'CACHE_SINGLETON_TTL': TTL, 'UPLOAD_FOLDER': tempfile.mkdtemp()
+    })
+    dinamica = create_app({'TESTING': True, 'INSTANTANEAS': False})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        modulo_app.sembrar_datos()
+        poblar(cantidad)
+
+    errores = []
+
+    def verificar(condicion, mensaje):
+        print(('ok    ' if condicion else 'FALLA ') + mensaje)
+        if not condicion:
+            errores.append(mensaje)
+
+    anonimo = app.test_client()
+    verificar(esperar_instantanea(anonimo) is not None, 'la instantánea se genera al guardar')
+    verificar(not any(archivo.startswith('torneos.') for archivo in os.listdir(carpeta)),
+              '/api/torneos (la tabla completa) no se renderiza como instantánea')
+    for url in ('/', '/api/filtrar'):
+        verificar(anonimo.get(url).data == dinamica.test_client().get(url).data, f'{url}: mismo contenido que Flask')
+        instantanea = medir(anonimo, url, peticiones)
+        flask = medir(dinamica.test_client(), url, peticiones)
+        print(f'      {url:13} instantánea {instantanea:6.2f} ms | Flask {flask:6.2f} ms | {flask / instantanea:5.1f}x')
+
+    for url in ('/api/filtrar', '/api/facets'):
+        for codificacion in ('gzip', 'identity'):
+            cabeceras = {'Accept-Encoding': codificacion}
+            instantanea, flask = anonimo.get(url, headers=cabeceras), dinamica.test_client().get(url, headers=cabeceras)
+            iguales = all(instantanea.headers.get(h) == flask.headers.get(h) for h in ('ETag', 'Last-Modified', 'Cache-Control'))
+            verificar(iguales, f'{url} ({codificacion}): mismo ETag, Last-Modified y Cache-Control que Flask')
+            flask.close()
+        revalidada = anonimo.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': instantanea.headers['ETag']})
+        verificar(revalidada.status_code == 304, f'{url}: el ETag de Flask recibe 304 de la instantánea')
+
+    admin = app.test_client()
+    admin.post('/admin', json={'username': 'admin', 'password': 'admin123'})
+    verificar(not desde_instantanea(admin.get('/')), 'el admin (con sesión) no recibe la instantánea')
+    admin.post('/api/torneos', json=torneo_nuevo('Tienda Recién Creada'))
+    verificar(b'Tienda Reci' in anonimo.get('/').data, 'justo después de guardar el visitante ve el torneo nuevo')
+    respuesta = esperar_instantanea(anonimo)
+    verificar(respuesta is not None and b'Tienda Reci' in respuesta.data, 'la instantánea regenerada incluye el torneo')
+
+    # Otra instancia con su propio disco: su commit no puede borrar los archivos de esta
+    otra = create_app({'TESTING': True, 'INSTANTANEAS_CARPETA': tempfile.mkdtemp()})
+    otro_admin = otra.test_client()
+    otro_admin.post('/admin', json={'username': 'admin', 'password': 'admin123'})
+    otro_admin.post('/api/torneos', json=torneo_nuevo('Tienda De Otra Instancia'))
+    time.sleep(TTL)
+    verificar(b'Tienda De Otra' in anonimo.get('/').data, f'pasados {TTL} s se ve el cambio hecho por otra instancia')
+    respuesta = esperar_instantanea(anonimo)
+    verificar(respuesta is not None and b'Tienda De Otra' in respuesta.data, 'y la instantánea se regenera con él')
+
+    # Un generador que renderizó antes del último cambio escribe con las versiones viejas en el nombre
+    with app.app_context():
+        viejas = modulo_app.lector_versiones(app)()
+        admin.post('/api/torneos', json=torneo_nuevo('Tienda Más Nueva'))
+        lento = instantaneas.GeneradorInstantaneas(
+            carpeta, modulo_app.RUTAS_INSTANTANEAS, lambda ruta: b'contenido viejo', lambda: viejas
+        )
+        lento.generar()
+    verificar(b'contenido viejo' not in anonimo.get('/').data, 'lo que escribe un generador lento con versiones viejas no se sirve')
+    respuesta = esperar_instantanea(anonimo)
+    verificar(respuesta is not None and b'Tienda M' in respuesta.data, 'la instantánea vuelve a la versión actual')
+
+    # Las variantes del popup se generan en otro hilo, después del commit que regenera la instantánea
+    admin.post('/admin/popup', data={'imagen': (io.BytesIO(imagen_png()), 'popup.png')}, content_type='multipart/form-data')
+    respuesta = esperar_instantanea(anonimo, segundos=60, contiene=b'<source type="image/webp"')
+    verificar(respuesta is not None, 'al terminar las variantes del popup la instantánea incluye sus <source>')
+
+    manana = date.today() + timedelta(days=1)
+    with mock.patch.object(instantaneas, 'date', mock.Mock(today=mock.Mock(return_value=manana))):
+        verificar(not desde_instantanea(anonimo.get('/api/facets')), 'al día siguiente la instantánea de ayer no se sirve')
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
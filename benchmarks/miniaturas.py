@@ -0,0 +1,127 @@
+"""
+Miniaturas de las imágenes externas contra un servidor HTTP local que hace de sitio remoto
+(el descargador por defecto, sin internet). Verifica que:
+- la primera petición descarga la imagen y responde WebP inmutable,
+- las siguientes se sirven desde el disco sin volver a pedirla,
+- una URL caída redirige al original y, mientras dura MINIATURAS_REINTENTO, no se vuelve a pedir,
+- dos apps de create_app() usan cada una su propio descargador y su propia carpeta.
+
+Termina con código 1 si alguna verificación falla.
+
+Uso:
+    python benchmarks/miniaturas.py
+"""
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'miniaturas.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+import app as modulo_app  # noqa: E402
+from app import Torneo, create_app, db  # noqa: E402
+from miniaturas import clave_url  # noqa: E402
+
+pedidos = Counter()
+
+
+def imagen_png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), (200, 40, 40)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class Remoto(BaseHTTPRequestHandler):
+    """/imagen.png responde una imagen; cualquier otra ruta, 404"""
+    png = imagen_png()
+
+    def do_GET(self):
+        pedidos[self.path] += 1
+        if self.path == '/imagen.png':
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(self.png)))
+            self.end_headers()
+            self.wfile.write(self.png)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+def crear_torneo(imagen):
+    torneo = Torneo(
+        nombre_tienda='Tienda', ubicacion='Madrid', hora='18:00', fecha='2030-01-01', premio='',
+        tipo_juego='Pokemon', categoria='Master', tipo_torneo='League Cup', imagen=imagen
+    )
+    db.session.add(torneo)
+    db.session.commit()
+    return torneo.id
+
+
+def main():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Remoto)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_address[1]}'
+    buena, caida = f'{base}/imagen.png', f'{base}/no-existe.png'
+
+    app = create_app({'TESTING': True, 'MINIATURAS_CARPETA': tempfile.mkdtemp(), 'INSTANTANEAS': False})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        id_buena, id_caida = crear_torneo(buena), crear_torneo(caida)
+
+    errores = []
+
+    def verificar(condicion, mensaje):
+        print(('ok    ' if condicion else 'FALLA ') + mensaje)
+        if not condicion:
+            errores.append(mensaje)
+
+    cliente = app.test_client()
+    url = f'/api/torneos/{id_buena}/miniatura?v={clave_url(buena)}'
+    respuesta = cliente.get(url)
+    verificar(respuesta.status_code == 200 and respuesta.mimetype == 'image/webp', 'la primera petición genera un WebP')
+    verificar('immutable' in respuesta.headers.get('Cache-Control', ''), 'con ?v= la respuesta es inmutable')
+    verificar(Image.open(io.BytesIO(respuesta.data)).size == (640, 384), 'la miniatura mide 640x384')
+    respuesta.close()
+    for _ in range(5):
+        cliente.get(url).close()
+    verificar(pedidos['/imagen.png'] == 1, f'la imagen se descargó una sola vez ({pedidos["/imagen.png"]})')
+
+    tiempos, redirecciones = [], []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(f'/api/torneos/{id_caida}/miniatura')
+        tiempos.append(time.perf_counter() - inicio)
+        redirecciones.append(respuesta.status_code == 302 and respuesta.location == caida)
+    verificar(all(redirecciones), 'una URL caída redirige al original')
+    verificar(pedidos['/no-existe.png'] == 1, f'la URL caída se pidió una sola vez ({pedidos["/no-existe.png"]})')
+    print(f'      URL caída: primera {tiempos[0] * 1000:.1f} ms, siguientes {max(tiempos[1:]) * 1000:.1f} ms como máximo')
+
+    # Otra instancia con su propio descargador: no debe usar la carpeta ni el descargador de la primera
+    descargas = []
+
+    def descargador(url_imagen):
+        descargas.append(url_imagen)
+        return Remoto.png
+
+    otra = create_app({
+        'TESTING': True, 'MINIATURAS_CARPETA': tempfile.mkdtemp(), 'MINIATURAS_DESCARGADOR': descargador,
+        'INSTANTANEAS': False
+    })
+    otra.test_client().get(url).close()
+    verificar(descargas == [buena], 'otra app usa su propio descargador y su propia carpeta')
+    servidor.shutdown()
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
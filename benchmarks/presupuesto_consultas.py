@@ -0,0 +1,109 @@
+"""
+Detector de N+1: recorre los endpoints con CONSULTAS_ESTRICTO activado y falla (código de salida 1)
+si alguno hace más consultas SQL que su presupuesto (PRESUPUESTO_CONSULTAS o @presupuesto_consultas).
+
+También falla si las consultas que registra la app para una petición (la métrica
+tcghub_db_queries_per_request) no coinciden con las que corrieron de verdad: las respuestas en
+streaming (/api/filtrar, /api/torneos, la exportación) hacen la consulta principal mientras se envía
+el cuerpo, después de que Flask arma la respuesta, y tienen que contarse igual.
+
+Se prueba con muchos torneos para que una consulta por fila se note. Pensado para correr en CI:
+
+    python benchmarks/presupuesto_consultas.py [torneos]
+"""
+import os
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'presupuesto.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+import app as modulo_app  # noqa: E402
+from app import Torneo, create_app, db  # noqa: E402
+from _comun import poblar  # noqa: E402
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # Sin instantáneas: su regeneración en segundo plano haría peticiones propias mientras se mide
+    app = create_app({'CONSULTAS_ESTRICTO': True, 'TESTING': True, 'INSTANTANEAS': False})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        modulo_app.sembrar_datos()
+        poblar(cantidad, imagenes=True)
+        # Los de hace más de 10 días pasan a /api/historial
+        modulo_app.archivar_torneos(date.today() - timedelta(days=10))
+        id_torneo = db.session.execute(db.select(Torneo.id).limit(1)).scalar()
+
+    cliente = app.test_client()
+    cliente.post('/admin', json={'username': 'admin', 'password': 'admin123'})
+    torneo = {
+        'nombre_tienda': 'Tienda', 'ubicacion': 'Madrid', 'hora': '10:00', 'fecha': date.today().isoformat(),
+        'tipo_juego': 'Pokemon', 'categoria': 'Junior', 'tipo_torneo': 'League Cup'
+    }
+    peticiones = [
+        ('GET', '/', None),
+        ('GET', '/sobre', None),
+        ('GET', '/admin/panel', None),
+        ('GET', '/api/torneos', None),
+        ('GET', '/api/torneos?limit=50', None),
+        ('GET', f'/api/torneos/{id_torneo}', None),
+        ('GET', '/api/facets', None),
+        ('GET', '/api/filtrar', None),
+        ('GET', '/api/filtrar?filtro-ubicacion=Ciudad 1&limit=100', None),
+        ('GET', '/api/filtrar?upcoming=false&limit=100', None),
+        ('GET', '/api/calendario', None),
+        ('GET', '/api/historial?limit=100', None),
+        ('GET', '/api/torneos/export', None),
+        ('GET', '/admin/popup', None),
+        ('POST', '/api/torneos', torneo),
+        ('PUT', f'/api/torneos/{id_torneo}', torneo),
+        ('DELETE', f'/api/torneos/{id_torneo}', None),
+    ]
+
+    # Conteo independiente de la app: toda consulta que corre en este hilo (el cliente de pruebas atiende
+    # la petición aquí; las instantáneas se regeneran en otro hilo y no cuentan)
+    hilo = threading.get_ident()
+    ejecutadas = [0]
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def contar(*args):
+        if threading.get_ident() == hilo:
+            ejecutadas[0] += 1
+
+    fallas = 0
+    for metodo, url, cuerpo in peticiones:
+        ejecutadas[0] = 0
+        endpoint = app.url_map.bind('localhost').match(url.split('?')[0], method=metodo)[0]
+        peticiones_antes, consultas_antes = modulo_app.metrica_consultas.resumen(endpoint=endpoint)
+        try:
+            respuesta = cliente.open(url, method=metodo, json=cuerpo)
+            respuesta.get_data()
+            respuesta.close()
+        except modulo_app.PresupuestoConsultasExcedido as e:
+            fallas += 1
+            print(f'FALLA {metodo:6} {url}: {e}')
+            continue
+        peticiones_despues, consultas_despues = modulo_app.metrica_consultas.resumen(endpoint=endpoint)
+        registradas = int(consultas_despues - consultas_antes)
+        # La app no manda Server-Timing en las respuestas en streaming (los headers salen antes de medir)
+        tipo = '' if 'Server-Timing' in respuesta.headers else '(streaming)'
+        if peticiones_despues - peticiones_antes != 1 or registradas != ejecutadas[0]:
+            fallas += 1
+            print(f'FALLA {metodo:6} {url:50} {respuesta.status_code} | registró {registradas} consultas de '
+                  f'{ejecutadas[0]} {tipo}')
+            continue
+        print(f'ok    {metodo:6} {url:50} {respuesta.status_code} | {registradas} consultas {tipo}')
+
+    if fallas:
+        print(f'\n{fallas} endpoint(s) superan el presupuesto de consultas o no las registran todas')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
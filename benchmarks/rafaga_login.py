@@ -0,0 +1,133 @@
+"""
+Simula una ola de credential stuffing contra /admin mientras un visitante navega la página pública.
+
+Varios hilos atacantes prueban contraseñas desde muchas IPs (X-Forwarded-For) contra el usuario admin
+y contra usuarios inventados. En paralelo, un hilo mide la latencia de /api/filtrar. Se corre dos veces:
+sin límites (como antes) y con la configuración por defecto. Termina con código 1 si con límites:
+- no se rechazó ningún intento con 429,
+- o se verificaron más contraseñas que las que permiten las cubetas.
+
+La latencia pública se informa pero no se verifica: atacantes y visitante corren en el mismo proceso,
+así que con límites los atacantes (que reciben 429 al instante y vuelven a intentar sin pausa) compiten
+por el GIL con el visitante y el p95 depende de cuántos son y de las CPUs de la máquina, no del servidor.
+
+Uso:
+    python benchmarks/rafaga_login.py [atacantes] [segundos]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'rafaga.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as modulo_app  # noqa: E402
+from app import create_app  # noqa: E402
+
+SIN_LIMITES = {
+    'LOGIN_IP_RAFAGA': 10 ** 9, 'LOGIN_IP_POR_MINUTO': 10 ** 9,
+    'LOGIN_USUARIO_RAFAGA': 10 ** 9, 'LOGIN_USUARIO_POR_MINUTO': 10 ** 9,
+    'LOGIN_HASH_WORKERS': 64, 'LOGIN_HASH_COLA': 10 ** 6,
+}
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000
+
+
+def latencias_publicas(cliente, fin):
+    latencias = []
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        cliente.get('/api/filtrar').get_data()
+        latencias.append(time.perf_counter() - inicio)
+        time.sleep(0.01)
+    return latencias
+
+
+def escenario(config, atacantes, segundos):
+    # Sin instantáneas: /api/filtrar tiene que pasar por Flask y la base, como una búsqueda con filtros
+    app = create_app({'PROXY_SALTOS': 1, 'TESTING': True, 'INSTANTANEAS': False, **config})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        modulo_app.sembrar_datos()
+
+    verificaciones = [0]
+    original = modulo_app.check_password_hash
+
+    def contar(*args):
+        verificaciones[0] += 1
+        return original(*args)
+
+    estados = {}
+    lock = threading.Lock()
+
+    def atacar(numero):
+        cliente = app.test_client()
+        intento = 0
+        while time.perf_counter() < fin:
+            intento += 1
+            usuario = 'admin' if intento % 2 else f'usuario{numero}'
+            respuesta = cliente.post(
+                '/admin', json={'username': usuario, 'password': f'clave{intento}'},
+                headers={'X-Forwarded-For': f'10.0.{numero}.{intento % 4}'}
+            )
+            with lock:
+                estados[respuesta.status_code] = estados.get(respuesta.status_code, 0) + 1
+
+    with mock.patch.object(modulo_app, 'check_password_hash', contar):
+        visitante = app.test_client()
+        # Latencia de referencia, sin ataque
+        base = latencias_publicas(visitante, time.perf_counter() + 2)
+
+        fin = time.perf_counter() + segundos
+        hilos = [threading.Thread(target=atacar, args=(i,)) for i in range(atacantes)]
+        for hilo in hilos:
+            hilo.start()
+        durante = latencias_publicas(visitante, fin)
+        for hilo in hilos:
+            hilo.join()
+
+    return {
+        'base_p95': percentil(base, 0.95),
+        'p50': statistics.median(durante) * 1000,
+        'p95': percentil(durante, 0.95),
+        'estados': estados,
+        'verificaciones': verificaciones[0],
+        'app': app,
+    }
+
+
+def main():
+    atacantes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    resultados = {}
+    for nombre, config in (('sin límites', SIN_LIMITES), ('con límites', {})):
+        r = resultados[nombre] = escenario(config, atacantes, segundos)
+        print(f'{nombre:12} | /api/filtrar sin ataque p95 {r["base_p95"]:6.1f} ms | durante el ataque '
+              f'p50 {r["p50"]:6.1f} ms p95 {r["p95"]:6.1f} ms | hashes {r["verificaciones"]:4} | '
+              f'respuestas {dict(sorted(r["estados"].items()))}')
+
+    r = resultados['con límites']
+    config = r['app'].config
+    # Con 4 IPs por atacante, el máximo de hashes es la ráfaga más lo recuperado por IP durante la prueba
+    ips = atacantes * 4
+    maximo = ips * (config['LOGIN_IP_RAFAGA'] + config['LOGIN_IP_POR_MINUTO'] * (segundos + 4) / 60)
+    errores = []
+    if not r['estados'].get(429):
+        errores.append('ningún intento fue rechazado con 429')
+    if r['verificaciones'] > maximo:
+        errores.append(f'se verificaron {r["verificaciones"]} contraseñas (máximo esperado {maximo:.0f})')
+    for error in errores:
+        print('FALLA:', error)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark del render de la grid de /api/filtrar.
+
+Compara el render anterior (concatenación de f-strings por fila) con el render
+actual (macro precompilada + cache de tarjetas + ''.join) para 10k y 100k torneos.
+
+Uso:
+    python benchmarks/render_tarjetas.py [cantidad ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Base de datos temporal para no tocar torneos.db al importar la app
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Torneo, app, renderizar_tarjeta  # noqa: E402
+
+
+def crear_torneos(cantidad):
+    """Crea torneos en memoria (sin base de datos), mitad pasados y mitad próximos"""
+    base = datetime.now() - timedelta(days=cantidad // 2)
+    juegos = ['Pokemon', 'One Piece', 'Yu-Gi-Oh', 'Magic', 'Digimon']
+    return [
+        Torneo(
+            id=i,
+            nombre_tienda=f'Tienda {i}',
+            ubicacion=f'Ciudad {i % 50}',
+            hora='18:00',
+            fecha=(base + timedelta(days=i % cantidad)).strftime('%Y-%m-%d'),
+            premio='Booster Box',
+            tipo_juego=juegos[i % len(juegos)],
+            categoria='Master',
+            tipo_torneo='League Cup',
+            imagen=None if i % 2 else f'https://example.com/{i}.jpg'
+        )
+        for i in range(cantidad)
+    ]
+
+
+def render_antes(torneos):
+    """Copia del render original de filtrar(): f-strings concatenadas con +="""
+    html = ''
+    for torneo in torneos:
+        fecha_obj = datetime.strptime(str(torneo.fecha), '%Y-%m-%d')
+        hoy = datetime.now()
+        es_proximo = fecha_obj.date() >= hoy.date()
+        badge_color = 'bg-red-500' if es_proximo else 'bg-gray-400'
+        badge_text = 'PROX' if es_proximo else 'PAST'
+        juego_colors = {
+            'Pokemon': 'from-yellow-400 to-orange-500',
+            'One Piece': 'from-blue-400 to-cyan-500',
+            'Yu-Gi-Oh': 'from-purple-500 to-pink-500',
+            'Magic': 'from-red-500 to-orange-600'
+        }
+        gradient = juego_colors.get(torneo.tipo_juego, 'from-gray-400 to-gray-600')
+        fecha_formato = fecha_obj.strftime('%d %b')
+        boton = f'<button onclick="abrirFormulario({torneo.id})" class="w-full bg-blue-600 hover:bg-blue-700 text-white py-2 rounded-lg font-semibold transition-colors">Ver Detalles</button>'
+        if torneo.imagen:
+            imagen_html = f'<img src="{torneo.imagen}" alt="{torneo.nombre_tienda}" class="w-full h-48 object-cover">'
+        else:
+            imagen_html = f'''<div class="h-48 bg-gradient-to-br {gradient} flex items-center justify-center relative overflow-hidden">
+                    <div class="absolute inset-0 bg-black opacity-0 group-hover:opacity-10 transition-opacity"></div>
+                    <svg class="w-24 h-24 text-white opacity-80" fill="currentColor" viewBox="0 0 20 20">
+                        <path d="M10 2a8 8 0 100 16 8 8 0 000-16zM7 9H5V7h2v2zm4 0H9V7h2v2zm4 0h-2V7h2v2z"/>
+                    </svg>
+                </div>'''
+        html += f'''<div class="bg-white rounded-xl shadow-lg hover:shadow-2xl transition-all duration-300 overflow-hidden group hover:-translate-y-2">
+            <div class="relative">
+                <div class="absolute top-3 left-3 z-10 {badge_color} text-white text-xs font-bold px-3 py-1 rounded-full">
+                    {badge_text}
+                </div>
+                {imagen_html}
+            </div>
+            <div class="p-4">
+                <h3 class="text-lg font-bold text-gray-800 mb-2">{torneo.nombre_tienda}</h3>
+                <div class="space-y-2 text-sm text-gray-600 mb-3">
+                    <div class="flex items-center gap-2">
+                        <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M17.657 16.657L13.414 20.9a1.998 1.998 0 01-2.827 0l-4.244-4.243a8 8 0 1111.314 0z"/>
+                        </svg>
+                        <span>{torneo.ubicacion}</span>
+                    </div>
+                    <div class="flex items-center gap-2">
+                        <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"/>
+                        </svg>
+                        <span>{fecha_formato} - {torneo.hora}</span>
+                    </div>
+                </div>
+                <div class="flex flex-wrap gap-2 mb-3">
+                    <span class="px-2 py-1 bg-orange-100 text-orange-700 text-xs font-semibold rounded">{torneo.tipo_torneo}</span>
+                    <span class="px-2 py-1 bg-blue-100 text-blue-700 text-xs font-semibold rounded">{torneo.categoria}</span>
+                </div>
+                {boton}
+            </div>
+        </div>'''
+    return html
+
+
+def render_despues(torneos):
+    """Render actual: una tarjeta cacheada por torneo y un solo join"""
+    hoy = datetime.now().date()
+    return ''.join(renderizar_tarjeta(torneo, hoy) for torneo in torneos)
+
+
+def medir(funcion, torneos):
+    inicio = time.perf_counter()
+    html = funcion(torneos)
+    return time.perf_counter() - inicio, len(html)
+
+
+def main():
+    cantidades = [int(c) for c in sys.argv[1:]] or [10_000, 100_000]
+    # Contexto de petición: las tarjetas con imagen arman la URL de su miniatura con url_for
+    with app.test_request_context():
+        for cantidad in cantidades:
+            torneos = crear_torneos(cantidad)
+            app.config['CACHE_TARJETAS_MAX'] = cantidad
+            app.extensions['tarjetas'].cache.clear()
+
+            t_antes, bytes_antes = medir(render_antes, torneos)
+            t_frio, bytes_despues = medir(render_despues, torneos)
+            t_caliente, _ = medir(render_despues, torneos)
+
+            print(f'{cantidad:>7} torneos | antes: {t_antes * 1000:9.1f} ms ({bytes_antes / 1e6:.1f} MB)'
+                  f' | después (cache fría): {t_frio * 1000:9.1f} ms'
+                  f' | después (cache caliente): {t_caliente * 1000:9.1f} ms ({bytes_despues / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
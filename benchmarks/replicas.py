@@ -0,0 +1,94 @@
+"""
+Prueba local de DATABASE_REPLICA_URLS con dos archivos SQLite: uno hace de primaria y otro de réplica.
+
+No hay replicación entre ellos, así que cada uno tiene un torneo distinto y se verifica de dónde sale cada
+respuesta:
+- un visitante anónimo lee /api/torneos de la réplica,
+- un torneo creado por el admin queda en la primaria (y no en la réplica),
+- el admin que acaba de guardar ve su torneo (lee de la primaria gracias a la cookie leer_primaria),
+- pasados REPLICA_RETRASO_MAX segundos, el admin vuelve a leer de la réplica.
+
+Termina con código 1 si alguna verificación falla. Con PostgreSQL se puede hacer lo mismo exportando
+DATABASE_URL y DATABASE_REPLICA_URLS antes de correrlo (la réplica debe aceptar escrituras para poblarla).
+
+Uso:
+    python benchmarks/replicas.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+carpeta = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(carpeta, 'primaria.db'))
+os.environ.setdefault('DATABASE_REPLICA_URLS', 'sqlite:///' + os.path.join(carpeta, 'replica.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+import app as modulo_app  # noqa: E402
+from app import Torneo, create_app, db  # noqa: E402
+
+RETRASO = 5
+
+
+def torneo(nombre):
+    return {
+        'nombre_tienda': nombre, 'ubicacion': 'Santiago', 'hora': '18:00',
+        'fecha': (date.today() + timedelta(days=7)).isoformat(), 'premio': 'Booster Box',
+        'tipo_juego': 'Pokemon', 'categoria': 'Master', 'tipo_torneo': 'League Cup'
+    }
+
+
+def tiendas(cliente):
+    return {t['nombre_tienda'] for t in cliente.get('/api/torneos?upcoming=false').get_json()}
+
+
+def tiendas_en(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(select(Torneo.nombre_tienda)).scalars())
+
+
+def main():
+    app = create_app({'TESTING': True, 'REPLICA_RETRASO_MAX': RETRASO})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        replica = db.engines[app.extensions['replicas'][0]]
+        db.metadata.create_all(replica)
+        with replica.begin() as conn:
+            fila = torneo('Tienda Réplica')
+            conn.execute(insert(Torneo), {
+                **fila, 'hora': time(18), 'fecha': date.fromisoformat(fila['fecha'])
+            })
+
+    errores = []
+
+    def verificar(condicion, mensaje):
+        print(('ok    ' if condicion else 'FALLA ') + mensaje)
+        if not condicion:
+            errores.append(mensaje)
+
+    anonimo = app.test_client()
+    verificar(tiendas(anonimo) == {'Tienda Réplica'}, 'el visitante anónimo lee de la réplica')
+
+    admin = app.test_client()
+    admin.post('/admin', json={'username': 'admin', 'password': 'admin123'})
+    respuesta = admin.post('/api/torneos', json=torneo('Tienda Primaria'))
+    verificar(respuesta.status_code == 201, 'el admin crea un torneo')
+    with app.app_context():
+        verificar('Tienda Primaria' in tiendas_en(db.engine), 'el torneo queda en la primaria')
+        verificar('Tienda Primaria' not in tiendas_en(replica), 'el torneo no se escribe en la réplica')
+
+    verificar('Tienda Primaria' in tiendas(admin), 'el admin que acaba de guardar lee de la primaria')
+    verificar(tiendas(anonimo) == {'Tienda Réplica'}, 'el visitante anónimo sigue leyendo de la réplica')
+
+    cookie = admin.get_cookie(modulo_app.COOKIE_LEER_PRIMARIA)
+    verificar(cookie is not None and cookie.max_age == RETRASO, f'la cookie leer_primaria dura {RETRASO} s')
+    # El cliente de pruebas no vence las cookies: se borra como lo haría el navegador al expirar
+    admin.delete_cookie(modulo_app.COOKIE_LEER_PRIMARIA)
+    verificar(tiendas(admin) == {'Tienda Réplica'}, f'pasados {RETRASO} s el admin vuelve a leer de la réplica')
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compara la serialización de la lista de torneos de /api/torneos:
+
+- orm:  Torneo.query...all() + jsonify([torneo.to_dict()])   (cómo era antes)
+- core: select(*COLUMNAS_TORNEO) con leer_torneos + fila_a_dict + respuesta_json (orjson si está instalado)
+
+Mide con 1.000, 10.000 y 100.000 torneos (la mediana de varias repeticiones) y verifica que ambos
+caminos produzcan el mismo JSON; si no, termina con código 1.
+
+Uso:
+    python benchmarks/serializacion_api.py [cantidades separadas por coma]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'serializacion.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402
+
+import app as modulo_app  # noqa: E402
+from app import COLUMNAS_TORNEO, Torneo, create_app, db, fila_a_dict, leer_torneos, respuesta_json  # noqa: E402
+from _comun import poblar  # noqa: E402
+
+
+def camino_orm(cantidad):
+    torneos = Torneo.query.order_by(Torneo.fecha.asc(), Torneo.id.asc()).limit(cantidad).all()
+    return jsonify([torneo.to_dict() for torneo in torneos])
+
+
+def camino_core(cantidad):
+    filas = leer_torneos(
+        db.select(*COLUMNAS_TORNEO).order_by(Torneo.fecha.asc(), Torneo.id.asc()).limit(cantidad)
+    )
+    return respuesta_json([fila_a_dict(fila) for fila in filas])
+
+
+def medir(funcion, cantidad, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        # Sesión nueva en cada repetición: el ORM no reutiliza objetos ya cargados
+        db.session.remove()
+        inicio = time.perf_counter()
+        funcion(cantidad).get_data()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    cantidades = [int(c) for c in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1000, 10000, 100000]
+    app = create_app({'TESTING': True})
+    with app.app_context():
+        modulo_app.inicializar_db()
+        db.session.execute(db.delete(Torneo))
+        poblar(max(cantidades), desde=0, dias=365, imagenes=True)
+
+    print(f'encoder: {"orjson" if modulo_app.orjson else "json (sin orjson)"}')
+    errores = 0
+    with app.test_request_context():
+        for cantidad in cantidades:
+            if camino_orm(cantidad).get_json() != camino_core(cantidad).get_json():
+                print(f'FALLA: con {cantidad} torneos los dos caminos no producen el mismo JSON')
+                errores += 1
+                continue
+            repeticiones = 3 if cantidad >= 100000 else 7
+            orm = medir(camino_orm, cantidad, repeticiones)
+            core = medir(camino_core, cantidad, repeticiones)
+            print(f'{cantidad:7} torneos | orm {orm:8.1f} ms | core {core:8.1f} ms | {orm / core:4.1f}x')
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
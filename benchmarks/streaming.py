@@ -0,0 +1,79 @@
+"""
+Tiempo al primer byte y memoria máxima de las respuestas en streaming, con tablas de distinto tamaño.
+
+Para cada cantidad de torneos pide la lista completa de /api/torneos y una página de /api/filtrar,
+con y sin gzip, y mide:
+- el tiempo hasta recibir el primer trozo de la respuesta,
+- el pico de memoria asignada mientras se consume (tracemalloc), sin contar el cuerpo recibido.
+
+Termina con código 1 si el primer byte o el pico de memoria de la lista completa crecen más de 3 veces
+entre la cantidad más chica y la más grande (deberían quedar casi iguales).
+
+Uso:
+    python benchmarks/streaming.py [cantidades separadas por coma]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'streaming.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as modulo_app  # noqa: E402
+from app import create_app  # noqa: E402
+from _comun import poblar  # noqa: E402
+
+
+def medir(cliente, url, encoding):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    respuesta = cliente.get(url, headers={'Accept-Encoding': encoding}, buffered=False)
+    trozos = iter(respuesta.response)
+    recibido = len(next(trozos))
+    primer_byte = time.perf_counter() - inicio
+    for trozo in trozos:
+        # Solo se cuenta el tamaño: el cuerpo no se guarda, así el pico es el del servidor
+        recibido += len(trozo)
+    total = time.perf_counter() - inicio
+    respuesta.close()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return primer_byte * 1000, total * 1000, pico / 1024 / 1024, recibido / 1024
+
+
+def main():
+    cantidades = [int(c) for c in sys.argv[1].split(',')] if len(sys.argv) > 1 else [10000, 100000]
+    # Sin instantáneas: /api/torneos sin parámetros se respondería desde el archivo, no en streaming
+    app = create_app({'TESTING': True, 'INSTANTANEAS': False})
+    with app.app_context():
+        modulo_app.inicializar_db()
+
+    resultados = {}
+    for cantidad in cantidades:
+        with app.app_context():
+            poblar(cantidad, reemplazar=True, desde=0, dias=365)
+        cliente = app.test_client()
+        for url in ('/api/torneos', '/api/filtrar?upcoming=false&limit=200'):
+            for encoding in ('identity', 'gzip'):
+                medir(cliente, url, encoding)  # calentar caches de tarjetas
+                primer_byte, total, pico, recibido = resultados[cantidad, url, encoding] = medir(cliente, url, encoding)
+                print(f'{cantidad:7} torneos | {url:38} {encoding:8} | primer byte {primer_byte:7.1f} ms | '
+                      f'total {total:8.1f} ms | pico {pico:6.1f} MB | {recibido:8.0f} KB')
+
+    errores = []
+    chica, grande = min(cantidades), max(cantidades)
+    for encoding in ('identity', 'gzip'):
+        a, b = resultados[chica, '/api/torneos', encoding], resultados[grande, '/api/torneos', encoding]
+        if b[0] > 3 * max(a[0], 5):
+            errores.append(f'/api/torneos ({encoding}): el primer byte pasa de {a[0]:.1f} a {b[0]:.1f} ms')
+        if b[2] > 3 * max(a[2], 1):
+            errores.append(f'/api/torneos ({encoding}): el pico de memoria pasa de {a[2]:.1f} a {b[2]:.1f} MB')
+    for error in errores:
+        print('FALLA:', error)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
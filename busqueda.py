@@ -0,0 +1,238 @@
+"""
+Búsqueda de torneos por texto (nombre de tienda, ubicación, tipo de torneo y premio).
+
+En PostgreSQL la búsqueda la hace la base (tsvector + pg_trgm, ver app.py). Para SQLite y desarrollo
+este módulo arma un índice invertido en memoria con coincidencia exacta, por prefijo (typeahead)
+y aproximada por trigramas (errores de tipeo).
+
+Los torneos con el mismo texto (la misma tienda con el mismo premio cada semana) comparten un
+solo documento en el índice, así el tamaño depende de los textos distintos y no de las filas.
+A igual puntaje se respeta el orden de las filas con que se construyó el índice.
+
+Construirlo recorre toda la tabla (unos segundos con 100k torneos), así que IndiceVigente lo reconstruye
+en un hilo aparte cuando cambian los torneos y mientras tanto las búsquedas usan el anterior.
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from operator import itemgetter
+
+# Peso de cada campo en el puntaje
+CAMPOS = (('nombre_tienda', 3.0), ('ubicacion', 2.0), ('tipo_torneo', 1.5), ('premio', 1.0))
+
+FACTOR_PREFIJO = 0.8
+FACTOR_APROXIMADO = 0.6
+SIMILITUD_MINIMA = 0.3
+MAX_EXPANSIONES = 50
+MAX_TERMINOS = 8
+# Máscaras de bits en memoria (cada una ocupa documentos / 8 bytes)
+MAX_MASCARAS = 2048
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y sin signos: 'Pokémon World!' -> 'pokemon world'"""
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def terminos(texto):
+    return normalizar(texto).split()[:MAX_TERMINOS]
+
+
+def trigramas(palabra):
+    palabra = f'^{palabra}$'
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido en memoria. `filas` son tuplas (id, nombre_tienda, ubicacion, tipo_torneo, premio).
+
+    Cada palabra guarda sus documentos por peso de campo. Al buscar, esas listas se convierten en
+    máscaras de bits (un int de Python con un bit por documento): intersectar términos o agrupar
+    documentos por puntaje es un AND/OR entre ints, sin recorrer los documentos uno a uno.
+    """
+
+    def __init__(self, filas):
+        self._ids = []          # documento -> [ids de torneo]
+        self._palabras = {}     # palabra -> {peso: [documentos]}
+        documentos = {}
+        for fila in filas:
+            clave = tuple(fila[1:])
+            documento = documentos.get(clave)
+            if documento is None:
+                documento = documentos[clave] = len(self._ids)
+                self._ids.append([])
+                mejores = {}
+                for (_, peso), texto in zip(CAMPOS, clave):
+                    for palabra in normalizar(texto).split():
+                        mejores[palabra] = max(peso, mejores.get(palabra, 0))
+                for palabra, peso in mejores.items():
+                    self._palabras.setdefault(palabra, {}).setdefault(peso, []).append(documento)
+            self._ids[documento].append(fila[0])
+
+        self._vocabulario = sorted(self._palabras)
+        self._trigramas = {}
+        for palabra in self._vocabulario:
+            for trigrama in trigramas(palabra):
+                self._trigramas.setdefault(trigrama, []).append(palabra)
+        self._mascaras = {}
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._ids)
+
+    def buscar(self, consulta, limite=20):
+        """
+        Retorna [(id, puntaje)] ordenado por puntaje. Todos los términos deben coincidir.
+        A igual puntaje van primero los documentos que entraron antes al índice.
+        """
+        niveles = [self._niveles(termino) for termino in terminos(consulta)]
+        if not niveles or not all(niveles):
+            return []
+
+        # Puntaje total -> máscara de los documentos con ese total (cada documento queda en uno solo)
+        totales = {0: (1 << len(self._ids)) - 1}
+        for niveles_termino in niveles:
+            siguientes = {}
+            for total, mascara in totales.items():
+                for puntaje, mascara_nivel in niveles_termino:
+                    comunes = mascara & mascara_nivel
+                    if comunes:
+                        clave = round(total + puntaje, 3)
+                        siguientes[clave] = siguientes.get(clave, 0) | comunes
+            totales = siguientes
+            if not totales:
+                return []
+
+        resultado = []
+        for total in sorted(totales, reverse=True):
+            mascara = totales[total]
+            while mascara:
+                bit = mascara & -mascara
+                mascara ^= bit
+                for id_torneo in self._ids[bit.bit_length() - 1]:
+                    resultado.append((id_torneo, total))
+                    if len(resultado) >= limite:
+                        return resultado
+        return resultado
+
+    def _niveles(self, termino):
+        """
+        [(puntaje, máscara)] de un término, de mayor a menor puntaje y sin documentos repetidos:
+        cada documento queda con el mejor puntaje entre sus palabras que coinciden.
+        """
+        por_puntaje = {}
+        for palabra, factor in self._expandir(termino):
+            for peso in self._palabras[palabra]:
+                puntaje = round(peso * factor, 2)
+                por_puntaje[puntaje] = por_puntaje.get(puntaje, 0) | self._mascara(palabra, peso)
+
+        niveles = []
+        cubiertos = 0
+        for puntaje in sorted(por_puntaje, reverse=True):
+            mascara = por_puntaje[puntaje] & ~cubiertos
+            if mascara:
+                niveles.append((puntaje, mascara))
+                cubiertos |= mascara
+        return niveles
+
+    def _mascara(self, palabra, peso):
+        """Máscara de bits de los documentos de `palabra` con `peso` (se arma la primera vez que se pide)"""
+        clave = (palabra, peso)
+        mascara = self._mascaras.get(clave)
+        if mascara is None:
+            bits = bytearray((len(self._ids) + 7) // 8)
+            for documento in self._palabras[palabra][peso]:
+                bits[documento >> 3] |= 1 << (documento & 7)
+            mascara = int.from_bytes(bits, 'little')
+            if len(self._mascaras) >= MAX_MASCARAS:
+                self._mascaras.clear()
+            self._mascaras[clave] = mascara
+        return mascara
+
+    def _expandir(self, termino):
+        """[(palabra, factor)] del vocabulario que coinciden con un término: exacta, por prefijo y aproximadas"""
+        palabras = []
+        if termino in self._palabras:
+            palabras.append((termino, 1.0))
+
+        inicio = bisect_left(self._vocabulario, termino)
+        for palabra in self._vocabulario[inicio:inicio + MAX_EXPANSIONES]:
+            if not palabra.startswith(termino):
+                break
+            if palabra != termino:
+                palabras.append((palabra, FACTOR_PREFIJO))
+
+        if len(termino) >= 4:
+            for palabra, similitud in self._parecidas(termino):
+                if not palabra.startswith(termino):
+                    # Similitud en pasos de 0.05: menos niveles distintos de puntaje que combinar
+                    palabras.append((palabra, FACTOR_APROXIMADO * round(similitud * 20) / 20))
+        return palabras
+
+    def _parecidas(self, termino):
+        """Palabras del vocabulario con similitud de trigramas (Jaccard) >= SIMILITUD_MINIMA"""
+        propios = trigramas(termino)
+        compartidos = {}
+        for trigrama in propios:
+            for palabra in self._trigramas.get(trigrama, ()):
+                compartidos[palabra] = compartidos.get(palabra, 0) + 1
+        parecidas = []
+        for palabra, comunes in compartidos.items():
+            # Una palabra de n letras tiene n trigramas (con los bordes ^ y $)
+            similitud = comunes / (len(propios) + len(palabra) - comunes)
+            if similitud >= SIMILITUD_MINIMA:
+                parecidas.append((palabra, similitud))
+        return heapq.nlargest(MAX_EXPANSIONES, parecidas, key=itemgetter(1))
+
+
+class IndiceVigente:
+    """
+    El último IndiceBusqueda construido y la versión de los torneos con que se construyó.
+    `construir()` y `obtener()` retornan (versión, IndiceBusqueda); la versión se lee antes que las filas.
+
+    Si la versión pedida es otra, se reconstruye en un hilo aparte y se sigue respondiendo con el
+    índice anterior hasta que el nuevo lo reemplaza de una vez: ninguna búsqueda espera la
+    reconstrucción, salvo la primera de cada worker, que no tiene índice anterior.
+    Mientras tanto puede traer ids ya borrados (quien busca los descarta al leer los torneos)
+    o no encontrar los torneos recién creados.
+    """
+
+    def __init__(self, construir, al_fallar=None):
+        self.construir = construir
+        self.al_fallar = al_fallar
+        self._vigente = (None, None)
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def obtener(self, version):
+        vigente = self._vigente
+        if vigente[0] == version:
+            return vigente
+        if vigente[1] is None:
+            with self._lock:
+                if self._vigente[1] is None:
+                    self._vigente = self.construir()
+                return self._vigente
+        self._programar()
+        return vigente
+
+    def _programar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name='indice-busqueda', daemon=True)
+                self._hilo.start()
+
+    def _trabajar(self):
+        try:
+            self._vigente = self.construir()
+        except Exception as e:
+            if self.al_fallar:
+                self.al_fallar(e)
+        finally:
+            with self._lock:
+                self._hilo = None
@@ -0,0 +1,88 @@
+"""
+Difusión de cambios a las conexiones abiertas de /api/cambios (server-sent events).
+
+Los cambios se registran en una tabla con id autoincremental (la secuencia), así que cualquier worker
+de gunicorn ve los de los demás. En cada worker un solo hilo consulta esa secuencia cada `intervalo`
+segundos mientras haya alguien escuchando, guarda los últimos cambios en memoria y despierta a todas
+las conexiones a la vez: la base recibe una consulta por intervalo y por worker, no una por navegador.
+"""
+import threading
+import time
+from collections import deque
+
+
+class FeedCambios:
+    """
+    `leer(ultimo)` retorna [(id, dato)] con id > ultimo, en orden; `leer(None)` retorna el id del último
+    cambio existente (el punto de partida). Ambas se llaman desde el hilo del feed.
+    """
+
+    def __init__(self, leer, intervalo=1.0, historial=1000, al_fallar=None):
+        self.leer = leer
+        self.intervalo = intervalo
+        self.al_fallar = al_fallar
+        self._cambios = deque(maxlen=historial)
+        self._ultimo = None
+        self._disponible_desde = None   # se pueden responder consultas con desde >= este id
+        self._escuchando = 0
+        self._condicion = threading.Condition()
+        self._hilo = None
+
+    def esperar(self, desde, timeout):
+        """
+        Espera hasta `timeout` segundos a que haya cambios posteriores a `desde`.
+        Retorna (cambios, ultimo). cambios es None si `desde` es más antiguo que lo que hay en memoria
+        (el cliente debe recargar todo y seguir desde `ultimo`).
+        """
+        with self._condicion:
+            self._iniciar()
+            self._escuchando += 1
+            self._condicion.notify_all()
+            try:
+                self._condicion.wait_for(
+                    lambda: self._ultimo is not None and (desde is None or self._ultimo > desde), timeout
+                )
+                if self._ultimo is None:
+                    return [], desde
+                if desde is None or desde > self._ultimo:
+                    # Sin posición conocida (o de otra base): se sigue desde el último cambio
+                    return [], self._ultimo
+                if desde < self._disponible_desde:
+                    return None, self._ultimo
+                return [cambio for cambio in self._cambios if cambio[0] > desde], self._ultimo
+            finally:
+                self._escuchando -= 1
+
+    def _iniciar(self):
+        # El hilo se crea con el primer suscriptor: así nace en el worker y no en el master de gunicorn
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._consultar, name='feed-cambios', daemon=True)
+            self._hilo.start()
+
+    def _consultar(self):
+        while True:
+            with self._condicion:
+                self._condicion.wait_for(lambda: self._escuchando > 0)
+                ultimo = self._ultimo
+            try:
+                if ultimo is None:
+                    inicial = self.leer(None) or 0
+                    nuevos = []
+                else:
+                    nuevos = self.leer(ultimo)
+            except Exception as e:
+                if self.al_fallar:
+                    self.al_fallar(e)
+                time.sleep(self.intervalo)
+                continue
+
+            with self._condicion:
+                if ultimo is None:
+                    self._ultimo = self._disponible_desde = inicial
+                for cambio in nuevos:
+                    if len(self._cambios) == self._cambios.maxlen:
+                        self._disponible_desde = self._cambios[0][0]
+                    self._cambios.append(cambio)
+                    self._ultimo = cambio[0]
+                self._condicion.notify_all()
+            time.sleep(self.intervalo)
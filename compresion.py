@@ -0,0 +1,77 @@
+"""
+Compresión al vuelo (gzip o brotli) de las respuestas dinámicas, según Accept-Encoding.
+
+Funciona también con respuestas en streaming: cada trozo se comprime y se vacía el compresor
+cada COMPRIMIR_CADA bytes de entrada, así el navegador recibe (y puede mostrar) lo primero
+sin esperar a que termine la respuesta, y la memoria no depende del tamaño total.
+"""
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se usa gzip
+    brotli = None
+
+# Tipos de contenido que se comprimen
+TIPOS = {'text/html', 'text/plain', 'text/csv', 'application/json', 'application/x-ndjson', 'image/svg+xml'}
+# Respuestas más chicas no se comprimen: el encabezado gzip no compensa
+TAMANO_MINIMO = 500
+# Entrada acumulada antes de vaciar el compresor en una respuesta en streaming
+COMPRIMIR_CADA = 16 * 1024
+
+
+def elegir_codificacion(accept_encoding):
+    """'br', 'gzip' o None según lo que acepta el cliente (se prefiere brotli si está disponible)"""
+    aceptadas = parse_accept_header(accept_encoding)
+    if brotli is not None and aceptadas['br'] > 0:
+        return 'br'
+    if aceptadas['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+class _Compresor:
+    def __init__(self, codificacion):
+        if codificacion == 'br':
+            # Calidad media: la 11 es demasiado lenta para comprimir en cada petición
+            self._brotli = brotli.Compressor(quality=5)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def comprimir(self, datos):
+        return self._brotli.process(datos) if self._brotli else self._zlib.compress(datos)
+
+    def vaciar(self):
+        """Lo comprimido hasta ahora, sin cerrar el flujo"""
+        return self._brotli.flush() if self._brotli else self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self._brotli.finish() if self._brotli else self._zlib.flush()
+
+
+def comprimir(datos, codificacion):
+    """Comprime una respuesta completa"""
+    compresor = _Compresor(codificacion)
+    return compresor.comprimir(datos) + compresor.terminar()
+
+
+def comprimir_flujo(trozos, codificacion):
+    """Comprime un iterable de bytes a medida que se genera"""
+    compresor = _Compresor(codificacion)
+    pendiente = 0
+    primero = True
+    for trozo in trozos:
+        salida = compresor.comprimir(trozo)
+        pendiente += len(trozo)
+        # El primer trozo se envía de inmediato (tiempo al primer byte); después, cada COMPRIMIR_CADA
+        if primero or pendiente >= COMPRIMIR_CADA:
+            salida += compresor.vaciar()
+            pendiente = 0
+            primero = False
+        if salida:
+            yield salida
+    yield compresor.terminar()
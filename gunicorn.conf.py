@@ -0,0 +1,125 @@
+"""
+Configuración de gunicorn (se carga sola al correr `gunicorn app:app` desde esta carpeta).
+
+Por defecto usa workers gthread: cada proceso atiende varias peticiones a la vez en hilos,
+así una consulta lenta a PostgreSQL o una subida grande no bloquean al worker completo.
+Con GUNICORN_WORKER_CLASS=gevent usa greenlets (requiere `pip install gevent psycogreen`).
+
+Todo se puede ajustar con variables de entorno:
+    GUNICORN_WORKERS / WEB_CONCURRENCY   procesos (por defecto 2 x CPUs + 1, máximo 8)
+    GUNICORN_THREADS                     hilos por proceso en gthread (por defecto 2 x CPUs, mínimo 4)
+    GUNICORN_WORKER_CLASS                gthread (por defecto), gevent o sync
+    GUNICORN_TIMEOUT                     segundos antes de reiniciar un worker colgado (30)
+    DB_CONEXIONES_MAX                    conexiones a la base que puede abrir esta instancia (50)
+    CAMBIOS_MAX_CONEXIONES               conexiones de /api/cambios por worker (gthread: como máximo threads // 4)
+
+Las CPUs son las que el contenedor puede usar (afinidad y cuota del cgroup), no las del host: en un
+contenedor de 1 CPU en una máquina de 16, os.cpu_count() diría 16 y arrancaría 8 workers.
+Sin GUNICORN_WORKERS, los workers se limitan además para que workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+no pase de DB_CONEXIONES_MAX; si se fija a mano por encima, se avisa en el log al arrancar.
+
+Cada conexión de /api/cambios (server-sent events) ocupa un hilo de gthread durante CAMBIOS_DURACION,
+así que se permite como máximo un cuarto de los hilos de cada worker: con 4 hilos, una conexión, y las
+visitas conservan los otros tres. Con menos de 4 hilos (o sync) no se abren y el navegador consulta cada
+CAMBIOS_REINTENTO segundos. Con gevent no ocupan hilos y no se limitan aquí.
+"""
+import os
+
+
+def cpus_disponibles():
+    """CPUs que este proceso puede usar: afinidad del scheduler y, si hay, la cuota de CPU del cgroup v2"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS no tiene sched_getaffinity
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            cuota, periodo = f.read().split()
+        if cuota != 'max':
+            cpus = min(cpus, max(1, int(cuota) // int(periodo)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+cpus = cpus_disponibles()
+
+# Conexiones que abre cada worker como máximo (una por pool: la primaria y cada réplica tienen el suyo,
+# pero cada pool va a un servidor distinto). Con PgBouncer no hay pool propio y el límite lo pone PgBouncer
+conexiones_max = int(os.environ.get('DB_CONEXIONES_MAX', 50))
+if os.environ.get('PGBOUNCER') == '1':
+    conexiones_por_worker = None
+else:
+    conexiones_por_worker = int(os.environ.get('DB_POOL_SIZE', 5)) + int(os.environ.get('DB_MAX_OVERFLOW', 5))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers_fijos = os.environ.get('GUNICORN_WORKERS') or os.environ.get('WEB_CONCURRENCY')
+if workers_fijos:
+    workers = int(workers_fijos)
+else:
+    workers = min(2 * cpus + 1, 8)
+    if conexiones_por_worker:
+        workers = max(1, min(workers, conexiones_max // conexiones_por_worker))
+threads = int(os.environ.get('GUNICORN_THREADS', max(2 * cpus, 4))) if worker_class == 'gthread' else 1
+# Conexiones simultáneas por worker gevent
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+
+# La app lee CAMBIOS_MAX_CONEXIONES del entorno al crearse (en el maestro con preload_app, o en cada worker)
+if worker_class != 'gevent':
+    cambios_max = threads // 4
+    os.environ['CAMBIOS_MAX_CONEXIONES'] = str(min(int(os.environ.get('CAMBIOS_MAX_CONEXIONES', cambios_max)), cambios_max))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+# Render (y la mayoría de los proxies) reutiliza conexiones hasta ~60s; mantenerlas abiertas ahorra handshakes
+keepalive = 5
+
+# Reiniciar cada worker de vez en cuando limita el crecimiento de memoria (caches, fragmentación)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# Importar app.py una vez en el proceso maestro: los workers comparten esa memoria y arrancan más rápido.
+# Es seguro porque importar la aplicación no abre conexiones a la base de datos (ver post_fork).
+# Con gevent no: el monkey-patching tiene que ocurrir antes de importar la aplicación
+preload_app = worker_class != 'gevent'
+
+# El heartbeat de los workers en memoria en lugar de disco (en contenedores /tmp puede ser lento)
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')  # '-' para stdout
+errorlog = '-'
+
+
+def on_starting(server):
+    conexiones = workers * conexiones_por_worker if conexiones_por_worker else None
+    server.log.info('%d CPUs disponibles: %d workers x %d hilos (%s conexiones de /api/cambios por worker)',
+                    cpus, workers, threads, os.environ.get('CAMBIOS_MAX_CONEXIONES', 'sin límite de'))
+    if conexiones and conexiones > conexiones_max:
+        server.log.warning(
+            '%d workers x %d conexiones (DB_POOL_SIZE + DB_MAX_OVERFLOW) = %d, más que DB_CONEXIONES_MAX (%d): '
+            'baja GUNICORN_WORKERS o el pool, o PostgreSQL rechazará conexiones en los picos',
+            workers, conexiones_por_worker, conexiones, conexiones_max
+        )
+
+
+def post_fork(server, worker):
+    """
+    Cada worker necesita su propio pool de conexiones: las conexiones abiertas en el maestro
+    antes del fork no se pueden compartir entre procesos.
+    La sesión de Flask-SQLAlchemy ya es una por contexto de aplicación (una por hilo o greenlet),
+    así que solo hay que descartar los pools heredados.
+    """
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()  # psycopg2 cede el control al esperar la base en vez de bloquear el proceso
+        except ImportError:
+            server.log.warning('psycogreen no está instalado: las consultas a PostgreSQL bloquearán el worker gevent')
+
+    from app import app, db
+    with app.app_context():
+        # La primaria y, si hay DATABASE_REPLICA_URLS, cada réplica
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,160 @@
+"""
+Procesamiento de las imágenes subidas desde el panel (logo y popup).
+
+La imagen se decodifica una sola vez al subirla: el original se guarda con un nombre
+basado en su contenido (<prefijo>_<hash>.<ext>) y en un hilo aparte se generan variantes
+redimensionadas en AVIF y WebP. Como el nombre cambia cuando cambia el contenido, todos
+estos archivos se pueden servir con Cache-Control: immutable.
+
+Las variantes generadas se anotan en <prefijo>_<hash>.json; hasta que ese archivo existe
+los templates usan solo el original.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow es opcional: sin él se guarda solo el original
+    Image = None
+
+# Anchos de las variantes (px). También se genera una al ancho original si es menor que el último
+ANCHOS = (320, 640, 1024, 1600)
+# Formatos de las variantes, en orden de preferencia para <picture>
+FORMATOS = ('avif', 'webp')
+CALIDAD = {'avif': {'quality': 60, 'speed': 6}, 'webp': {'quality': 80, 'method': 4}}
+EXTENSIONES = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# Nombres generados por ImagenesSubidas.guardar (se usan para decidir qué archivos son inmutables)
+PATRON_NOMBRE = re.compile(r'^[a-z]+_[0-9a-f]{16}(_\d+)?\.[a-z]+$')
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('IMAGENES_WORKERS', 2)), thread_name_prefix='imagenes')
+
+
+def formatos_disponibles():
+    """Formatos de FORMATOS que soporta el Pillow instalado"""
+    if Image is None:
+        return []
+    return [formato for formato in FORMATOS if features.check(formato)]
+
+
+class ImagenesSubidas:
+    """
+    Imágenes subidas de una app (su UPLOAD_FOLDER): las guarda, agenda sus variantes y recuerda en
+    memoria los manifiestos ya leídos. Cada app de create_app() tiene la suya; el executor es compartido.
+    `al_generar()` se llama (desde el hilo del executor) cuando terminan las variantes de una imagen:
+    lo que se renderizó antes, como las instantáneas, todavía no las incluía.
+    """
+
+    def __init__(self, carpeta, al_generar=None):
+        self.carpeta = carpeta
+        self.al_generar = al_generar
+        self._variantes = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, archivo, prefijo):
+        """
+        Guarda un archivo subido (FileStorage) como <prefijo>_<hash>.<ext> y agenda en segundo plano
+        la generación de variantes. Retorna el nombre del archivo guardado.
+        Lanza ValueError si el archivo no es una imagen válida.
+        """
+        datos = archivo.read()
+        digest = hashlib.sha256(datos).hexdigest()[:16]
+        imagen = None
+
+        if Image is not None:
+            try:
+                imagen = Image.open(io.BytesIO(datos))
+                imagen.load()
+            except Exception:
+                raise ValueError('El archivo no es una imagen válida')
+            ext = EXTENSIONES.get(imagen.format)
+            if ext is None:
+                raise ValueError('Formato no permitido. Use PNG, JPG, JPEG, GIF o WEBP')
+        else:
+            ext = os.path.splitext(archivo.filename)[1].lstrip('.').lower()
+
+        nombre = f'{prefijo}_{digest}.{ext}'
+        ruta = os.path.join(self.carpeta, nombre)
+        if not os.path.exists(ruta):
+            _escribir(ruta, datos)
+
+        # Los GIF animados se dejan tal cual para no perder la animación
+        if imagen is not None and not getattr(imagen, 'is_animated', False):
+            _executor.submit(generar_variantes, imagen, ruta).add_done_callback(self._generadas)
+        return nombre
+
+    def _generadas(self, futuro):
+        if self.al_generar and futuro.exception() is None:
+            self.al_generar()
+
+    def variantes(self, nombre):
+        """
+        Retorna {formato: [(archivo, ancho), ...]} con las variantes ya generadas de `nombre`,
+        o {} si todavía no están (o la imagen no pasó por guardar).
+        """
+        with self._lock:
+            if nombre in self._variantes:
+                return self._variantes[nombre]
+
+        ruta = os.path.join(self.carpeta, os.path.splitext(nombre)[0] + '.json')
+        try:
+            with open(ruta, 'rb') as f:
+                lista = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        resultado = {}
+        for variante in lista:
+            resultado.setdefault(variante['formato'], []).append((variante['archivo'], variante['ancho']))
+        with self._lock:
+            self._variantes[nombre] = resultado
+        return resultado
+
+    def eliminar(self, nombre):
+        """Elimina el original, sus variantes y el manifiesto"""
+        rutas = [os.path.join(self.carpeta, nombre), os.path.join(self.carpeta, os.path.splitext(nombre)[0] + '.json')]
+        for archivos in self.variantes(nombre).values():
+            rutas.extend(os.path.join(self.carpeta, archivo) for archivo, _ in archivos)
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        with self._lock:
+            self._variantes.pop(nombre, None)
+
+
+def generar_variantes(imagen, ruta):
+    """Genera las variantes de `imagen` junto a `ruta` y escribe el manifiesto .json"""
+    base = os.path.splitext(ruta)[0]
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info or imagen.mode in ('LA', 'PA') else 'RGB')
+
+    anchos = [ancho for ancho in ANCHOS if ancho < imagen.width]
+    if imagen.width <= ANCHOS[-1]:
+        anchos.append(imagen.width)
+
+    variantes = []
+    for ancho in anchos:
+        copia = imagen.copy()
+        copia.thumbnail((ancho, copia.height), Image.LANCZOS)
+        for formato in formatos_disponibles():
+            destino = f'{base}_{ancho}.{formato}'
+            buffer = io.BytesIO()
+            copia.save(buffer, format=formato.upper(), **CALIDAD[formato])
+            _escribir(destino, buffer.getvalue())
+            variantes.append({'formato': formato, 'ancho': ancho, 'archivo': os.path.basename(destino)})
+
+    _escribir(base + '.json', json.dumps(variantes).encode())
+
+
+def _escribir(ruta, datos):
+    """Escritura atómica: otro worker nunca ve un archivo a medio escribir"""
+    temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporal, 'wb') as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
@@ -0,0 +1,127 @@
+"""
+Importación y exportación masiva de torneos en CSV o NDJSON (un objeto JSON por línea).
+
+La lectura es incremental: las filas se leen, validan y entregan de a una, sin cargar el
+archivo completo en memoria. El CSV usa las mismas columnas que genera la exportación,
+así un archivo exportado se puede volver a importar (la columna id se ignora).
+"""
+import csv
+import io
+import json
+from datetime import date, time
+
+COLUMNAS = ['id', 'nombre_tienda', 'ubicacion', 'fecha', 'hora', 'premio', 'tipo_juego', 'categoria', 'tipo_torneo', 'imagen']
+
+# Largo máximo de cada campo (el de las columnas de Torneo) y si es obligatorio
+CAMPOS = {
+    'nombre_tienda': (100, True),
+    'ubicacion': (100, True),
+    'premio': (100, False),
+    'tipo_juego': (50, True),
+    'categoria': (20, True),
+    'tipo_torneo': (30, True),
+    'imagen': (500, False),
+}
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def detectar_formato(mimetype, nombre_archivo=None):
+    """Retorna 'csv' o 'ndjson' según el Content-Type o la extensión del archivo subido, o None"""
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines'):
+        return 'ndjson'
+    if nombre_archivo:
+        extension = nombre_archivo.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('ndjson', 'jsonl'):
+            return 'ndjson'
+    return None
+
+
+def leer_filas(stream, formato):
+    """
+    Genera (numero_de_linea, dict) por cada fila de `stream` (binario).
+    Las filas con JSON inválido se entregan como (numero, ValueError) para reportarlas junto al resto.
+    """
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        lector = csv.DictReader(texto)
+        for fila in lector:
+            yield lector.line_num, fila
+        return
+
+    for numero, linea in enumerate(texto, start=1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            yield numero, ValueError('JSON inválido')
+            continue
+        if not isinstance(fila, dict):
+            yield numero, ValueError('Cada línea debe ser un objeto JSON')
+            continue
+        yield numero, fila
+
+
+def validar_fila(fila):
+    """
+    Convierte una fila leída en los valores de un Torneo (fecha y hora como date/time).
+    Lanza ValueError con un mensaje legible si falta un campo o tiene un valor inválido.
+    """
+    valores = {}
+    for campo, (largo, obligatorio) in CAMPOS.items():
+        valor = fila.get(campo)
+        valor = str(valor).strip() if valor is not None else ''
+        if not valor:
+            if obligatorio:
+                raise ValueError(f'Falta el campo {campo}')
+            valores[campo] = None if campo == 'imagen' else ''
+            continue
+        if len(valor) > largo:
+            raise ValueError(f'{campo} supera los {largo} caracteres')
+        valores[campo] = valor
+
+    try:
+        valores['fecha'] = date.fromisoformat(str(fila.get('fecha') or '').strip())
+    except ValueError:
+        raise ValueError('fecha debe tener el formato YYYY-MM-DD')
+    try:
+        valores['hora'] = time.fromisoformat(str(fila.get('hora') or '').strip())
+    except ValueError:
+        raise ValueError('hora debe tener el formato HH:MM')
+    return valores
+
+
+def escribir_filas(filas, formato):
+    """
+    Genera el archivo de exportación por partes a partir de tuplas en el orden de COLUMNAS.
+    Cada parte es un bloque de texto listo para enviar al cliente.
+    """
+    buffer = io.StringIO()
+    if formato == 'csv':
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUMNAS)
+
+    for fila in filas:
+        valores = [valor.isoformat() if isinstance(valor, date) else valor for valor in fila]
+        valores[4] = fila[4].strftime('%H:%M')
+        if formato == 'csv':
+            escritor.writerow(valores)
+        else:
+            buffer.write(json.dumps(dict(zip(COLUMNAS, valores)), ensure_ascii=False))
+            buffer.write('\n')
+        # Se envía en bloques de ~64 KB en vez de fila por fila
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
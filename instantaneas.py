@@ -0,0 +1,239 @@
+"""
+Instantáneas de la página pública: el HTML y el JSON que ve cualquier visitante anónimo, guardados en
+archivos cada vez que cambian los torneos, el logo o el popup.
+
+GeneradorInstantaneas los renderiza con la propia app (en un hilo aparte, así la escritura del admin no
+espera) y ServidorInstantaneas, un middleware WSGI como ServidorActivos, los responde a los visitantes
+sin sesión antes de llegar a Flask: sin SQLAlchemy, sin Jinja y con un solo stat por petición.
+
+Cada archivo lleva en el nombre la fecha y las versiones (tabla Version) con que se renderizó:
+index.2026-01-17.logo2-popup1-torneos40.html. El middleware relee las versiones de la base como máximo
+cada `ttl` segundos (como CacheSingleton) y solo sirve el archivo de las versiones actuales, así un
+cambio hecho en otra instancia (otro worker, otro contenedor, el cron de `flask archivar`) deja de
+servir la instantánea vieja en a lo sumo `ttl` segundos aunque el archivo siga en disco. Por la fecha,
+a medianoche el archivo de ayer deja de servirse solo (las etiquetas PROX/PAST dependen del día).
+Si falta el archivo, responde Flask y esa misma petición pide la instantánea nueva.
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, time as hora, timezone
+from urllib.parse import parse_qsl
+
+from werkzeug.http import parse_cookie
+
+from activos import TAMANO_MAXIMO, Activo, responder_activo
+
+
+def archivo_instantanea(carpeta, nombre, fecha, versiones):
+    """Ruta del archivo de `nombre` ('index.html') para el día `fecha` y las `versiones` [(nombre, valor, ...)]"""
+    base, extension = os.path.splitext(nombre)
+    etiqueta = '-'.join(f'{contador}{valor}' for contador, valor, *_ in versiones) or 'v0'
+    return os.path.join(carpeta, f'{base}.{fecha.isoformat()}.{etiqueta}{extension}')
+
+
+def validadores_version(nombre, valor, actualizado_en, hoy):
+    """
+    (ETag, Last-Modified) de una respuesta que depende solo del contador `nombre` de Version.
+    Las etiquetas PROX/PAST cambian a medianoche, así que el día también es parte de la versión.
+    Lo usan respuesta_condicional (app.py) y el middleware, para que ambos caminos coincidan.
+    """
+    etag = f'{nombre}-{valor}-{hoy.isoformat()}'
+    modificado = datetime.combine(hoy, hora.min).astimezone(timezone.utc)
+    if actualizado_en:
+        modificado = max(modificado, actualizado_en.replace(tzinfo=timezone.utc))
+    return etag, modificado.replace(microsecond=0)
+
+
+def sin_parametros(query_string):
+    """True si la URL no tiene parámetros o todos están vacíos (?filtro-ubicacion=&... de los formularios)"""
+    return all(not valor for _, valor in parse_qsl(query_string, keep_blank_values=True))
+
+
+class GeneradorInstantaneas:
+    """
+    Escribe en `carpeta` un archivo por cada ruta de `rutas` (ruta -> nombre de archivo).
+    `renderizar(ruta)` retorna el cuerpo de la respuesta anónima (None si no se debe guardar) y
+    `versiones()` las filas (nombre, valor, actualizado_en) de Version de las que depende: si cambian
+    mientras se renderiza, se descarta el resultado y se vuelve a empezar. Como el archivo lleva las
+    versiones en el nombre, un render lento nunca pisa el de una versión más nueva.
+    """
+
+    def __init__(self, carpeta, rutas, renderizar, versiones, al_fallar=None):
+        self.carpeta = carpeta
+        self.rutas = rutas
+        self.renderizar = renderizar
+        self.versiones = versiones
+        self.al_fallar = al_fallar
+        self._pendiente = False
+        self._hilo = None
+        self._revisado = None
+        self._lock = threading.Lock()
+        os.makedirs(carpeta, exist_ok=True)
+
+    def invalidar(self):
+        """Borra todas las instantáneas: hasta que se regeneren, los workers de este disco pasan a Flask"""
+        self._borrar(set())
+
+    def programar(self):
+        """Regenera en segundo plano; varias llamadas seguidas se juntan en una sola regeneración"""
+        with self._lock:
+            self._pendiente = True
+            if self._hilo is None:
+                # No es daemon: un comando de flask (archivar, seed) espera a que termine antes de salir
+                self._hilo = threading.Thread(target=self._trabajar, name='instantaneas')
+                self._hilo.start()
+
+    def programar_si_falta(self, versiones):
+        """Regenera si no hay instantánea de hoy para `versiones` (se revisa una vez por día y versión)"""
+        clave = (date.today(), tuple(versiones))
+        if self._revisado == clave:
+            return
+        self._revisado = clave
+        if not os.path.exists(archivo_instantanea(self.carpeta, next(iter(self.rutas.values())), *clave)):
+            self.programar()
+
+    def _trabajar(self):
+        while True:
+            with self._lock:
+                if not self._pendiente:
+                    self._hilo = None
+                    return
+                self._pendiente = False
+            try:
+                if not self.generar():
+                    with self._lock:
+                        self._pendiente = True
+            except Exception as e:
+                if self.al_fallar:
+                    self.al_fallar(e)
+
+    def generar(self):
+        """Renderiza y escribe todas las instantáneas de hoy. False si los datos cambiaron mientras tanto"""
+        hoy = date.today()
+        antes = self.versiones()
+        cuerpos = {nombre: self.renderizar(ruta) for ruta, nombre in self.rutas.items()}
+        if self.versiones() != antes:
+            return False
+
+        for nombre, cuerpo in cuerpos.items():
+            if cuerpo is None or len(cuerpo) > TAMANO_MAXIMO:
+                # Demasiado grande para tenerla en memoria en cada worker: la sigue respondiendo Flask
+                continue
+            # Se escribe aparte y se reemplaza de una vez: nadie lee un archivo a medio escribir
+            descriptor, temporal = tempfile.mkstemp(dir=self.carpeta, suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(cuerpo)
+            os.replace(temporal, archivo_instantanea(self.carpeta, nombre, hoy, antes))
+
+        # Se conservan solo las de las versiones actuales (releídas: si cambiaron, las recién escritas sobran)
+        actuales = self.versiones()
+        self._borrar({os.path.basename(archivo_instantanea(self.carpeta, nombre, hoy, actuales))
+                      for nombre in self.rutas.values()})
+        return True
+
+    def _borrar(self, conservar):
+        for archivo in os.listdir(self.carpeta):
+            if archivo not in conservar and not archivo.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.carpeta, archivo))
+                except FileNotFoundError:
+                    pass
+
+
+class ServidorInstantaneas:
+    """
+    Middleware WSGI: responde GET/HEAD de las `rutas` (sin parámetros) desde la instantánea de hoy y de
+    las versiones actuales cuando la petición no trae ninguna de las `cookies` de sesión. Si falta, o no
+    se pudieron leer las versiones, pasa a Flask.
+
+    `versiones()` lee las filas de Version; se relee como máximo cada `ttl` segundos. Las rutas de
+    `condicionales` (ruta -> contador, las vistas con @respuesta_condicional) responden con el mismo ETag,
+    Last-Modified y `cache_control` que Flask; las demás con un ETag del contenido y no-cache.
+    Cada worker guarda en memoria la última versión leída de cada archivo (con gzip/brotli, como los
+    estáticos) y la relee cuando el archivo cambia.
+    """
+
+    def __init__(self, wsgi_app, carpeta, rutas, cookies, versiones, ttl, condicionales=None, cache_control='no-cache'):
+        self.wsgi_app = wsgi_app
+        self.carpeta = carpeta
+        self.rutas = rutas
+        self.cookies = cookies
+        self.versiones = versiones
+        self.ttl = ttl
+        self.condicionales = condicionales or {}
+        self.cache_control = cache_control
+        self._vigentes = (None, 0.0)  # (versiones, cuándo se leyeron): se reemplaza entera
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def __call__(self, environ, start_response):
+        nombre = self.rutas.get(environ.get('PATH_INFO', ''))
+        if (
+            nombre is None or environ.get('REQUEST_METHOD') not in ('GET', 'HEAD')
+            or not sin_parametros(environ.get('QUERY_STRING', ''))
+            or self._tiene_sesion(environ.get('HTTP_COOKIE'))
+        ):
+            return self.wsgi_app(environ, start_response)
+        versiones = self.vigentes()
+        if versiones is None:
+            return self.wsgi_app(environ, start_response)
+        hoy = date.today()
+        activo = self._leer(nombre, archivo_instantanea(self.carpeta, nombre, hoy, versiones))
+        if activo is None:
+            return self.wsgi_app(environ, start_response)
+
+        contador = self.condicionales.get(environ['PATH_INFO'])
+        if contador is None:
+            return responder_activo(
+                environ, start_response, activo, [('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding, Cookie')]
+            )
+        valor, actualizado_en = next(((v, a) for c, v, a in versiones if c == contador), (0, None))
+        etag, modificado = validadores_version(contador, valor, actualizado_en, hoy)
+        return responder_activo(
+            environ, start_response, activo, [('Cache-Control', self.cache_control), ('Vary', 'Accept-Encoding, Cookie')],
+            etag=etag, modificado=modificado
+        )
+
+    def vigentes(self):
+        """
+        Versiones actuales, releídas de la base si pasaron `ttl` segundos. None si no se pudieron leer
+        (la base no responde): entonces todo pasa a Flask y se reintenta después de otros `ttl` segundos
+        """
+        versiones, leidas = self._vigentes
+        if time.monotonic() - leidas < self.ttl:
+            return versiones
+        with self._lock:
+            if self._vigentes[1] == leidas:  # nadie las releyó mientras se esperaba el lock
+                try:
+                    versiones = tuple(self.versiones())
+                except Exception:
+                    versiones = None
+                self._vigentes = (versiones, time.monotonic())
+            return self._vigentes[0]
+
+    def vencer(self):
+        """La próxima petición relee las versiones (después de un commit en este worker)"""
+        self._vigentes = (None, 0.0)
+
+    def _tiene_sesion(self, cookie):
+        if not cookie:
+            return False
+        cookies = parse_cookie(cookie)
+        return any(nombre in cookies for nombre in self.cookies)
+
+    def _leer(self, nombre, ruta):
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return None
+        clave = (ruta, estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        guardado = self._cache.get(nombre)
+        if guardado is None or guardado[0] != clave:
+            try:
+                # Se comprime al leerla, en la petición: brotli con calidad media (la 11 tarda segundos)
+                guardado = self._cache[nombre] = (clave, Activo(ruta, calidad_brotli=5))
+            except FileNotFoundError:  # se borró entre el stat y la lectura
+                return None
+        return guardado[1]
@@ -0,0 +1,78 @@
+"""
+Limitación de intentos con cubetas de tokens (token bucket).
+
+Cada clave (una IP, un usuario) tiene una cubeta de `capacidad` tokens que se rellena a
+`por_segundo` tokens por segundo. Cada intento consume uno; sin tokens, el intento se rechaza
+hasta que se recupere alguno. Así se permiten ráfagas cortas legítimas (un typo, dos pestañas)
+pero no miles de intentos seguidos.
+
+El estado vive en un almacén intercambiable. AlmacenMemoria lo guarda en el proceso (cada worker
+de gunicorn lleva su cuenta); cualquier objeto con el mismo método `actualizar` sirve, por ejemplo
+uno sobre Redis para compartir los límites entre workers.
+"""
+import threading
+import time
+
+
+class AlmacenMemoria:
+    """Cubetas en un dict del proceso, con un máximo de claves para no crecer sin límite"""
+
+    def __init__(self, max_claves=10000):
+        self.max_claves = max_claves
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def actualizar(self, clave, capacidad, por_segundo, costo, ahora):
+        """
+        Rellena la cubeta de `clave` hasta `ahora` y, si alcanza, descuenta `costo` tokens.
+        Retorna los tokens que quedan (negativo = faltaron y no se descontó nada).
+        """
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * por_segundo)
+            if tokens >= costo:
+                tokens -= costo
+                restante = tokens
+            else:
+                restante = tokens - costo
+            self._cubetas[clave] = (tokens, ahora)
+            if len(self._cubetas) > self.max_claves:
+                self._podar(capacidad, por_segundo, ahora)
+            return restante
+
+    def _podar(self, capacidad, por_segundo, ahora):
+        """Descarta las cubetas que ya se rellenaron por completo (equivalen a no tener entrada)"""
+        llenas = [clave for clave, (tokens, ultimo) in self._cubetas.items()
+                  if tokens + (ahora - ultimo) * por_segundo >= capacidad]
+        for clave in llenas:
+            del self._cubetas[clave]
+        # Si aun así no alcanza (ataque desde muchas claves), se descartan las más antiguas
+        exceso = len(self._cubetas) - self.max_claves
+        if exceso > 0:
+            for clave in sorted(self._cubetas, key=lambda c: self._cubetas[c][1])[:exceso]:
+                del self._cubetas[clave]
+
+
+class Limitador:
+    """Cubeta de tokens por clave: `capacidad` intentos seguidos, recuperando `por_minuto` por minuto"""
+
+    def __init__(self, capacidad, por_minuto, almacen=None, prefijo=''):
+        self.capacidad = capacidad
+        self.por_segundo = por_minuto / 60
+        self.almacen = almacen if almacen is not None else AlmacenMemoria()
+        self.prefijo = prefijo
+
+    def consumir(self, clave, costo=1):
+        """Descuenta un intento. Retorna 0 si se permite, o los segundos a esperar si no"""
+        restante = self.almacen.actualizar(self.prefijo + clave, self.capacidad, self.por_segundo, costo, time.monotonic())
+        return 0 if restante >= 0 else self._espera(-restante)
+
+    def disponible(self, clave):
+        """Como consumir pero sin descontar nada: 0 si queda al menos un intento"""
+        restante = self.almacen.actualizar(self.prefijo + clave, self.capacidad, self.por_segundo, 0, time.monotonic())
+        return 0 if restante >= 1 else self._espera(1 - restante)
+
+    def _espera(self, faltante):
+        if self.por_segundo <= 0:
+            return float('inf')
+        return faltante / self.por_segundo
@@ -0,0 +1,153 @@
+"""
+Métricas del proceso en formato de texto de Prometheus (GET /metrics).
+
+Registro mínimo en memoria, sin dependencias: contadores, histogramas y medidores cuyo valor
+se calcula al momento de exponerlos. Cada worker de gunicorn tiene su propio registro; Prometheus
+distingue los workers por la etiqueta de instancia o se suman en la consulta.
+"""
+import bisect
+import threading
+from abc import ABC, abstractmethod
+
+# Límites (en segundos) de los histogramas de tiempos: de 1 ms a 10 s
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registro = []
+_registro_lock = threading.Lock()
+
+
+def _etiquetas(clave):
+    if not clave:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in clave) + '}'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica(ABC):
+    """Base de las métricas: se anota en el registro al crearse; cada tipo define sus muestras"""
+    tipo = None
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._lock = threading.Lock()
+        with _registro_lock:
+            _registro.append(self)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        lineas.extend(self._muestras())
+        return lineas
+
+    @abstractmethod
+    def _muestras(self):
+        """Líneas de texto con los valores actuales"""
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, errores...)"""
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda):
+        super().__init__(nombre, ayuda)
+        self._valores = {}
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def _muestras(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(clave)} {_numero(valor)}' for clave, valor in valores]
+
+
+class Histograma(_Metrica):
+    """Distribución de valores (latencias) en buckets acumulados, más su suma y cantidad"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # [conteo por bucket (el último es +Inf), suma]
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def resumen(self, **etiquetas):
+        """(cantidad, suma) de las observaciones con esas etiquetas (de todas las series si no se pasa ninguna)"""
+        buscadas = set(etiquetas.items())
+        cantidad, suma = 0, 0.0
+        with self._lock:
+            for clave, (conteos, total) in self._series.items():
+                if buscadas <= set(clave):
+                    cantidad += sum(conteos)
+                    suma += total
+        return cantidad, suma
+
+    def _muestras(self):
+        with self._lock:
+            series = [(clave, list(conteos), suma) for clave, (conteos, suma) in self._series.items()]
+        lineas = []
+        for clave, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(clave + (("le", _numero(limite)),))} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(clave)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(clave)} {acumulado}')
+        return lineas
+
+
+class Medidor(_Metrica):
+    """
+    Valor instantáneo calculado al exponer: `funcion` retorna un número
+    o una lista de (dict de etiquetas, número). Si falla, la métrica se omite.
+    """
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, funcion):
+        super().__init__(nombre, ayuda)
+        self.funcion = funcion
+
+    def _muestras(self):
+        try:
+            valor = self.funcion()
+        except Exception:
+            return []
+        if valor is None:
+            return []
+        if not isinstance(valor, list):
+            valor = [({}, valor)]
+        return [
+            f'{self.nombre}{_etiquetas(tuple(sorted(etiquetas.items())))} {_numero(numero)}'
+            for etiquetas, numero in valor
+        ]
+
+
+def exponer():
+    """Texto de todas las métricas registradas, listo para responder a Prometheus"""
+    with _registro_lock:
+        metricas = list(_registro)
+    lineas = []
+    for metrica in metricas:
+        lineas.extend(metrica.exponer())
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,161 @@
+"""
+Miniaturas locales de las imágenes externas de los torneos (Torneo.imagen).
+
+Cada URL remota se descarga una sola vez, se recorta al tamaño de la tarjeta y se guarda
+en disco como WebP. Las siguientes visitas se sirven desde ese archivo. La carpeta funciona
+como un cache LRU: cuando supera el máximo de bytes se borran las miniaturas usadas hace más tiempo
+(cada acierto actualiza la fecha de modificación del archivo).
+
+La descarga es una función intercambiable (config MINIATURAS_DESCARGADOR), así las pruebas
+pueden apuntar a un servidor local en lugar de internet.
+
+Una URL que no se pudo descargar o no es una imagen se recuerda como fallida durante `reintento`
+segundos: mientras tanto obtener() falla de inmediato, sin volver a esperar el timeout de la descarga
+en cada tarjeta que la muestra.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él no se generan miniaturas
+    Image = None
+
+TIMEOUT_DESCARGA = 5
+MAX_BYTES_DESCARGA = 5 * 1024 * 1024
+# URLs fallidas que se recuerdan como máximo (las vencidas se descartan al llegar a este número)
+MAX_FALLAS = 1000
+
+
+class DescargaFallida(Exception):
+    """La URL falló hace menos de `reintento` segundos: no se vuelve a intentar todavía"""
+
+
+def clave_url(url):
+    """Identificador corto y estable de una URL (nombre del archivo y versión en la URL pública)"""
+    return hashlib.sha256(url.encode()).hexdigest()[:24]
+
+
+def descargar_imagen(url):
+    """Descargador por defecto: GET http(s) con timeout y tamaño máximo. Retorna los bytes"""
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError('Solo se permiten URLs http(s)')
+    peticion = urllib.request.Request(url, headers={'User-Agent': 'InterCardsTCGHub/1.0'})
+    with urllib.request.urlopen(peticion, timeout=TIMEOUT_DESCARGA) as respuesta:
+        datos = respuesta.read(MAX_BYTES_DESCARGA + 1)
+    if len(datos) > MAX_BYTES_DESCARGA:
+        raise ValueError('La imagen supera el tamaño máximo')
+    return datos
+
+
+class CacheMiniaturas:
+    """Cache en disco, con límite de tamaño, de miniaturas de imágenes remotas"""
+
+    def __init__(self, carpeta, max_bytes, tamano=(640, 384), descargador=descargar_imagen, reintento=300):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.tamano = tamano
+        self.descargador = descargador
+        self.reintento = reintento
+        self._fallas = {}  # ruta -> momento (monotonic) desde el que se puede reintentar
+        self._locks = defaultdict(threading.Lock)
+        self._lock_recorte = threading.Lock()
+        os.makedirs(carpeta, exist_ok=True)
+
+    def ruta(self, url):
+        return os.path.join(self.carpeta, clave_url(url) + '.webp')
+
+    def obtener(self, url):
+        """
+        Retorna la ruta de la miniatura de `url`, descargándola y generándola si no está.
+        Lanza una excepción si no se pudo descargar o no es una imagen, y DescargaFallida
+        (sin intentarlo) si ya falló hace menos de `reintento` segundos.
+        """
+        ruta = self.ruta(url)
+        if self._tocar(ruta):
+            return ruta
+        self._revisar_falla(ruta)
+
+        # Un solo hilo por URL descarga; los demás esperan y usan el resultado
+        with self._locks[ruta]:
+            if self._tocar(ruta):
+                return ruta
+            # Quien esperaba el lock de una descarga que acaba de fallar no la repite
+            self._revisar_falla(ruta)
+            try:
+                datos = self._generar(self.descargador(url))
+            except Exception:
+                self._registrar_falla(ruta)
+                raise
+            temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+        self._locks.pop(ruta, None)
+
+        self.recortar()
+        return ruta
+
+    def _revisar_falla(self, ruta):
+        hasta = self._fallas.get(ruta)
+        if hasta is not None:
+            if time.monotonic() < hasta:
+                raise DescargaFallida('Falló hace poco; se reintenta más tarde')
+            self._fallas.pop(ruta, None)
+
+    def _registrar_falla(self, ruta):
+        ahora = time.monotonic()
+        if len(self._fallas) >= MAX_FALLAS:
+            for clave, hasta in list(self._fallas.items()):
+                if hasta <= ahora:
+                    self._fallas.pop(clave, None)
+            if len(self._fallas) >= MAX_FALLAS:
+                self._fallas.pop(next(iter(self._fallas)), None)
+        self._fallas[ruta] = ahora + self.reintento
+
+    def recortar(self):
+        """Borra las miniaturas menos usadas hasta quedar bajo max_bytes"""
+        with self._lock_recorte:
+            archivos = []
+            total = 0
+            with os.scandir(self.carpeta) as entradas:
+                for entrada in entradas:
+                    if entrada.name.endswith('.webp'):
+                        info = entrada.stat()
+                        archivos.append((info.st_mtime, info.st_size, entrada.path))
+                        total += info.st_size
+            if total <= self.max_bytes:
+                return
+            for _, tamano, ruta in sorted(archivos):
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                total -= tamano
+                if total <= self.max_bytes:
+                    break
+
+    def _generar(self, datos):
+        """Recorta la imagen al tamaño de la tarjeta (como object-cover) y la codifica en WebP"""
+        imagen = Image.open(io.BytesIO(datos))
+        imagen = ImageOps.exif_transpose(imagen)
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+        miniatura = ImageOps.fit(imagen, self.tamano, Image.LANCZOS)
+        buffer = io.BytesIO()
+        miniatura.save(buffer, format='WEBP', quality=75, method=4)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _tocar(ruta):
+        """Marca la miniatura como recién usada. Retorna False si no existe"""
+        try:
+            os.utime(ruta)
+            return True
+        except FileNotFoundError:
+            return False
@@ -1,11 +1,5 @@
-// Variables globales
-let torneosTodos = [];
-let ubicacionesDisponibles = new Set();
-
-// Cargar torneos al abrir la página
-document.addEventListener('DOMContentLoaded', async () => {
-    await cargarTorneos();
-});
+// La grid inicial y la lista de ubicaciones vienen renderizadas en index.html,
+// así que al abrir la página no se hace ningún fetch adicional.
 
 // Inicializar con datos dummy si es necesario
 async function inicializarDummy() {
@@ -19,124 +13,44 @@ async function inicializarDummy() {
     }
 }
 
-// Cargar todos los torneos
+// Recargar la grid con los filtros actuales (después de crear, editar o eliminar)
 async function cargarTorneos() {
-    try {
-        const response = await fetch('/api/torneos');
-        torneosTodos = await response.json();
-        ubicacionesDisponibles = new Set(torneosTodos.map(t => t.ubicacion).filter(u => u));
-        actualizarSelectUbicaciones();
-        await renderizarTorneos();
-    } catch (error) {
-        console.error('Error al cargar torneos:', error);
-    }
+    await renderizarTorneos();
 }
 
 // Renderizar torneos en la grid (usando HTMX)
 async function renderizarTorneos() {
     try {
-        const response = await fetch('/api/filtrar?filtro-fecha=&filtro-ubicacion=&filtro-juego=');
+        const params = new URLSearchParams({
+            'filtro-fecha': document.getElementById('filtro-fecha').value,
+            'filtro-ubicacion': document.getElementById('filtro-ubicacion').value,
+            'filtro-juego': document.getElementById('filtro-juego').value,
+            'upcoming': document.getElementById('filtro-periodo').value
+        });
+        if (document.getElementById('filtro-fin-de-semana').checked) {
+            params.set('weekend', 'true');
+        }
+        const response = await fetch(`/api/filtrar?${params}`);
         const html = await response.text();
-        document.getElementById('grid-torneos').innerHTML = html;
+        const grid = document.getElementById('grid-torneos');
+        grid.innerHTML = html;
+        // Activar el fragmento "cargar más" de la paginación
+        htmx.process(grid);
     } catch (error) {
         console.error('Error al renderizar torneos:', error);
     }
 }
 
-// Actualizar opciones del select de ubicaciones
-function actualizarSelectUbicaciones() {
+// Agregar una ubicación nueva al select (si no existe)
+function agregarUbicacion(ubicacion) {
     const select = document.getElementById('filtro-ubicacion');
-    const ubicacionesArray = Array.from(ubicacionesDisponibles).sort();
-    
-    const opcionesActuales = Array.from(select.querySelectorAll('option')).slice(1);
-    opcionesActuales.forEach(opt => opt.remove());
-    
-    ubicacionesArray.forEach(ubicacion => {
-        const option = document.createElement('option');
-        option.value = ubicacion;
-        option.textContent = ubicacion;
-        select.appendChild(option);
-    });
-}
-
-// Aplicar filtros
-function aplicarFiltros() {
-    const fechaFiltro = document.getElementById('filtro-fecha').value;
-    const ubicacionFiltro = document.getElementById('filtro-ubicacion').value;
-    
-    let torneosFiltrados = torneosTodos;
-    
-    // Filtrar por fecha
-    if (fechaFiltro) {
-        torneosFiltrados = torneosFiltrados.filter(t => t.fecha === fechaFiltro);
-    }
+    const existentes = Array.from(select.options).map(opt => opt.value);
+    if (!ubicacion || existentes.includes(ubicacion)) return;
     
-    // Filtrar por ubicación
-    if (ubicacionFiltro) {
-        torneosFiltrados = torneosFiltrados.filter(t => t.ubicacion === ubicacionFiltro);
-    }
-    
-    mostrarTorneos(torneosFiltrados);
-}
-
-// Mostrar torneos en la grid
-function mostrarTorneos(torneos) {
-    const grid = document.getElementById('grid-torneos');
-    
-    if (torneos.length === 0) {
-        grid.innerHTML = '<p class="mensaje-carga sin-resultados">No hay torneos que coincidan con los filtros</p>';
-        return;
-    }
-    
-    grid.innerHTML = torneos.map(torneo => crearTarjeta(torneo)).join('');
-}
-
-// Crear HTML de tarjeta
-function crearTarjeta(torneo) {
-    const fechaFormato = new Date(torneo.fecha).toLocaleDateString('es-ES', { 
-        weekday: 'short', 
-        year: 'numeric', 
-        month: 'short', 
-        day: 'numeric' 
-    });
-    
-    return `
-        <div class="tarjeta-torneo">
-            <div class="tarjeta-header">
-                <h3 class="tarjeta-titulo">${torneo.nombre_tienda}</h3>
-            </div>
-            
-            <div class="tarjeta-badges">
-                <span class="badge-juego">${torneo.tipo_juego}</span>
-                <span class="badge-categoria">${torneo.categoria}</span>
-                <span class="badge-tipo">${torneo.tipo_torneo}</span>
-            </div>
-            
-            <div class="tarjeta-info">
-                <div class="info-item">
-                    <div class="info-label">Fecha</div>
-                    <div class="info-value">${fechaFormato}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Hora</div>
-                    <div class="info-value">${torneo.hora}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Ubicación</div>
-                    <div class="info-value">${torneo.ubicacion || 'No especificada'}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Premio</div>
-                    <div class="info-value">${torneo.premio || 'No especificado'}</div>
-                </div>
-            </div>
-            
-            <div class="tarjeta-acciones">
-                <button class="btn-editar" onclick="abrirFormulario(${torneo.id})">Editar</button>
-                <button class="btn-eliminar" onclick="eliminarTorneo(${torneo.id})">Eliminar</button>
-            </div>
-        </div>
-    `;
+    const option = document.createElement('option');
+    option.value = ubicacion;
+    option.textContent = ubicacion;
+    select.appendChild(option);
 }
 
 // Abrir formulario para crear/editar
@@ -150,7 +64,7 @@ async function abrirFormulario(id = null) {
     
     if (id) {
         tituloModal.textContent = 'Editar Torneo';
-        const torneo = torneosTodos.find(t => t.id === id);
+        const torneo = await obtenerTorneo(id);
         
         if (torneo) {
             document.getElementById('torneo-id').value = torneo.id;
@@ -171,6 +85,17 @@ async function abrirFormulario(id = null) {
     modal.classList.remove('hidden');
 }
 
+// Obtener un torneo por id
+async function obtenerTorneo(id) {
+    try {
+        const response = await fetch(`/api/torneos/${id}`);
+        return response.ok ? await response.json() : null;
+    } catch (error) {
+        console.error('Error al obtener torneo:', error);
+        return null;
+    }
+}
+
 // Cerrar formulario
 function cerrarFormulario(event) {
     if (event && event.target.id !== 'modal') return;
@@ -210,7 +135,9 @@ async function guardarTorneo() {
         
         if (response.ok) {
             cerrarFormulario();
-            await cargarTorneos();
+            agregarUbicacion(datos.ubicacion);
+            // Con los cambios en vivo conectados la tarjeta llega por /api/cambios, sin recargar la grid
+            if (!cambiosConectados()) await cargarTorneos();
             mostrarNotificacion(id ? 'Torneo actualizado' : 'Torneo creado', 'exito');
         } else if (response.status === 401) {
             alert('Debes iniciar sesión para realizar esta acción');
@@ -243,7 +170,7 @@ async function eliminarTorneo(id) {
         
         if (response.ok) {
             cerrarFormulario();
-            await cargarTorneos();
+            if (!cambiosConectados()) await cargarTorneos();
             mostrarNotificacion('Torneo eliminado', 'exito');
         } else if (response.status === 401) {
             alert('Debes iniciar sesión para eliminar torneos');
@@ -260,7 +187,7 @@ async function eliminarTorneo(id) {
 // Limpiar filtro de fecha
 function limpiarFiltroFecha() {
     document.getElementById('filtro-fecha').value = '';
-    htmx.ajax('GET', '/api/filtrar?filtro-fecha=&filtro-ubicacion=' + document.getElementById('filtro-ubicacion').value + '&filtro-juego=' + document.getElementById('filtro-juego').value, '#grid-torneos');
+    renderizarTorneos();
 }
 
 // Limpiar todos los filtros
@@ -268,7 +195,93 @@ function limpiarFiltros() {
     document.getElementById('filtro-fecha').value = '';
     document.getElementById('filtro-ubicacion').value = '';
     document.getElementById('filtro-juego').value = '';
-    htmx.ajax('GET', '/api/filtrar?filtro-fecha=&filtro-ubicacion=&filtro-juego=', '#grid-torneos');
+    document.getElementById('filtro-periodo').value = '';
+    document.getElementById('filtro-fin-de-semana').checked = false;
+    renderizarTorneos();
+}
+
+// Cambios en vivo: /api/cambios avisa cada alta, edición o baja (de cualquier navegador)
+// y la tarjeta se reemplaza en su lugar, sin volver a descargar la grid.
+// Solo con la pestaña visible: una pestaña en segundo plano no ocupa una conexión (ni un hilo del
+// worker); al volver se reconecta desde el último cambio recibido y llegan los que faltaron
+let fuenteCambios = null;
+
+function escucharCambios() {
+    const grid = document.getElementById('grid-torneos');
+    if (!window.EventSource || !grid || document.hidden) return;
+    
+    fuenteCambios = new EventSource(`/api/cambios?desde=${grid.dataset.ultimoCambio || ''}`);
+    const recibido = (e) => {
+        if (e.lastEventId) grid.dataset.ultimoCambio = e.lastEventId;
+    };
+    fuenteCambios.addEventListener('torneo', (e) => {
+        recibido(e);
+        aplicarCambio(JSON.parse(e.data));
+    });
+    fuenteCambios.addEventListener('recargar', (e) => {
+        recibido(e);
+        renderizarTorneos();
+    });
+}
+
+function dejarDeEscuchar() {
+    if (fuenteCambios) fuenteCambios.close();
+    fuenteCambios = null;
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.hidden) dejarDeEscuchar();
+    else if (!fuenteCambios) escucharCambios();
+});
+
+function cambiosConectados() {
+    return fuenteCambios !== null && fuenteCambios.readyState === EventSource.OPEN;
+}
+
+function fechaLocal(fecha) {
+    const mes = String(fecha.getMonth() + 1).padStart(2, '0');
+    const dia = String(fecha.getDate()).padStart(2, '0');
+    return `${fecha.getFullYear()}-${mes}-${dia}`;
+}
+
+// Indica si un torneo pasa los filtros actuales de la grid (los mismos que aplica /api/filtrar)
+function coincideConFiltros(torneo) {
+    const valor = (id) => document.getElementById(id).value;
+    if (valor('filtro-ubicacion') && torneo.ubicacion !== valor('filtro-ubicacion')) return false;
+    if (valor('filtro-juego') && torneo.tipo_juego !== valor('filtro-juego')) return false;
+    if (valor('filtro-fecha')) return torneo.fecha === valor('filtro-fecha');
+    return valor('filtro-periodo') === 'false' || torneo.fecha >= fechaLocal(new Date());
+}
+
+function aplicarCambio(cambio) {
+    const grid = document.getElementById('grid-torneos');
+    // El rango del fin de semana lo calcula el servidor: en ese modo se pide la grid de nuevo
+    if (document.getElementById('filtro-fin-de-semana').checked) {
+        renderizarTorneos();
+        return;
+    }
+    
+    const actual = grid.querySelector(`[data-torneo-id="${cambio.id}"]`);
+    if (actual) actual.remove();
+    if (cambio.accion === 'eliminar' || !coincideConFiltros(cambio.torneo)) return;
+    
+    agregarUbicacion(cambio.torneo.ubicacion);
+    const plantilla = document.createElement('template');
+    plantilla.innerHTML = cambio.html.trim();
+    const tarjeta = plantilla.content.firstElementChild;
+    
+    // Se inserta en el orden de la paginación (fecha, id); si cae después de la última tarjeta
+    // cargada y hay más páginas, llegará con el "cargar más"
+    const siguiente = Array.from(grid.querySelectorAll('[data-torneo-id]')).find((el) =>
+        el.dataset.fecha > cambio.torneo.fecha || (el.dataset.fecha === cambio.torneo.fecha && Number(el.dataset.torneoId) > cambio.id)
+    );
+    const cargarMas = grid.querySelector(':scope > [hx-get]');
+    if (siguiente) {
+        grid.insertBefore(tarjeta, siguiente);
+    } else if (!cargarMas) {
+        grid.querySelectorAll(':scope > p').forEach((mensaje) => mensaje.remove());
+        grid.appendChild(tarjeta);
+    }
 }
 
 // Mostrar notificación simple
@@ -282,4 +295,5 @@ document.addEventListener('DOMContentLoaded', () => {
         e.preventDefault();
         await guardarTorneo();
     });
+    escucharCambios();
 });